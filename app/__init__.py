@@ -3,13 +3,18 @@ from pathlib import Path
 from flask import Flask, jsonify
 from flask_cors import CORS
 from sqlalchemy import inspect
+from sqlalchemy.schema import CreateTable, CreateIndex
 
 from .config import load_config
-from .db import init_engine_and_session, Base, get_engine
+from .db import init_engine_and_session, sqlite_pragmas, Base, get_engine
 
 # Blueprints
 from .controllers.evaluation_api import bp as evaluation_bp
 from .controllers.ui import bp as ui_bp  # UI
+from .cli import register_cli
+from .admission import init_admission
+from .query_budget import init_query_budget
+from .services.autosave_buffer import init_autosave
 
 
 def _ensure_instance_dirs(app: Flask):
@@ -51,28 +56,115 @@ def _resolve_sqlite_url(app: Flask, url: str) -> str:
     return f"sqlite:///{abs_path.as_posix()}"
 
 
+def sqlite_tuning(app: Flask) -> dict | None:
+    """PRAGMAs de SQLITE_TUNING (mismos para el engine sync y el async de app.asgi)."""
+    if not app.config.get("SQLITE_TUNING"):
+        return None
+    return sqlite_pragmas(
+        app.config["SQLITE_BUSY_TIMEOUT_MS"], app.config["SQLITE_CACHE_MB"], app.config["SQLITE_MMAP_MB"]
+    )
+
+
+def _add_missing_columns(engine, inspector):
+    """create_all no altera tablas existentes: agrega (ALTER TABLE ADD COLUMN) las columnas
+       nuevas del modelo que acepten NULL o tengan server_default. Luego: `flask backfill-progress`."""
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        present = {c["name"] for c in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in present:
+                continue
+            if not col.nullable and col.server_default is None:
+                print(f"⚠️  Columna {table.name}.{col.name} falta y requiere migración manual.")
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(dialect=engine.dialect)}"
+            if col.server_default is not None:
+                ddl += f" DEFAULT {col.server_default.arg}"
+            if not col.nullable:
+                ddl += " NOT NULL"
+            print("🧱", ddl)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+
+
+def _ensure_evaluation_ids(engine):
+    """evaluation_archives conserva el id original, así que evaluations nunca debe repetir un id.
+       En SQLite sqlite_autoincrement solo aplica al crear la tabla: las BD anteriores se
+       reconstruyen con AUTOINCREMENT (respaldar antes en BD grandes) y sqlite_sequence queda por
+       encima del mayor id vivo o archivado. En Postgres la secuencia SERIAL ya no repite ids."""
+    if engine.dialect.name != "sqlite":
+        return
+    from .models import Evaluation
+    table = Evaluation.__table__
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        # Fuera de transacción (dentro no tiene efecto): sin esto DROP TABLE borraría en cascada
+        cur.execute("PRAGMA foreign_keys=OFF")
+        try:
+            # IMMEDIATE: si varios workers arrancan a la vez, solo uno reconstruye
+            cur.execute("BEGIN IMMEDIATE")
+            row = cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table.name,)).fetchone()
+            if row is None:
+                raw.rollback()
+                return
+            if "AUTOINCREMENT" not in row[0].upper():
+                print(f"🧱 Reconstruyendo {table.name} con AUTOINCREMENT")
+                present = {r[1] for r in cur.execute(f"PRAGMA table_info({table.name})")}
+                cols = ", ".join(c.name for c in table.columns if c.name in present)
+                ddl = str(CreateTable(table).compile(dialect=engine.dialect))
+                cur.execute(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {table.name}_new ", 1))
+                cur.execute(f"INSERT INTO {table.name}_new ({cols}) SELECT {cols} FROM {table.name}")
+                cur.execute(f"DROP TABLE {table.name}")
+                cur.execute(f"ALTER TABLE {table.name}_new RENAME TO {table.name}")
+                for ix in table.indexes:
+                    cur.execute(str(CreateIndex(ix).compile(dialect=engine.dialect)))
+            floor = cur.execute(
+                "SELECT max(coalesce((SELECT max(id) FROM evaluations), 0),"
+                " coalesce((SELECT max(id) FROM evaluation_archives), 0))"
+            ).fetchone()[0]
+            seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table.name,)).fetchone()
+            if seq is None:
+                cur.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, floor))
+            elif seq[0] < floor:
+                print(f"🧱 sqlite_sequence de {table.name}: {seq[0]} → {floor}")
+                cur.execute("UPDATE sqlite_sequence SET seq=? WHERE name=?", (floor, table.name))
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            cur.execute("PRAGMA foreign_keys=ON")
+    finally:
+        raw.close()
+
+
 def _maybe_create_tables():
     engine = get_engine()
     inspector = inspect(engine)
     force = os.getenv("FORCE_DB_CREATE", "").lower() in ("1", "true", "yes")
     try:
-        have_evals = inspector.has_table("evaluations")
-        have_resp = inspector.has_table("evaluation_responses")
-        have_sigs = inspector.has_table("signatures")
-        if force or not (have_evals and have_resp and have_sigs):
+        missing = [t for t in Base.metadata.tables if not inspector.has_table(t)]
+        if force or missing:
             print("🧱 Creando tablas (create_all). FORCE_DB_CREATE =", force)
             Base.metadata.create_all(bind=engine)
         else:
             print("✅ Tablas ya existen. No se ejecuta create_all().")
+        _add_missing_columns(engine, inspector)
+        _ensure_evaluation_ids(engine)
     except Exception:
         import traceback
         print("⚠️  No se pudo verificar/crear tablas automáticamente.")
         traceback.print_exc()
 
 
-def create_app():
-    app = Flask(__name__, instance_relative_config=True)
+def create_app(test_config: dict | None = None, instance_path: str | None = None):
+    """test_config pisa la config de entorno; instance_path permite aislar BD y archivos (tests)."""
+    app = Flask(__name__, instance_relative_config=True, instance_path=instance_path)
     app.config.from_mapping(load_config())
+    if test_config:
+        app.config.from_mapping(test_config)
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     _ensure_instance_dirs(app)
@@ -82,19 +174,32 @@ def create_app():
     app.config["DATABASE_URL"] = _resolve_sqlite_url(app, db_url)
     print("DATABASE_URL =", app.config["DATABASE_URL"])
 
-    # DB
-    init_engine_and_session(app.config["DATABASE_URL"])
+    # DB (en SQLite: WAL + PRAGMAs por conexión, ver SQLITE_*)
+    init_engine_and_session(app.config["DATABASE_URL"], sqlite_tuning(app),
+                            write_lock=app.config.get("SQLITE_WRITE_LOCK", False))
 
     # Importa modelos antes de create_all
-    from .models import Evaluation, EvaluationResponse, Signature  # noqa
+    from .models import Evaluation, EvaluationResponse, Signature, EvaluationArchive  # noqa
 
     # Crea tablas si no existen (o fuerza con env var)
     _maybe_create_tables()
 
+    # Límites de concurrencia para rutas pesadas (PDF, export, firmas)
+    init_admission(app)
+
+    # Presupuesto de queries por endpoint (QUERY_BUDGET=log|raise, QUERY_RAISELOAD=1)
+    init_query_budget(app)
+
+    # Buffer write-behind del autosave (AUTOSAVE_BUFFER=1); reaplica journals pendientes
+    init_autosave(app)
+
     # Blueprints
     app.register_blueprint(evaluation_bp, url_prefix="/api/evaluaciones")
     app.register_blueprint(ui_bp)
 
+    # Comandos `flask ...` (mantenimiento / jobs batch)
+    register_cli(app)
+
     @app.get("/api/health")
     def health():
         return {"status": "ok"}
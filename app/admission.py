@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import Flask, current_app, jsonify, make_response
+
+
+class AdmissionLimiter:
+    """Límite de concurrencia por ruta con cola de espera acotada.
+       Por proceso (cada worker de gunicorn tiene el suyo)."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, wait_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued_seen = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < self.max_concurrent:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False
+
+            self.queued += 1
+            self.max_queued_seen = max(self.max_queued_seen, self.queued)
+            deadline = time.monotonic() + self.wait_timeout
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.wait_timeout))
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "wait_timeout": self.wait_timeout,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "max_queued_seen": self.max_queued_seen,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+            }
+
+
+def parse_limits(spec: str) -> dict:
+    """'pdf=2:4:15,sign=4:8:10' → {nombre: (concurrencia, cola, timeout_seg)}"""
+    limits = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, values = part.partition("=")
+        conc, queue, timeout = (values.split(":") + ["0", "0"])[:3]
+        limits[name.strip()] = (int(conc), int(queue or 0), float(timeout or 0))
+    return limits
+
+
+def default_limits(threads: int) -> str:
+    """ADMISSION_LIMITS por defecto según los threads del worker: entre todas las rutas pesadas
+       (en curso + en cola) nunca toman todos; con 8 quedan 4 para /responses, /autosave y listas."""
+    t = max(1, threads)
+    return f"pdf={max(1, t // 6)}:{t // 12}:15,tabular=1:0:5,sign={max(1, t // 6)}:{t // 8}:10"
+
+
+def check_limits(limits: dict, threads: int):
+    """Un request admitido o en cola ocupa un thread del worker: si las rutas pesadas pueden
+       tomarlos todos, el límite nunca rechaza y el resto de las rutas se forma detrás."""
+    held = sum(conc + queue for conc, queue, _ in limits.values())
+    if held >= threads:
+        raise ValueError(
+            f"ADMISSION_LIMITS ocupa hasta {held} threads (concurrencia + cola) y el worker tiene "
+            f"{threads} (WEB_THREADS): sube --threads o baja los límites"
+        )
+
+
+def init_admission(app: Flask):
+    threads = app.config.get("WEB_THREADS", 8)
+    limits = parse_limits(app.config.get("ADMISSION_LIMITS") or default_limits(threads))
+    check_limits(limits, threads)
+    limiters = {name: AdmissionLimiter(name, conc, queue, timeout) for name, (conc, queue, timeout) in limits.items()}
+    app.extensions["admission"] = limiters
+
+    @app.get("/api/metrics")
+    def admission_metrics():
+        return {"threads": threads, "admission": {name: lim.snapshot() for name, lim in limiters.items()}}
+
+
+def admission(name: str):
+    """Decorador de vista: si la ruta pesada está saturada responde 503 + Retry-After
+       en lugar de ocupar un thread más del worker."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            lim = current_app.extensions.get("admission", {}).get(name)
+            if lim is None:
+                return fn(*args, **kwargs)
+            if not lim.acquire():
+                resp = jsonify({"error": "servidor ocupado, reintenta más tarde", "route": name})
+                resp.status_code = 503
+                resp.headers["Retry-After"] = str(lim.retry_after)
+                return resp
+            try:
+                resp = make_response(fn(*args, **kwargs))
+            except Exception:
+                lim.release()
+                raise
+            # Generadores (export CSV) hacen el trabajo mientras se envían: liberar al cerrar.
+            # send_file (direct_passthrough) ya terminó el render y Werkzeug no llama close().
+            if resp.is_streamed and not resp.direct_passthrough:
+                resp.call_on_close(lim.release)
+            else:
+                lim.release()
+            return resp
+        return wrapper
+    return deco
@@ -0,0 +1,39 @@
+"""Modo ASGI opcional: `uvicorn asgi:app`.
+
+Las rutas de captura (create, responses, autosave, sign, complete, export PDF, events) son vistas
+async de Starlette sobre un AsyncEngine con pool (asyncpg / aiosqlite): un request que espera a la
+BD no ocupa un thread, así un proceso pequeño atiende cientos de tablets. El resto de la API y la
+UI siguen siendo la app Flask, montada detrás con a2wsgi en un pool de WEB_THREADS threads.
+"""
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from . import create_app, sqlite_tuning
+from .db import init_async_engine, get_async_engine, dispose_async_engine
+from .controllers.evaluation_api_async import routes as async_routes
+
+
+def create_asgi_app(test_config: dict | None = None, instance_path: str | None = None) -> Starlette:
+    flask_app = create_app(test_config, instance_path)
+    config = flask_app.config
+    # SQLite: el write lock async solo serializa las escrituras de este loop; contra las del engine
+    # sync (rutas Flask, flush del buffer) sigue mediando busy_timeout
+    init_async_engine(
+        config["DATABASE_URL"], sqlite_tuning(flask_app), write_lock=config.get("SQLITE_WRITE_LOCK", False),
+        pool_size=config.get("ASYNC_POOL_SIZE", 10), max_overflow=config.get("ASYNC_MAX_OVERFLOW", 10),
+    )
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        get_async_engine()  # pool de este event loop (uno por proceso de uvicorn)
+        yield
+        await dispose_async_engine()
+
+    app = Starlette(
+        routes=[*async_routes, Mount("/", app=WSGIMiddleware(flask_app, workers=config.get("WEB_THREADS", 8)))],
+        lifespan=lifespan,
+    )
+    app.state.flask_app = flask_app
+    return app
@@ -0,0 +1,76 @@
+import sys
+from contextlib import nullcontext
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+
+def register_cli(app: Flask):
+
+    @app.cli.command("archive-completed")
+    @click.option("--older-than-days", type=int, default=None, help="Por defecto ARCHIVE_AFTER_DAYS.")
+    @click.option("--batch-size", type=int, default=None, help="Por defecto ARCHIVE_BATCH_SIZE.")
+    @click.option("--max-batches", type=int, default=None, help="Detener tras N lotes (se reanuda en la siguiente corrida).")
+    def archive_completed(older_than_days, batch_size, max_batches):
+        """Mueve COMPLETADAS antiguas a evaluation_archives (snapshot comprimido + PDF)."""
+        from .services import ArchiveService
+        total = ArchiveService.archive_completed(older_than_days, batch_size, max_batches, log=click.echo)
+        click.echo(f"Archivadas: {total}")
+
+    @app.cli.command("backfill-progress")
+    @click.option("--batch-size", type=int, default=500, show_default=True)
+    def backfill_progress(batch_size):
+        """Recalcula los contadores de progreso por sección y el bitmask de firmas."""
+        from .services import BatchRunner, JOBS
+        result = BatchRunner(JOBS["recompute-counters"], chunk_size=batch_size, workers=1, log=click.echo).run()
+        click.echo(f"Recalculadas: {result['changed']}")
+
+    # Jobs de mantenimiento: `flask maint <job> [--workers N --pool thread|process --dry-run ...]`
+    maint = AppGroup("maint", help="Jobs de mantenimiento por lotes (paralelos y reanudables).")
+    app.cli.add_command(maint)
+
+    def _maint_command(job):
+        @maint.command(job.name, help=job.description)
+        @click.option("--chunk-size", type=int, default=200, show_default=True)
+        @click.option("--workers", type=int, default=4, show_default=True)
+        @click.option("--pool", type=click.Choice(["thread", "process"]), default="thread", show_default=True,
+                      help="process para trabajo de CPU (render de PDFs).")
+        @click.option("--dry-run", is_flag=True, help="Solo reporta lo que cambiaría.")
+        @click.option("--restart", is_flag=True, help="Ignorar el checkpoint y empezar desde el inicio.")
+        @click.option("--limit", type=int, default=None, help="Procesar a lo más N (el checkpoint queda para continuar).")
+        def command(chunk_size, workers, pool, dry_run, restart, limit):
+            from .services import BatchRunner
+            result = BatchRunner(job, chunk_size=chunk_size, workers=workers, pool=pool, dry_run=dry_run,
+                                 resume=not restart, limit=limit, log=click.echo).run()
+            click.echo(f"[{job.name}] listo: {result['processed']} procesados, {result['changed']} "
+                       f"{'a cambiar' if dry_run else 'cambiados'} en {result['seconds']} s")
+
+    from .services import JOBS
+    for job in JOBS.values():
+        _maint_command(job)
+
+    @app.cli.command("export-evaluations")
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv")
+    @click.option("--out", type=click.Path(dir_okay=False), default="-", help="Archivo destino ('-' = stdout).")
+    @click.option("--status", type=click.Choice(["completada", "pendiente", "todas"]), default="completada")
+    @click.option("--from", "q_from", default="", help="Día local inicial YYYY-MM-DD.")
+    @click.option("--to", "q_to", default="", help="Día local final YYYY-MM-DD (inclusivo).")
+    @click.option("--area", default="")
+    @click.option("--no-archived", is_flag=True, help="Excluir evaluation_archives.")
+    def export_evaluations(fmt, out, status, q_from, q_to, area, no_archived):
+        """Exporta evaluaciones a CSV / JSON Lines (una fila por evaluación, streaming)."""
+        from .models import EvalStatus
+        from .services import TabularExportService
+        try:
+            gen = TabularExportService.stream(
+                fmt,
+                status=None if status == "todas" else EvalStatus(status),
+                q_from=q_from, q_to=q_to, area=area, include_archived=not no_archived,
+            )
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        target = nullcontext(sys.stdout) if out == "-" else open(out, "w", encoding="utf-8", newline="")
+        with target as f:
+            for chunk in gen:
+                f.write(chunk)
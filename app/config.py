@@ -7,8 +7,42 @@ def load_config():
         "SECRET_KEY": os.getenv("SECRET_KEY", "change-me"),
         "DATABASE_URL": normalize_db_url(os.getenv("DATABASE_URL", "sqlite:///instance/dev.db")),
         "DEFAULT_TZ": os.getenv("DEFAULT_TZ", "America/Mexico_City"),
+        # SQLite concurrente (dev / fallback on-prem): WAL + PRAGMAs y lock de escritura por proceso
+        "SQLITE_TUNING": _flag("SQLITE_TUNING", "1"),
+        "SQLITE_WRITE_LOCK": _flag("SQLITE_WRITE_LOCK", "1"),
+        "SQLITE_BUSY_TIMEOUT_MS": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "SQLITE_CACHE_MB": int(os.getenv("SQLITE_CACHE_MB", "64")),
+        "SQLITE_MMAP_MB": int(os.getenv("SQLITE_MMAP_MB", "256")),
+        # Retención: COMPLETADAS sin cambios en N días pasan a evaluation_archives
+        "ARCHIVE_AFTER_DAYS": int(os.getenv("ARCHIVE_AFTER_DAYS", "180")),
+        "ARCHIVE_BATCH_SIZE": int(os.getenv("ARCHIVE_BATCH_SIZE", "200")),
+        # Threads por worker de gunicorn (--threads $WEB_THREADS en render.yaml)
+        "WEB_THREADS": int(os.getenv("WEB_THREADS", "8")),
+        # Workers de gunicorn: gunicorn toma WEB_CONCURRENCY si no se pasa -w (render.yaml)
+        "WEB_WORKERS": int(os.getenv("WEB_CONCURRENCY", "1")),
+        # Modo ASGI (uvicorn asgi:app): pool del engine async, uno por event loop / proceso
+        "ASYNC_POOL_SIZE": int(os.getenv("ASYNC_POOL_SIZE", "10")),
+        "ASYNC_MAX_OVERFLOW": int(os.getenv("ASYNC_MAX_OVERFLOW", "10")),
+        # Admisión por ruta pesada: nombre=concurrencia:cola:espera_seg (por worker).
+        # Vacío = derivado de WEB_THREADS (admission.default_limits)
+        "ADMISSION_LIMITS": os.getenv("ADMISSION_LIMITS", ""),
+        # Motor de PDF: reportlab (default) | weasyprint (templates/pdf_evaluacion.html)
+        "PDF_BACKEND": os.getenv("PDF_BACKEND", "reportlab").lower(),
+        # Panel admin en vivo: cada cuánto vuelve a preguntar el navegador por /api/evaluaciones/events
+        "EVENTS_POLL_SECONDS": float(os.getenv("EVENTS_POLL_SECONDS", "3")),
+        "EVENTS_RETENTION_HOURS": int(os.getenv("EVENTS_RETENTION_HOURS", "24")),
+        # Buffer write-behind de /autosave (journal en instance/autosave); solo con un worker
+        "AUTOSAVE_BUFFER": _flag("AUTOSAVE_BUFFER"),
+        "AUTOSAVE_FLUSH_SECONDS": float(os.getenv("AUTOSAVE_FLUSH_SECONDS", "2")),
+        "AUTOSAVE_FSYNC": _flag("AUTOSAVE_FSYNC", "1"),
+        # Debug/CI: conteo de SQL por request contra @query_budget (log | raise) y lazy loads que lanzan
+        "QUERY_BUDGET": os.getenv("QUERY_BUDGET", "").lower(),
+        "QUERY_RAISELOAD": _flag("QUERY_RAISELOAD"),
     }
 
+def _flag(name: str, default: str = "") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
 def normalize_db_url(url: str) -> str:
     # Compat: postgres:// → postgresql+psycopg2://
     if url.startswith("postgres://"):
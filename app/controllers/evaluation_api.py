@@ -1,17 +1,29 @@
+import io
 import json
-from flask import Blueprint, request, send_file
-from ..services import EvaluationService
-from ..repositories import EvaluationRepository
+from flask import Blueprint, Response, request, send_file, stream_with_context
+from ..services import EvaluationService, ArchiveService, TabularExportService, EventFeedService
+from ..repositories import EvaluationRepository, ArchiveRepository, progress_payload
 from ..models import EvalStatus
+from ..admission import admission
+from ..query_budget import query_budget
 from ..db import get_engine
-from ..services.evaluation_service import TPL_PATH
+from ..services.evaluation_service import TPL_PATH, local_date_bounds
+from ..services.autosave_buffer import get_autosave
 
 bp = Blueprint("api_evaluaciones", __name__)
 
+# Queries extra cuando el buffer de autosave tiene pendiente de esa evaluación (flush previo)
+AUTOSAVE_FLUSH = 5
+
+def _autosave_flush() -> int:
+    """Margen de @query_budget para el flush previo: solo con AUTOSAVE_BUFFER activo."""
+    return AUTOSAVE_FLUSH if get_autosave() else 0
+
 def _required_roles():
     return EvaluationService.required_sign_roles()
 
 @bp.get("/diag")
+@query_budget(1)
 def diag():
     ok_template = TPL_PATH.exists()
     try:
@@ -31,6 +43,8 @@ def diag():
 
 # NUEVO: crear a partir de no_empleado (folio = EC-YYYYMMDD-<no_empleado> y campo prellenado)
 @bp.post("/create")
+# existente: 1; nueva: SELECT + INSERT evaluación + siembra en un executemany + eventos
+@query_budget(8)
 def create():
     try:
         data = request.get_json(force=True) or {}
@@ -55,6 +69,7 @@ def create():
         return {"error": "Error interno al crear", "detail": str(e)}, 500
 
 @bp.get("/pendientes")
+@query_budget(2)
 def list_pendientes():
     try:
         items = EvaluationRepository.list_by_status(EvalStatus.PENDIENTE)
@@ -70,18 +85,14 @@ def list_pendientes():
             dt_from, dt_to = local_day_window(q_from, q_to)
             items = [x for x in items if (x.created_at >= dt_from and x.created_at < dt_to)]
 
-        # filtrar por no_empleado leyendo responses (solo si viene parámetro)
+        # filtrar por no_empleado: un solo query para todas las candidatas
         if q_noemp:
-            filtered = []
-            for x in items:
-                resp = EvaluationService.get_responses(x.id)
-                m = {r["field_key"]: r.get("value","") for r in resp}
-                if (m.get("no_empleado") or "").strip() == q_noemp:
-                    filtered.append(x)
-            items = filtered
+            noemp = EvaluationRepository.no_empleado_map([x.id for x in items])
+            items = [x for x in items if noemp.get(x.id, "").strip() == q_noemp]
 
         return {"items": [
-            {"id": x.id, "folio": x.folio, "created_at": x.created_at.isoformat(), "created_local": to_local_iso(x.created_at)}
+            {"id": x.id, "folio": x.folio, "created_at": x.created_at.isoformat(), "created_local": to_local_iso(x.created_at),
+             "progress": progress_payload(x)}
             for x in items
         ]}, 200
     except Exception as e:
@@ -89,6 +100,7 @@ def list_pendientes():
         return {"error": "Error al listar pendientes", "detail": str(e)}, 500
 
 @bp.get("/completadas")
+@query_budget(3)
 def list_completadas():
     try:
         items = EvaluationRepository.list_by_status(EvalStatus.COMPLETADA)
@@ -99,31 +111,36 @@ def list_completadas():
         q_to = (request.args.get("to") or "").strip()
 
         from ..services.evaluation_service import local_day_window, to_local_iso
+        dt_from = dt_to = None
         if q_from or q_to:
             dt_from, dt_to = local_day_window(q_from, q_to)
             items = [x for x in items if (x.created_at >= dt_from and x.created_at < dt_to)]
 
+        # filtrar por no_empleado: un solo query para todas las candidatas
         if q_noemp:
-            filtered = []
-            for x in items:
-                resp = EvaluationService.get_responses(x.id)
-                m = {r["field_key"]: r.get("value","") for r in resp}
-                if (m.get("no_empleado") or "").strip() == q_noemp:
-                    filtered.append(x)
-            items = filtered
+            noemp = EvaluationRepository.no_empleado_map([x.id for x in items])
+            items = [x for x in items if noemp.get(x.id, "").strip() == q_noemp]
 
-        return {"items": [
-            {"id": x.id, "folio": x.folio, "created_at": x.created_at.isoformat(), "created_local": to_local_iso(x.created_at)}
+        out = [
+            {"id": x.id, "folio": x.folio, "created_at": x.created_at.isoformat(), "created_local": to_local_iso(x.created_at),
+             "progress": progress_payload(x)}
             for x in items
-        ]}, 200
+        ]
+        # Archivadas (retención): filtros resueltos en SQL sobre evaluation_archives
+        if request.args.get("archivadas", "1") != "0":
+            out += ArchiveService.list_items(dt_from, dt_to, q_noemp)
+        return {"items": out}, 200
     except Exception as e:
         import traceback; traceback.print_exc()
         return {"error": "Error al listar completadas", "detail": str(e)}, 500
 
 @bp.get("/<int:eid>/responses")
+@query_budget(2)
 def get_responses(eid: int):
     try:
         data = EvaluationService.get_responses(eid)
+        if not data:
+            data = ArchiveService.get_responses(eid)
         if not data:
             return {"items": [], "warning": "no encontrada o sin respuestas"}, 200
         return {"items": data}, 200
@@ -132,6 +149,7 @@ def get_responses(eid: int):
         return {"error": "Error al obtener respuestas", "detail": str(e)}, 500
 
 @bp.post("/<int:eid>/responses")
+@query_budget(8, extra=_autosave_flush)
 def upsert_responses(eid: int):
     try:
         data = request.get_json(force=True) or {}
@@ -139,18 +157,7 @@ def upsert_responses(eid: int):
         ev = EvaluationService.save_responses(eid, responses)
 
         # Devuelve labels de los faltantes para mostrar en UI
-        tpl = EvaluationService._load_template()
-        key2label = {g["key"]:g["label"] for g in tpl.get("general",[])}
-        for sec in ["S","P","Q","VC"]:
-            for q in tpl.get(sec,[]):
-                base = q["key"]
-                key2label[f"{base}_r1"] = f"{q['label']} (1ra rev.)"
-                key2label[f"{base}_r2"] = f"{q['label']} (2da rev.)"
-                key2label[f"{base}_r3"] = f"{q['label']} (3ra rev.)"
-                key2label[f"{base}_obs"] = f"{q['label']} (Observaciones)"
-        for r in tpl.get("resultado",[]):
-            key2label[r["key"]] = r["label"]
-
+        key2label = EvaluationService.field_labels(EvaluationService._load_template())
         missing_labels = [key2label.get(k,k) for k in EvaluationService.validate(eid, _required_roles()).missing_required]
 
         return {
@@ -164,22 +171,49 @@ def upsert_responses(eid: int):
         import traceback; traceback.print_exc()
         return {"error": "Error al guardar respuestas", "detail": str(e)}, 500
 
+# Autosave parcial (solo campos modificados). Con AUTOSAVE_BUFFER queda en el buffer
+# write-behind (journal local) y se escribe a la BD en el siguiente flush.
+@bp.post("/<int:eid>/autosave")
+@query_budget(5)
+def autosave(eid: int):
+    try:
+        data = request.get_json(force=True) or {}
+        responses = data.get("responses", [])
+        if not isinstance(responses, list):
+            return {"error": "responses debe ser lista"}, 400
+        buffered = EvaluationService.autosave(eid, responses)
+        return {"ok": True, "buffered": buffered}, 200
+    except ValueError as e:
+        return {"error": str(e)}, 404
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error en autoguardado", "detail": str(e)}, 500
+
 @bp.post("/<int:eid>/sign")
+@query_budget(3, extra=_autosave_flush)
+@admission("sign")
 def sign(eid: int):
     try:
         data = request.get_json(force=True)
         role = str(data.get("role") or "").strip()
         signer_name = str(data.get("signer_name") or "").strip()
         b64 = data.get("image_base64")
-        if not role or not signer_name or not b64:
-            return {"error": "role, signer_name e image_base64 son requeridos"}, 400
-        sig = EvaluationService.save_signature_base64(eid, role, signer_name, b64)
+        strokes = data.get("strokes")  # firma vectorial (signature.js); image_base64 = PNG (clientes viejos)
+        if not role or not signer_name or not (b64 or strokes):
+            return {"error": "role, signer_name e image_base64 o strokes son requeridos"}, 400
+        if strokes:
+            sig = EvaluationService.save_signature_strokes(eid, role, signer_name, strokes)
+        else:
+            sig = EvaluationService.save_signature_base64(eid, role, signer_name, b64)
         return {"id": sig.id, "role": sig.role, "signer_name": sig.signer_name}, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         import traceback; traceback.print_exc()
         return {"error": "Error al guardar firma", "detail": str(e)}, 500
 
 @bp.post("/<int:eid>/complete")
+@query_budget(6, extra=_autosave_flush)
 def complete(eid: int):
     try:
         ok, vr = EvaluationService.try_complete(eid, _required_roles())
@@ -193,9 +227,11 @@ def complete(eid: int):
         return {"error": "Error al completar", "detail": str(e)}, 500
 
 @bp.delete("/<int:eid>")
+# folio + rutas de firmas + DELETE + evento + firmas que aún usan esos PNG
+@query_budget(5)
 def delete_eval(eid: int):
     try:
-        ok = EvaluationRepository.delete(eid)
+        ok = EvaluationService.delete(eid) or ArchiveRepository.delete(eid)
         if not ok:
             return {"error": "no encontrada"}, 404
         return {"ok": True}, 200
@@ -203,11 +239,52 @@ def delete_eval(eid: int):
         import traceback; traceback.print_exc()
         return {"error": "Error al eliminar", "detail": str(e)}, 500
 
+def _parse_bulk_filter(data: dict):
+    status_raw = str(data.get("status") or "").strip().lower()
+    status = None
+    if status_raw:
+        try:
+            status = EvalStatus(status_raw)
+        except ValueError:
+            raise ValueError(f"status inválido: {status_raw}")
+    q_from = str(data.get("from") or "").strip()
+    q_to = str(data.get("to") or "").strip()
+    if status is None and not q_from and not q_to:
+        raise ValueError("se requiere al menos un filtro: status, from o to")
+    try:
+        local_date_bounds(q_from, q_to)
+    except ValueError:
+        raise ValueError(f"fecha inválida (YYYY-MM-DD): from={q_from!r} to={q_to!r}")
+    return status, q_from, q_to
+
+# Borrado masivo (p.ej. evaluaciones de prueba o abandonadas): {"status","from","to","dry_run"}
+@bp.post("/bulk-delete")
+@query_budget(5)
+def bulk_delete():
+    try:
+        data = request.get_json(force=True) or {}
+        try:
+            status, q_from, q_to = _parse_bulk_filter(data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        dry_run = bool(data.get("dry_run", False))
+        folios = EvaluationService.delete_bulk(status, q_from, q_to, dry_run=dry_run)
+        return {"ok": True, "dry_run": dry_run, "deleted": len(folios), "folios": folios}, 200
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al eliminar", "detail": str(e)}, 500
+
 @bp.get("/<int:eid>/export")
+@query_budget(4)
+@admission("pdf")
 def export_pdf(eid: int):
     try:
         ev = EvaluationRepository.get(eid)
         if not ev:
+            archived = ArchiveService.get_pdf(eid)
+            if archived:
+                folio, pdf = archived
+                return send_file(io.BytesIO(pdf), mimetype="application/pdf", as_attachment=True, download_name=f"{folio}.pdf")
             return {"error": "no encontrada"}, 404
         if str(ev.status.value) != "completada":
             return {"error": "la evaluación no está completada"}, 400
@@ -219,7 +296,58 @@ def export_pdf(eid: int):
         import traceback; traceback.print_exc()
         return {"error": "Error al exportar", "detail": str(e)}, 500
 
+# Export tabular en streaming: ?format=csv|jsonl&status=completada&from=&to=&area=
+@bp.get("/export")
+# El cuerpo se genera después de la vista y se cuenta aparte, al cerrar la respuesta:
+# un SELECT de filas vivas (yield_per) + uno de archivadas, sin importar cuántas sean
+@query_budget(0, stream=2)
+@admission("tabular")
+def export_tabular():
+    try:
+        fmt = (request.args.get("format") or "csv").strip().lower()
+        status_raw = (request.args.get("status") or "completada").strip().lower()
+        try:
+            status = None if status_raw == "todas" else EvalStatus(status_raw)
+        except ValueError:
+            return {"error": f"status inválido: {status_raw}"}, 400
+        gen = TabularExportService.stream(
+            fmt,
+            status=status,
+            q_from=(request.args.get("from") or "").strip(),
+            q_to=(request.args.get("to") or "").strip(),
+            area=(request.args.get("area") or "").strip(),
+            include_archived=request.args.get("archivadas", "1") != "0",
+        )
+        mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        return Response(
+            stream_with_context(gen),
+            mimetype=f"{mimetype}; charset=utf-8",
+            headers={"Content-Disposition": f"attachment; filename=evaluaciones.{fmt}"},
+        )
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al exportar", "detail": str(e)}, 500
+
+# Cambios en vivo para el panel admin (short poll): ?after=<último event_id visto>
+@bp.get("/events")
+@query_budget(2)
+def events():
+    raw = (request.args.get("after") or "").strip()
+    if raw and not raw.isdigit():
+        return {"error": "after debe ser un id de evento"}, 400
+    after = int(raw) if raw else None
+    try:
+        if after is None:
+            EventFeedService.prune()
+        return EventFeedService.poll(after), 200, {"Cache-Control": "no-store"}
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al leer eventos", "detail": str(e)}, 500
+
 @bp.get("/plantilla")
+@query_budget(0)
 def plantilla():
     try:
         tpl = EvaluationService._load_template()
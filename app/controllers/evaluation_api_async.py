@@ -0,0 +1,251 @@
+import asyncio
+from contextlib import nullcontext
+from functools import wraps
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+
+from ..services import ArchiveService, EventFeedService
+from ..services.evaluation_service_async import AsyncEvaluationService
+from ..repositories import AsyncEvaluationRepository
+from ..query_budget import QueryBudgetExceeded, QueryCounter, budget_for, counting, _check
+from ..db import get_async_engine
+from ..services.evaluation_service import TPL_PATH
+
+# Rutas de captura de las tablets sobre el engine async (modo ASGI, ver app/asgi.py). Responden el
+# mismo JSON y status que las vistas de evaluation_api; el resto de la API sigue en Flask.
+PREFIX = "/api/evaluaciones"
+
+
+def view(endpoint: str):
+    """Vista async con el app context de Flask (config, buffer de autosave, instance/). Regresa
+       (dict, status[, headers]) como las vistas Flask, y con QUERY_BUDGET se mide contra el
+       @query_budget de la vista Flask del mismo endpoint."""
+    def deco(fn):
+        @wraps(fn)
+        async def handler(request: Request):
+            flask_app = request.app.state.flask_app
+            with flask_app.app_context():
+                mode = flask_app.config.get("QUERY_BUDGET", "")
+                qc = QueryCounter(f"{endpoint} (asgi)")
+                with counting(qc) if mode in ("log", "raise") else nullcontext():
+                    result = await fn(request, **request.path_params)
+                resp = result if isinstance(result, Response) else JSONResponse(*result)
+                # Como CORS(app, /api/*) de create_app (refleja el Origin); el preflight lo atiende Flask
+                origin = request.headers.get("origin")
+                if origin:
+                    resp.headers["Access-Control-Allow-Origin"] = origin
+                    resp.headers["Vary"] = "Origin"
+                if mode not in ("log", "raise"):
+                    return resp
+                resp.headers["X-Query-Count"] = str(qc.count)
+                try:
+                    _check(qc, budget_for(flask_app.view_functions.get(f"api_evaluaciones.{endpoint}")), mode,
+                           flask_app.logger)
+                except QueryBudgetExceeded as e:
+                    return JSONResponse({"error": "query budget excedido", "detail": str(e)}, 500)
+                return resp
+        return handler
+    return deco
+
+
+async def _admit(request: Request, name: str):
+    """Mismo AdmissionLimiter que la vista Flask (cupo compartido, /api/metrics). La espera en cola
+       ocupa un thread del executor, no el event loop. Regresa el limiter tomado o una respuesta 503."""
+    lim = request.app.state.flask_app.extensions.get("admission", {}).get(name)
+    if lim is None:
+        return None
+    if not await asyncio.to_thread(lim.acquire):
+        return JSONResponse({"error": "servidor ocupado, reintenta más tarde", "route": name}, 503,
+                            headers={"Retry-After": str(lim.retry_after)})
+    return lim
+
+
+@view("diag")
+async def diag(request: Request):
+    ok_template = TPL_PATH.exists()
+    try:
+        async with get_async_engine().connect() as c:
+            await c.exec_driver_sql("SELECT 1")
+        ok_db = True
+        db_error = None
+    except Exception as e:
+        ok_db = False
+        db_error = str(e)
+    return {
+        "template_exists": ok_template,
+        "template_path": str(TPL_PATH),
+        "db_ok": ok_db,
+        "mode": "asgi",
+        **({"db_error": db_error} if db_error else {})
+    }, (200 if ok_template and ok_db else 500)
+
+
+@view("create")
+async def create(request: Request):
+    try:
+        data = await request.json() or {}
+        no_empleado = str(data.get("no_empleado") or "").strip()
+        folio_raw = str(data.get("folio") or "").strip()
+
+        if no_empleado:
+            ev = await AsyncEvaluationService.create_by_no_empleado(no_empleado)
+            return {"id": ev.id, "folio": ev.folio, "status": ev.status.value}, 200
+
+        if folio_raw:
+            ev = await AsyncEvaluationService.create_evaluation(folio_raw)
+            return {"id": ev.id, "folio": ev.folio, "status": ev.status.value}, 200
+
+        return {"error": "no_empleado requerido"}, 400
+
+    except FileNotFoundError as e:
+        return {"error": "Plantilla no encontrada", "detail": str(e)}, 500
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error interno al crear", "detail": str(e)}, 500
+
+
+@view("get_responses")
+async def get_responses(request: Request, eid: int):
+    try:
+        data = await AsyncEvaluationService.get_responses(eid)
+        if not data:
+            data = await asyncio.to_thread(ArchiveService.get_responses, eid)
+        if not data:
+            return {"items": [], "warning": "no encontrada o sin respuestas"}, 200
+        return {"items": data}, 200
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al obtener respuestas", "detail": str(e)}, 500
+
+
+@view("upsert_responses")
+async def upsert_responses(request: Request, eid: int):
+    try:
+        data = await request.json() or {}
+        ev = await AsyncEvaluationService.save_responses(eid, data.get("responses", []))
+        roles = await AsyncEvaluationService.required_sign_roles()
+        return {
+            "id": ev.id,
+            "status": ev.status.value,
+            "required_total": ev.required_total,
+            "required_filled": ev.required_filled,
+            "missing_labels": await AsyncEvaluationService.missing_labels(eid, roles)
+        }, 200
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al guardar respuestas", "detail": str(e)}, 500
+
+
+@view("autosave")
+async def autosave(request: Request, eid: int):
+    try:
+        data = await request.json() or {}
+        responses = data.get("responses", [])
+        if not isinstance(responses, list):
+            return {"error": "responses debe ser lista"}, 400
+        buffered = await AsyncEvaluationService.autosave(eid, responses)
+        return {"ok": True, "buffered": buffered}, 200
+    except ValueError as e:
+        return {"error": str(e)}, 404
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error en autoguardado", "detail": str(e)}, 500
+
+
+@view("sign")
+async def sign(request: Request, eid: int):
+    lim = await _admit(request, "sign")
+    if isinstance(lim, Response):
+        return lim
+    try:
+        data = await request.json()
+        role = str(data.get("role") or "").strip()
+        signer_name = str(data.get("signer_name") or "").strip()
+        b64 = data.get("image_base64")
+        strokes = data.get("strokes")
+        if not role or not signer_name or not (b64 or strokes):
+            return {"error": "role, signer_name e image_base64 o strokes son requeridos"}, 400
+        if strokes:
+            sig = await AsyncEvaluationService.save_signature_strokes(eid, role, signer_name, strokes)
+        else:
+            sig = await AsyncEvaluationService.save_signature_base64(eid, role, signer_name, b64)
+        return {"id": sig.id, "role": sig.role, "signer_name": sig.signer_name}, 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al guardar firma", "detail": str(e)}, 500
+    finally:
+        if lim is not None:
+            lim.release()
+
+
+@view("complete")
+async def complete(request: Request, eid: int):
+    try:
+        roles = await AsyncEvaluationService.required_sign_roles()
+        ok, vr = await AsyncEvaluationService.try_complete(eid, roles)
+        return {
+            "ok": ok,
+            "missing_required": vr.missing_required,
+            "missing_sign_roles": vr.missing_sign_roles
+        }, 200
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al completar", "detail": str(e)}, 500
+
+
+@view("export_pdf")
+async def export_pdf(request: Request, eid: int):
+    lim = await _admit(request, "pdf")
+    if isinstance(lim, Response):
+        return lim
+    try:
+        ev = await AsyncEvaluationRepository.get_with_children(eid)
+        if not ev:
+            archived = await asyncio.to_thread(ArchiveService.get_pdf, eid)
+            if archived:
+                folio, pdf = archived
+                return Response(pdf, media_type="application/pdf",
+                                headers={"Content-Disposition": f'attachment; filename="{folio}.pdf"'})
+            return {"error": "no encontrada"}, 404
+        if str(ev.status.value) != "completada":
+            return {"error": "la evaluación no está completada"}, 400
+        pdf_path = await AsyncEvaluationService.export_pdf(ev)
+        filename = f"{ev.folio}.pdf" if ev.folio else f"evaluacion_{eid}.pdf"
+        return FileResponse(pdf_path, media_type="application/pdf", filename=filename)
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al exportar", "detail": str(e)}, 500
+    finally:
+        if lim is not None:
+            lim.release()
+
+
+@view("events")
+async def events(request: Request):
+    raw = (request.query_params.get("after") or "").strip()
+    if raw and not raw.isdigit():
+        return {"error": "after debe ser un id de evento"}, 400
+    after = int(raw) if raw else None
+    try:
+        if after is None:
+            await asyncio.to_thread(EventFeedService.prune)
+        return await AsyncEvaluationService.poll_events(after), 200, {"Cache-Control": "no-store"}
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return {"error": "Error al leer eventos", "detail": str(e)}, 500
+
+
+routes = [
+    Route(f"{PREFIX}/diag", diag, methods=["GET"]),
+    Route(f"{PREFIX}/create", create, methods=["POST"]),
+    Route(f"{PREFIX}/{{eid:int}}/responses", get_responses, methods=["GET"]),
+    Route(f"{PREFIX}/{{eid:int}}/responses", upsert_responses, methods=["POST"]),
+    Route(f"{PREFIX}/{{eid:int}}/autosave", autosave, methods=["POST"]),
+    Route(f"{PREFIX}/{{eid:int}}/sign", sign, methods=["POST"]),
+    Route(f"{PREFIX}/{{eid:int}}/complete", complete, methods=["POST"]),
+    Route(f"{PREFIX}/{{eid:int}}/export", export_pdf, methods=["GET"]),
+    Route(f"{PREFIX}/events", events, methods=["GET"]),
+]
@@ -1,16 +1,52 @@
 from __future__ import annotations
-from contextlib import contextmanager
-from typing import Generator
-from sqlalchemy import create_engine
+import asyncio
+import threading
+import weakref
+from contextlib import contextmanager, nullcontext, asynccontextmanager
+from typing import AsyncGenerator, Generator, Optional
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base, Session as SASession
 
 _engine = None
 SessionLocal = None  # type: ignore
 Base = declarative_base()
 
-def init_engine_and_session(database_url: str):
-    global _engine, SessionLocal
+# SQLite: un solo escritor a la vez por archivo. Con SQLITE_WRITE_LOCK las sesiones de
+# escritura del proceso se forman en este lock en vez de competir por el lock del archivo.
+_sqlite_write_lock: Optional[threading.Lock] = None
+
+def sqlite_pragmas(busy_timeout_ms: int = 5000, cache_mb: int = 64, mmap_mb: int = 256) -> dict:
+    """PRAGMAs del modo concurrente: WAL (lectores no bloquean al escritor), fsync solo en
+       checkpoint, espera de lock en vez de 'database is locked', cache y mmap por conexión."""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": busy_timeout_ms,
+        "foreign_keys": "ON",
+        "cache_size": -cache_mb * 1024,  # negativo = KiB
+        "mmap_size": mmap_mb * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+
+def _sqlite_on_connect(dbapi_conn, _record, pragmas: Optional[dict] = None):
+    # SQLite no aplica FKs (ni ON DELETE CASCADE) salvo que se active por conexión
+    cur = dbapi_conn.cursor()
+    for name, value in (pragmas or {"foreign_keys": "ON"}).items():
+        cur.execute(f"PRAGMA {name}={value}")
+    cur.close()
+
+def _sqlite_listener(pragmas: Optional[dict]):
+    return lambda dbapi_conn, record: _sqlite_on_connect(dbapi_conn, record, pragmas)
+
+def init_engine_and_session(database_url: str, sqlite_tuning: Optional[dict] = None, write_lock: bool = False):
+    """sqlite_tuning: PRAGMAs por conexión (ver sqlite_pragmas); None = solo foreign_keys."""
+    global _engine, SessionLocal, _sqlite_write_lock
     _engine = create_engine(database_url, echo=False, future=True)
+    _sqlite_write_lock = None
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _sqlite_listener(sqlite_tuning))
+        if write_lock:
+            _sqlite_write_lock = threading.Lock()
     # CLAVE: evitar DetachedInstanceError después del commit
     SessionLocal = sessionmaker(
         bind=_engine,
@@ -26,15 +62,105 @@ def get_engine():
     return _engine
 
 @contextmanager
-def get_session() -> Generator[SASession, None, None]:
+def get_session(write: bool = False) -> Generator[SASession, None, None]:
+    """write=True: la sesión escribe; en SQLite con write lock se serializa dentro del proceso."""
     if SessionLocal is None:
         raise RuntimeError("SessionLocal no inicializada. Llama init_engine_and_session primero.")
-    session: SASession = SessionLocal()
-    try:
-        yield session
-        session.commit()
-    except Exception:
-        session.rollback()
-        raise
-    finally:
-        session.close()
+    with (_sqlite_write_lock if write and _sqlite_write_lock else nullcontext()):
+        session: SASession = SessionLocal()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+# ---------- Modo ASGI (app.asgi): engine async con pool, uno por event loop ----------
+# Las conexiones asyncpg / aiosqlite quedan atadas al loop que las abrió: cada loop tiene su
+# engine (uvicorn: uno por proceso, creado en el lifespan) y nunca se comparten entre loops.
+_async_settings: Optional[dict] = None
+_async_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+def to_async_url(database_url: str) -> str:
+    """sqlite:/// → sqlite+aiosqlite:///, postgresql(+psycopg2):// → postgresql+asyncpg://"""
+    if "+aiosqlite" in database_url or "+asyncpg" in database_url:
+        return database_url
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return database_url.replace(prefix, "postgresql+asyncpg://", 1)
+    return database_url
+
+def init_async_engine(database_url: str, sqlite_tuning: Optional[dict] = None, write_lock: bool = False,
+                      pool_size: int = 10, max_overflow: int = 10):
+    """Configura (sin conectar) el engine async; cada event loop lo crea al primer uso."""
+    global _async_settings
+    _async_settings = {
+        "url": to_async_url(database_url), "sqlite_tuning": sqlite_tuning, "write_lock": write_lock,
+        "pool_size": pool_size, "max_overflow": max_overflow,
+    }
+    _async_engines.clear()
+
+def _create_async_engine(cfg: dict) -> tuple:
+    # Import diferido: sqlalchemy[asyncio] + driver async solo hacen falta en modo ASGI
+    import uuid
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    url = cfg["url"]
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        # Supabase Transaction Pooler (pgbouncer): sin cache de prepared statements y nombres
+        # únicos, porque cada transacción puede caer en otra conexión del servidor
+        url += ("&" if "?" in url else "?") + "prepared_statement_cache_size=0"
+        connect_args = {"statement_cache_size": 0,
+                        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"}
+    engine = create_async_engine(
+        url, echo=False, poolclass=AsyncAdaptedQueuePool, pool_size=cfg["pool_size"],
+        max_overflow=cfg["max_overflow"], pool_pre_ping=True, connect_args=connect_args,
+    )
+    lock = None
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _sqlite_listener(cfg["sqlite_tuning"]))
+        if cfg["write_lock"]:
+            lock = asyncio.Lock()
+    sessions = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    return engine, sessions, lock
+
+def _async_slot() -> tuple:
+    if _async_settings is None:
+        raise RuntimeError("Async engine no inicializado. Llama init_async_engine primero.")
+    loop = asyncio.get_running_loop()
+    slot = _async_engines.get(loop)
+    if slot is None:
+        slot = _async_engines[loop] = _create_async_engine(_async_settings)
+    return slot
+
+def get_async_engine():
+    """AsyncEngine del event loop actual (lo crea la primera vez)."""
+    return _async_slot()[0]
+
+async def dispose_async_engine():
+    """Cierra el pool del loop actual (shutdown del lifespan)."""
+    slot = _async_engines.pop(asyncio.get_running_loop(), None)
+    if slot is not None:
+        await slot[0].dispose()
+
+@asynccontextmanager
+async def get_async_session(write: bool = False) -> AsyncGenerator:
+    """Como get_session, sobre el engine async del loop actual."""
+    _engine_async, sessions, lock = _async_slot()
+    async with (lock if write and lock else nullcontext()):
+        session = sessions()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
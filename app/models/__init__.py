@@ -1 +1 @@
-from .evaluation import Evaluation, EvaluationResponse, Signature, EvalStatus
+from .evaluation import Evaluation, EvaluationResponse, Signature, EvalStatus, EvaluationArchive, EvaluationEvent
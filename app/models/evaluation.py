@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from enum import Enum
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum as SAEnum, Boolean, Text
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, Enum as SAEnum, Boolean, Text, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..db import Base
 
@@ -10,6 +10,8 @@ class EvalStatus(str, Enum):
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
+    # SQLite: no reutilizar ids borrados/archivados (evaluation_archives conserva el id original)
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     folio: Mapped[str] = mapped_column(String(40), unique=True, index=True)
     status: Mapped[EvalStatus] = mapped_column(SAEnum(EvalStatus), default=EvalStatus.PENDIENTE, index=True)
@@ -20,8 +22,21 @@ class Evaluation(Base):
     required_total: Mapped[int] = mapped_column(Integer, default=0)
     required_filled: Mapped[int] = mapped_column(Integer, default=0)
 
-    responses: Mapped[list["EvaluationResponse"]] = relationship(back_populates="evaluation", cascade="all, delete-orphan")
-    signatures: Mapped[list["Signature"]] = relationship(back_populates="evaluation", cascade="all, delete-orphan")
+    # Progreso precalculado para las listas (sin tocar evaluation_responses):
+    # preguntas con 1ra revisión contestada por sección, respuestas por revisión (r1/r2/r3)
+    # y firmas como bitmask (bit i = meta.sign_roles[i]). Ver upsert_responses / add_signature.
+    s_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    p_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    q_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    vc_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    r1_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    r2_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    r3_filled: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    signed_mask: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    # passive_deletes: el borrado de hijos lo hace la BD (ON DELETE CASCADE), sin cargarlos
+    responses: Mapped[list["EvaluationResponse"]] = relationship(back_populates="evaluation", cascade="all, delete-orphan", passive_deletes=True)
+    signatures: Mapped[list["Signature"]] = relationship(back_populates="evaluation", cascade="all, delete-orphan", passive_deletes=True)
 
 class EvaluationResponse(Base):
     __tablename__ = "evaluation_responses"
@@ -30,6 +45,9 @@ class EvaluationResponse(Base):
     field_key: Mapped[str] = mapped_column(String(120), index=True)  # e.g. "empleado_nombre", "area", "pregunta_1"
     value: Mapped[str] = mapped_column(Text, default="")
     is_required: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Epoch del guardado que dejó este valor: un flush atrasado (buffer de autosave, journal
+    # reaplicado) no pisa un valor más nuevo. NULL = sembrado al crear
+    saved_at: Mapped[float | None] = mapped_column(Float, nullable=True)
 
     evaluation: Mapped["Evaluation"] = relationship(back_populates="responses")
 
@@ -39,7 +57,32 @@ class Signature(Base):
     evaluation_id: Mapped[int] = mapped_column(ForeignKey("evaluations.id", ondelete="CASCADE"), index=True)
     role: Mapped[str] = mapped_column(String(80))         # e.g. "evaluador", "supervisor", "entrenador"
     signer_name: Mapped[str] = mapped_column(String(120)) # nombre escrito o seleccionado
-    image_path: Mapped[str] = mapped_column(String(255))  # ruta del PNG de firma (guardado server-side)
+    image_path: Mapped[str] = mapped_column(String(255))  # ruta del PNG de firma (guardado server-side); "" si es vectorial
+    # Firma vectorial (signature_strokes.encode_strokes): trazos simplificados en vez de PNG
+    strokes: Mapped[str | None] = mapped_column(Text, nullable=True)
     signed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     evaluation: Mapped["Evaluation"] = relationship(back_populates="signatures")
+
+class EvaluationArchive(Base):
+    """Evaluación COMPLETADA archivada: snapshot JSON comprimido (zlib) + PDF final.
+       Conserva el id original para que /<eid>/responses y /<eid>/export sigan funcionando."""
+    __tablename__ = "evaluation_archives"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    folio: Mapped[str] = mapped_column(String(40), unique=True, index=True)
+    no_empleado: Mapped[str] = mapped_column(String(40), default="", index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    payload: Mapped[bytes] = mapped_column(LargeBinary)   # zlib(JSON) con responses + signatures (PNG en base64)
+    pdf: Mapped[bytes] = mapped_column(LargeBinary)       # PDF final tal como se exportó al archivar
+
+class EvaluationEvent(Base):
+    """Bitácora corta de cambios (created/saved/signed/completed/deleted) para /events del panel admin.
+       Se escribe en la misma transacción que el cambio; sin FK para sobrevivir al borrado."""
+    __tablename__ = "evaluation_events"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    evaluation_id: Mapped[int] = mapped_column(Integer, index=True)
+    type: Mapped[str] = mapped_column(String(20))
+    payload: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
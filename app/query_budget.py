@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, List, Optional
+from flask import Flask, current_app, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, raiseload
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryCounter:
+    """Sentencias SQL ejecutadas dentro de un request o de un bloque."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.statements: List[str] = []
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [s.split("\n", 1)[0][:120] for s in self.statements[:limit]]
+        more = f"\n  … y {self.count - limit} más" if self.count > limit else ""
+        return "\n".join(f"  {s}" for s in lines) + more
+
+
+# Por request (contextvar): hilos propios como el flush de autosave no cuentan.
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+_listening = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    qc = _current.get()
+    if qc is not None:
+        qc.count += 1
+        qc.statements.append(statement)
+
+
+def _raiseload_all(state):
+    # Relaciones no cargadas explícitamente (selectinload) lanzan en vez de hacer lazy load
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+def _check(qc: QueryCounter, budget: Optional[int], mode: str, logger=None):
+    if budget is None or qc.count <= budget:
+        return
+    msg = f"query budget excedido en {qc.label}: {qc.count} > {budget}"
+    if mode == "raise":
+        raise QueryBudgetExceeded(f"{msg}\n{qc.summary()}")
+    (logger or current_app.logger).warning("%s\n%s", msg, qc.summary())
+
+
+def _listen():
+    global _listening
+    if not _listening:
+        # A nivel clase: cubre cualquier engine creado después (tests, jobs)
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        _listening = True
+
+
+@contextmanager
+def count_queries(budget: Optional[int] = None, label: str = "bloque"):
+    """Cuenta las sentencias del bloque; con budget, excederlo lanza QueryBudgetExceeded al salir
+       (sin depender de QUERY_BUDGET ni de un app context: sirve en scripts y tests).
+       Se puede anidar: el contador externo sigue acumulando."""
+    _listen()
+    outer = _current.get()
+    qc = QueryCounter(label)
+    token = _current.set(qc)
+    try:
+        yield qc
+    finally:
+        _current.reset(token)
+        if outer is not None:
+            outer.count += qc.count
+            outer.statements += qc.statements
+    _check(qc, budget, "raise")
+
+
+@contextmanager
+def counting(qc: QueryCounter):
+    """Activa qc como contador de este contexto (vistas async de app.asgi, donde no corren los
+       before/after_request de Flask). Lo ejecutado con asyncio.to_thread también cuenta."""
+    _listen()
+    token = _current.set(qc)
+    try:
+        yield qc
+    finally:
+        _current.reset(token)
+
+
+def query_budget(max_queries: Optional[int], extra: Optional[Callable[[], int]] = None,
+                 stream: Optional[int] = None):
+    """Declara el máximo de sentencias SQL de una vista (verificado con QUERY_BUDGET=log|raise).
+       extra: sentencias que dependen de la config, resueltas al verificar (p.ej. el flush del
+       buffer de autosave, solo si está activo). stream: máximo del cuerpo de una respuesta en
+       streaming, que se ejecuta después de la vista: se cuenta mientras se envía y se verifica
+       al cerrarla."""
+    def deco(fn):
+        fn._query_budget = max_queries
+        fn._query_budget_extra = extra
+        fn._query_budget_stream = stream
+        return fn
+    return deco
+
+
+def budget_for(view) -> Optional[int]:
+    """Presupuesto efectivo de una vista en este momento (max_queries + extra())."""
+    budget = getattr(view, "_query_budget", None)
+    extra = getattr(view, "_query_budget_extra", None)
+    if budget is not None and extra is not None:
+        budget += extra()
+    return budget
+
+
+def _count_stream(body: Iterable, qc: QueryCounter) -> Iterator:
+    """Itera el cuerpo con qc como contador activo: cuenta lo que el generador ejecuta al enviarse.
+       El contextvar se pone y se quita en cada paso porque el servidor itera fuera del request."""
+    it = iter(body)
+    try:
+        while True:
+            token = _current.set(qc)
+            try:
+                chunk = next(it)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        close = getattr(body, "close", None)
+        if close is not None:
+            token = _current.set(qc)
+            try:
+                close()
+            finally:
+                _current.reset(token)
+
+
+def init_query_budget(app: Flask):
+    """QUERY_BUDGET=log|raise: cuenta SQL por request (header X-Query-Count) y lo compara
+       con el @query_budget de la vista. QUERY_RAISELOAD=1: lazy loads implícitos lanzan."""
+    mode = app.config.get("QUERY_BUDGET", "")
+    if app.config.get("QUERY_RAISELOAD") and not event.contains(Session, "do_orm_execute", _raiseload_all):
+        event.listen(Session, "do_orm_execute", _raiseload_all)
+    if mode not in ("log", "raise"):
+        return
+    _listen()
+
+    @app.before_request
+    def _start_query_count():
+        g._query_counter = QueryCounter(request.endpoint or request.path)
+        _current.set(g._query_counter)
+
+    @app.after_request
+    def _check_query_count(resp):
+        qc = g.pop("_query_counter", None)
+        _current.set(None)
+        if qc is None:
+            return resp
+        resp.headers["X-Query-Count"] = str(qc.count)
+        view = current_app.view_functions.get(request.endpoint)
+        try:
+            _check(qc, budget_for(view), mode)
+        except QueryBudgetExceeded as e:
+            resp = jsonify({"error": "query budget excedido", "detail": str(e)})
+            resp.status_code = 500
+            return resp
+        stream_budget = getattr(view, "_query_budget_stream", None)
+        if stream_budget is not None and resp.is_streamed and not resp.direct_passthrough:
+            # Ya no se puede cambiar el status: excederlo lanza (raise) o registra (log) al cerrar
+            body_qc = QueryCounter(f"{qc.label} (cuerpo)")
+            resp.response = _count_stream(resp.response, body_qc)
+            logger = current_app.logger
+            resp.call_on_close(lambda: _check(body_qc, stream_budget, mode, logger))
+        return resp
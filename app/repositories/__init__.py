@@ -1 +1,4 @@
-from .evaluation_repo import EvaluationRepository
+from .evaluation_repo import EvaluationRepository, DeletedFiles, progress_payload
+from .archive_repo import ArchiveRepository
+from .event_repo import EventRepository
+from .evaluation_repo_async import AsyncEvaluationRepository, AsyncEventRepository
@@ -0,0 +1,122 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.orm import selectinload
+from ..db import get_session
+from ..models import Evaluation, EvalStatus, EvaluationArchive
+from .evaluation_repo import emit_event
+
+class ArchiveRepository:
+
+    @staticmethod
+    def candidates(cutoff: datetime, limit: int) -> List[Evaluation]:
+        """Lote de COMPLETADAS sin modificar desde 'cutoff' (eager, listas para snapshot)."""
+        with get_session() as s:
+            stmt = (
+                select(Evaluation)
+                .options(
+                    selectinload(Evaluation.responses),
+                    selectinload(Evaluation.signatures),
+                )
+                .where(Evaluation.status == EvalStatus.COMPLETADA)
+                .where(Evaluation.updated_at < cutoff)
+                .order_by(Evaluation.id)
+                .limit(limit)
+            )
+            return list(s.execute(stmt).scalars().all())
+
+    @staticmethod
+    def archive_batch(rows: List[EvaluationArchive]) -> int:
+        """Inserta los archivos y borra las evaluaciones vivas en una sola transacción.
+           Si falla, no queda nada a medias: el job puede reintentarse."""
+        if not rows:
+            return 0
+        ids = [r.id for r in rows]
+        with get_session(write=True) as s:
+            s.add_all(rows)
+            s.execute(delete(Evaluation).where(Evaluation.id.in_(ids)))  # hijos por ON DELETE CASCADE
+            s.flush()
+            return len(rows)
+
+    @staticmethod
+    def exists(eid: int) -> bool:
+        with get_session() as s:
+            return s.execute(select(EvaluationArchive.id).where(EvaluationArchive.id == eid)).first() is not None
+
+    @staticmethod
+    def get_payload(eid: int) -> Optional[bytes]:
+        with get_session() as s:
+            return s.execute(select(EvaluationArchive.payload).where(EvaluationArchive.id == eid)).scalar()
+
+    @staticmethod
+    def get_pdf(eid: int) -> Optional[tuple]:
+        """(folio, pdf_bytes) o None."""
+        with get_session() as s:
+            row = s.execute(
+                select(EvaluationArchive.folio, EvaluationArchive.pdf).where(EvaluationArchive.id == eid)
+            ).first()
+            return tuple(row) if row else None
+
+    @staticmethod
+    def list_archived(dt_from: datetime | None = None, dt_to: datetime | None = None, no_empleado: str = "") -> List[tuple]:
+        """(id, folio, created_at) de archivadas; sin cargar payload ni PDF."""
+        with get_session() as s:
+            stmt = select(EvaluationArchive.id, EvaluationArchive.folio, EvaluationArchive.created_at)
+            if dt_from is not None:
+                stmt = stmt.where(EvaluationArchive.created_at >= dt_from)
+            if dt_to is not None:
+                stmt = stmt.where(EvaluationArchive.created_at < dt_to)
+            if no_empleado:
+                stmt = stmt.where(EvaluationArchive.no_empleado == no_empleado)
+            stmt = stmt.order_by(EvaluationArchive.created_at.desc())
+            return [tuple(r) for r in s.execute(stmt).all()]
+
+    @staticmethod
+    def delete(eid: int) -> bool:
+        with get_session(write=True) as s:
+            res = s.execute(delete(EvaluationArchive).where(EvaluationArchive.id == eid))
+            if res.rowcount > 0:
+                emit_event(s, "deleted", eid, ids=[eid])
+            return res.rowcount > 0
+
+    @staticmethod
+    def iter_payloads(dt_from: datetime | None = None, dt_to: datetime | None = None,
+                      chunk: int = 200) -> Iterator[tuple]:
+        """(id, payload) de archivadas, por lotes con yield_per (export tabular)."""
+        stmt = select(EvaluationArchive.id, EvaluationArchive.payload).order_by(EvaluationArchive.id)
+        if dt_from is not None:
+            stmt = stmt.where(EvaluationArchive.created_at >= dt_from)
+        if dt_to is not None:
+            stmt = stmt.where(EvaluationArchive.created_at < dt_to)
+        with get_session() as s:
+            yield from s.execute(stmt.execution_options(yield_per=chunk))
+
+    @staticmethod
+    def ids_after(after_id: int, limit: int) -> List[int]:
+        with get_session() as s:
+            stmt = select(EvaluationArchive.id).where(EvaluationArchive.id > after_id).order_by(EvaluationArchive.id).limit(limit)
+            return list(s.execute(stmt).scalars())
+
+    @staticmethod
+    def count_after(after_id: int) -> int:
+        with get_session() as s:
+            return s.execute(select(func.count(EvaluationArchive.id)).where(EvaluationArchive.id > after_id)).scalar() or 0
+
+    @staticmethod
+    def index_rows(ids: List[int]) -> List[tuple]:
+        """(id, no_empleado, completed_at, payload) para reconstruir columnas derivadas del snapshot."""
+        with get_session() as s:
+            stmt = select(
+                EvaluationArchive.id, EvaluationArchive.no_empleado, EvaluationArchive.completed_at, EvaluationArchive.payload
+            ).where(EvaluationArchive.id.in_(ids))
+            return [tuple(r) for r in s.execute(stmt).all()]
+
+    @staticmethod
+    def update_index(changes: List[dict]) -> int:
+        """UPDATE por PK en lote: [{"id", "no_empleado", "completed_at"}, ...]."""
+        if not changes:
+            return 0
+        with get_session(write=True) as s:
+            s.execute(update(EvaluationArchive), changes)
+            return len(changes)
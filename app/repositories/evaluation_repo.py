@@ -1,20 +1,100 @@
 from __future__ import annotations
+import json
+import time
 from datetime import datetime, timezone
-from typing import Iterable, List, Optional
-from sqlalchemy import select
+from dataclasses import dataclass, field
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Optional
+from sqlalchemy import select, delete, insert, update, func
 from sqlalchemy.orm import selectinload
 from ..db import get_session
-from ..models import Evaluation, EvaluationResponse, Signature, EvalStatus
+from ..models import Evaluation, EvaluationResponse, Signature, EvalStatus, EvaluationEvent
+
+@dataclass
+class DeletedFiles:
+    """Lo que queda en disco tras borrar evaluaciones (para limpieza en segundo plano)."""
+    folios: List[str] = field(default_factory=list)
+    image_paths: List[str] = field(default_factory=list)
+    ids: List[int] = field(default_factory=list)
+
+def emit_event(s, type_: str, evaluation_id: int, **data):
+    """Registra un evento de cambio en la misma transacción (ver /events del panel admin)."""
+    s.add(EvaluationEvent(evaluation_id=evaluation_id, type=type_, payload=json.dumps(data, default=str)))
+
+def _list_payload(ev: Evaluation) -> dict:
+    return {"folio": ev.folio, "status": ev.status.value, "created_at": ev.created_at, "progress": progress_payload(ev)}
+
+# Prefijo de field_key de cada sección (s_q1_r1, vc_q3_obs, ...) → columna de progreso
+SECTION_COLUMNS = {"s": "s_filled", "p": "p_filled", "q": "q_filled", "vc": "vc_filled"}
+
+def progress_counters(rows: Iterable[tuple]) -> dict:
+    """Contadores de Evaluation a partir de (field_key, is_required, value)."""
+    c = dict.fromkeys(["required_total", "required_filled", *SECTION_COLUMNS.values(),
+                       "r1_filled", "r2_filled", "r3_filled"], 0)
+    for key, req, val in rows:
+        filled = str(val or "").strip() != ""
+        if req:
+            c["required_total"] += 1
+            c["required_filled"] += filled
+        base, _, rev = key.rpartition("_")
+        if not filled or rev not in ("r1", "r2", "r3") or "_q" not in base:
+            continue
+        c[f"{rev}_filled"] += 1
+        col = SECTION_COLUMNS.get(base.split("_q", 1)[0])
+        if rev == "r1" and col:
+            c[col] += 1
+    return c
+
+def progress_payload(ev: Evaluation) -> dict:
+    """Proyección compacta del progreso (listas y eventos del panel)."""
+    return {
+        "required": [ev.required_filled or 0, ev.required_total or 0],
+        "sections": {"S": ev.s_filled or 0, "P": ev.p_filled or 0, "Q": ev.q_filled or 0, "VC": ev.vc_filled or 0},
+        "revisions": [ev.r1_filled or 0, ev.r2_filled or 0, ev.r3_filled or 0],
+        "signed_mask": ev.signed_mask or 0,
+    }
+
+def merge_responses(evaluation_id: int, rows: Iterable[tuple], items: Iterable[dict], now: float):
+    """Fusiona items con las filas actuales (id, field_key, value, is_required, saved_at).
+       Devuelve (existentes, cambiadas, nuevas) como dicts listos para UPDATE / INSERT executemany.
+       Compartido por el repositorio sync y el async (app.asgi)."""
+    existing = {key: {"id": rid, "value": val, "is_required": req, "saved_at": ts}
+                for rid, key, val, req, ts in rows}
+    changed, new_rows = {}, {}
+    for it in items:
+        key = it["field_key"]
+        val = it.get("value", "")
+        saved_at = it.get("saved_at") or now
+        if key in existing:
+            r = existing[key]
+            if r["saved_at"] is not None and saved_at < r["saved_at"]:
+                continue  # otro worker / guardado explícito ya escribió algo más nuevo
+            r.update(value=val, is_required=bool(it.get("is_required", r["is_required"])), saved_at=saved_at)
+            changed[key] = r
+        else:
+            new_rows[key] = {"evaluation_id": evaluation_id, "field_key": key, "value": val,
+                             "is_required": bool(it.get("is_required", False)), "saved_at": saved_at}
+    return existing, changed, new_rows
+
+def progress_rows(existing: dict, new_rows: dict) -> List[tuple]:
+    """(field_key, is_required, value) de todas las respuestas tras merge_responses."""
+    values = [(key, r["is_required"], r["value"]) for key, r in existing.items()]
+    values += [(r["field_key"], r["is_required"], r["value"]) for r in new_rows.values()]
+    return values
+
+RESPONSE_STATE = (EvaluationResponse.id, EvaluationResponse.field_key, EvaluationResponse.value,
+                  EvaluationResponse.is_required, EvaluationResponse.saved_at)
 
 class EvaluationRepository:
 
     @staticmethod
     def new(folio: str) -> Evaluation:
-        with get_session() as s:
+        with get_session(write=True) as s:
             # UTC aware para evitar comparaciones naive/aware en filtros
             ev = Evaluation(folio=folio, status=EvalStatus.PENDIENTE, created_at=datetime.now(timezone.utc))
             s.add(ev)
             s.flush()
+            emit_event(s, "created", ev.id, **_list_payload(ev))
             return ev
 
     @staticmethod
@@ -49,72 +129,113 @@ class EvaluationRepository:
 
     @staticmethod
     def upsert_responses(evaluation_id: int, items: Iterable[dict]) -> Evaluation:
-        with get_session() as s:
+        """items: field_key, value y opcionales is_required / saved_at (epoch en que se aceptó el
+           guardado; default ahora). Un campo cuyo valor en la BD es más nuevo que saved_at se omite."""
+        now = time.time()
+        with get_session(write=True) as s:
             ev = s.get(Evaluation, evaluation_id)
             if not ev:
                 raise ValueError("evaluation_id no existe")
 
-            existing = {r.field_key: r for r in ev.responses}
-
-            for it in items:
-                key = it["field_key"]
-                val = it.get("value", "")
-                req = bool(it.get("is_required", existing.get(key).is_required if key in existing else False))
-                if key in existing:
-                    r = existing[key]
-                    r.value = val
-                    r.is_required = req
-                else:
-                    s.add(EvaluationResponse(
-                        evaluation_id=ev.id, field_key=key, value=val, is_required=req
-                    ))
-
-            ev.required_total = sum(1 for r in ev.responses if r.is_required)
-            ev.required_filled = sum(1 for r in ev.responses if r.is_required and str(r.value).strip() != "")
+            # Un SELECT explícito de columnas (no lazy load de ev.responses)
+            rows = s.execute(select(*RESPONSE_STATE).where(EvaluationResponse.evaluation_id == ev.id))
+            existing, changed, new_rows = merge_responses(ev.id, rows, items, now)
+            # Existentes: UPDATE por PK en un solo executemany (las mismas columnas en todas las filas)
+            if changed:
+                s.execute(update(EvaluationResponse), list(changed.values()))
+            # Filas nuevas (siembra: ~200) en un solo executemany; el ORM las insertaría una por una
+            if new_rows:
+                s.execute(insert(EvaluationResponse), list(new_rows.values()))
+
+            values = progress_rows(existing, new_rows)
+            for col, n in progress_counters(values).items():
+                setattr(ev, col, n)
+            emit_event(s, "saved", ev.id, required_total=ev.required_total, required_filled=ev.required_filled,
+                       progress=progress_payload(ev))
             s.flush()
             return ev
 
     @staticmethod
     def get_responses(evaluation_id: int) -> list[dict]:
         with get_session() as s:
-            ev = s.get(Evaluation, evaluation_id)
-            if not ev:
-                return []
-            return [{"field_key": r.field_key, "value": r.value, "is_required": r.is_required} for r in ev.responses]
+            stmt = (
+                select(EvaluationResponse.field_key, EvaluationResponse.value, EvaluationResponse.is_required)
+                .where(EvaluationResponse.evaluation_id == evaluation_id)
+                .order_by(EvaluationResponse.id)
+            )
+            return [{"field_key": k, "value": v, "is_required": req} for k, v, req in s.execute(stmt)]
 
     @staticmethod
-    def add_signature(evaluation_id: int, role: str, signer_name: str, image_path: str) -> Signature:
-        with get_session() as s:
+    def add_signature(evaluation_id: int, role: str, signer_name: str, image_path: str, role_bit: int = 0,
+                      strokes: Optional[str] = None) -> Signature:
+        """role_bit: bit del rol en signed_mask (0 = rol fuera de meta.sign_roles).
+           Firma vectorial: image_path="" y strokes con los trazos codificados."""
+        with get_session(write=True) as s:
             sig = Signature(
-                evaluation_id=evaluation_id, role=role, signer_name=signer_name, image_path=image_path
+                evaluation_id=evaluation_id, role=role, signer_name=signer_name, image_path=image_path,
+                strokes=strokes,
             )
             s.add(sig)
+            # OR en SQL: dos firmas simultáneas no se pisan el bitmask
+            mask = s.execute(
+                update(Evaluation).where(Evaluation.id == evaluation_id)
+                .values(signed_mask=Evaluation.signed_mask.op("|")(role_bit))
+                .returning(Evaluation.signed_mask)
+            ).scalar()
+            emit_event(s, "signed", evaluation_id, role=role, signed_mask=mask)
             s.flush()
             return sig
 
     @staticmethod
     def set_status(evaluation_id: int, status: EvalStatus) -> bool:
-        with get_session() as s:
+        with get_session(write=True) as s:
             ev = s.get(Evaluation, evaluation_id)
             if not ev:
                 return False
+            if status == EvalStatus.COMPLETADA and ev.status != status:
+                emit_event(s, "completed", ev.id, **{**_list_payload(ev), "status": status.value})
             ev.status = status
             s.flush()
             return True
 
     @staticmethod
-    def delete(eid: int) -> bool:
-        with get_session() as s:
-            ev = s.get(Evaluation, eid)
-            if not ev:
-                return False
-            for r in list(ev.responses):
-                s.delete(r)
-            for sg in list(ev.signatures):
-                s.delete(sg)
-            s.delete(ev)
-            s.flush()
-            return True
+    def delete(eid: int) -> Optional[DeletedFiles]:
+        """DELETE único; responses y signatures caen por ON DELETE CASCADE."""
+        with get_session(write=True) as s:
+            folio = s.execute(select(Evaluation.folio).where(Evaluation.id == eid)).scalar()
+            if folio is None:
+                return None
+            paths = s.execute(select(Signature.image_path).where(Signature.evaluation_id == eid)).scalars().all()
+            s.execute(delete(Evaluation).where(Evaluation.id == eid))
+            emit_event(s, "deleted", eid, ids=[eid])
+            return DeletedFiles([folio], list(paths), [eid])
+
+    @staticmethod
+    def delete_where(status: Optional[EvalStatus] = None, dt_from: Optional[datetime] = None,
+                     dt_to: Optional[datetime] = None, dry_run: bool = False) -> DeletedFiles:
+        """Borrado masivo por estado y/o rango de created_at [dt_from, dt_to)."""
+        conds = []
+        if status is not None:
+            conds.append(Evaluation.status == status)
+        if dt_from is not None:
+            conds.append(Evaluation.created_at >= dt_from)
+        if dt_to is not None:
+            conds.append(Evaluation.created_at < dt_to)
+        if not conds:
+            raise ValueError("delete_where requiere al menos un filtro")
+
+        with get_session(write=True) as s:
+            rows = s.execute(select(Evaluation.id, Evaluation.folio).where(*conds)).all()
+            ids = [eid for eid, _ in rows]
+            folios = [folio for _, folio in rows]
+            if dry_run or not rows:
+                return DeletedFiles(folios, [], ids)
+            sub = select(Evaluation.id).where(*conds).scalar_subquery()
+            paths = s.execute(select(Signature.image_path).where(Signature.evaluation_id.in_(sub))).scalars().all()
+            s.execute(delete(Evaluation).where(*conds))
+            # Un solo evento para todo el lote
+            emit_event(s, "deleted", 0, ids=ids)
+            return DeletedFiles(folios, list(paths), ids)
 
     @staticmethod
     def list_by_status(status: EvalStatus) -> List[Evaluation]:
@@ -125,3 +246,114 @@ class EvaluationRepository:
                 .order_by(Evaluation.created_at.desc())
             )
             return list(s.execute(stmt).scalars().all())
+
+    @staticmethod
+    def ids_after(after_id: int, limit: int, status: Optional[EvalStatus] = None) -> List[int]:
+        """Siguiente lote de ids (orden ascendente) para jobs por lotes."""
+        with get_session() as s:
+            stmt = select(Evaluation.id).where(Evaluation.id > after_id).order_by(Evaluation.id).limit(limit)
+            if status is not None:
+                stmt = stmt.where(Evaluation.status == status)
+            return list(s.execute(stmt).scalars())
+
+    @staticmethod
+    def count_after(after_id: int, status: Optional[EvalStatus] = None) -> int:
+        with get_session() as s:
+            stmt = select(func.count(Evaluation.id)).where(Evaluation.id > after_id)
+            if status is not None:
+                stmt = stmt.where(Evaluation.status == status)
+            return s.execute(stmt).scalar() or 0
+
+    @staticmethod
+    def recompute_progress(evaluation_ids: List[int], role_bits: dict, dry_run: bool = False) -> int:
+        """Recalcula contadores y signed_mask de un lote desde las tablas hijas.
+           Solo escribe las filas que cambian (un UPDATE por lote) y devuelve cuántas son;
+           updated_at se conserva (lo usa el archivado)."""
+        if not evaluation_ids:
+            return 0
+        cols = ["signed_mask", *progress_counters([]).keys()]
+        with get_session(write=not dry_run) as s:
+            rows = defaultdict(list)
+            stmt = (
+                select(EvaluationResponse.evaluation_id, EvaluationResponse.field_key,
+                       EvaluationResponse.is_required, EvaluationResponse.value)
+                .where(EvaluationResponse.evaluation_id.in_(evaluation_ids))
+            )
+            for eid, key, req, val in s.execute(stmt):
+                rows[eid].append((key, req, val))
+            masks = defaultdict(int)
+            stmt = select(Signature.evaluation_id, Signature.role).where(Signature.evaluation_id.in_(evaluation_ids))
+            for eid, role in s.execute(stmt):
+                masks[eid] |= role_bits.get(role, 0)
+
+            current = s.execute(
+                select(Evaluation.id, Evaluation.updated_at, *[getattr(Evaluation, c) for c in cols])
+                .where(Evaluation.id.in_(evaluation_ids))
+            ).all()
+            changes = []
+            for eid, updated_at, *values in current:
+                new = {"signed_mask": masks[eid], **progress_counters(rows[eid])}
+                if [new[c] for c in cols] != list(values):
+                    changes.append({"id": eid, "updated_at": updated_at, **new})
+            if changes and not dry_run:
+                s.execute(update(Evaluation), changes)
+            return len(changes)
+
+    @staticmethod
+    def referenced_signature_paths(paths: List[str], chunk: int = 500) -> set:
+        """Subconjunto de 'paths' que alguna firma referencia (IN por lotes: límite de parámetros)."""
+        paths = list(dict.fromkeys(p for p in paths if p))
+        found = set()
+        if not paths:
+            return found
+        with get_session() as s:
+            for i in range(0, len(paths), chunk):
+                stmt = select(Signature.image_path).where(Signature.image_path.in_(paths[i:i + chunk]))
+                found.update(s.execute(stmt).scalars())
+        return found
+
+    @staticmethod
+    def signature_path_sample() -> Optional[str]:
+        with get_session() as s:
+            return s.execute(select(Signature.image_path).where(Signature.image_path != "").limit(1)).scalar()
+
+    @staticmethod
+    def no_empleado_map(evaluation_ids: List[int]) -> dict[int, str]:
+        """{evaluation_id: no_empleado} en un solo query (filtro de listas)."""
+        if not evaluation_ids:
+            return {}
+        with get_session() as s:
+            stmt = (
+                select(EvaluationResponse.evaluation_id, EvaluationResponse.value)
+                .where(EvaluationResponse.field_key == "no_empleado")
+                .where(EvaluationResponse.evaluation_id.in_(evaluation_ids))
+            )
+            return {eid: (val or "") for eid, val in s.execute(stmt)}
+
+    @staticmethod
+    def iter_response_rows(status: Optional[EvalStatus] = None, dt_from: Optional[datetime] = None,
+                           dt_to: Optional[datetime] = None, area: str = "",
+                           chunk: int = 2000) -> Iterator[tuple]:
+        """Filas EAV (id, folio, status, created_at, updated_at, field_key, value) ordenadas por
+           evaluación, leídas con cursor del servidor (yield_per) para no cargar todo en memoria."""
+        stmt = (
+            select(
+                Evaluation.id, Evaluation.folio, Evaluation.status, Evaluation.created_at, Evaluation.updated_at,
+                EvaluationResponse.field_key, EvaluationResponse.value,
+            )
+            .join(EvaluationResponse, EvaluationResponse.evaluation_id == Evaluation.id)
+            .order_by(Evaluation.id)
+        )
+        if status is not None:
+            stmt = stmt.where(Evaluation.status == status)
+        if dt_from is not None:
+            stmt = stmt.where(Evaluation.created_at >= dt_from)
+        if dt_to is not None:
+            stmt = stmt.where(Evaluation.created_at < dt_to)
+        if area:
+            stmt = stmt.where(Evaluation.id.in_(
+                select(EvaluationResponse.evaluation_id)
+                .where(EvaluationResponse.field_key == "area", EvaluationResponse.value == area)
+            ))
+        with get_session() as s:
+            yield from s.execute(stmt.execution_options(yield_per=chunk))
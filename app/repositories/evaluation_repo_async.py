@@ -0,0 +1,140 @@
+from __future__ import annotations
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.orm import selectinload
+from ..db import get_async_session
+from ..models import Evaluation, EvaluationResponse, Signature, EvalStatus, EvaluationEvent
+from .evaluation_repo import (
+    emit_event, _list_payload, merge_responses, progress_rows, progress_counters, progress_payload,
+    RESPONSE_STATE,
+)
+
+class AsyncEvaluationRepository:
+    """Las operaciones de EvaluationRepository que usa la API async (app.asgi), con las mismas
+       sentencias sobre el engine async del event loop: el request espera la BD sin tomar un thread."""
+
+    @staticmethod
+    async def new(folio: str) -> Evaluation:
+        async with get_async_session(write=True) as s:
+            ev = Evaluation(folio=folio, status=EvalStatus.PENDIENTE, created_at=datetime.now(timezone.utc))
+            s.add(ev)
+            await s.flush()
+            emit_event(s, "created", ev.id, **_list_payload(ev))
+            return ev
+
+    @staticmethod
+    async def get(eid: int) -> Optional[Evaluation]:
+        async with get_async_session() as s:
+            return await s.get(Evaluation, eid)
+
+    @staticmethod
+    async def get_with_children(eid: int) -> Optional[Evaluation]:
+        async with get_async_session() as s:
+            stmt = (
+                select(Evaluation)
+                .options(
+                    selectinload(Evaluation.responses),
+                    selectinload(Evaluation.signatures),
+                )
+                .where(Evaluation.id == eid)
+            )
+            return (await s.execute(stmt)).scalars().first()
+
+    @staticmethod
+    async def exists(eid: int) -> bool:
+        async with get_async_session() as s:
+            return (await s.get(Evaluation, eid)) is not None
+
+    @staticmethod
+    async def get_by_folio(folio: str) -> Optional[Evaluation]:
+        async with get_async_session() as s:
+            stmt = select(Evaluation).where(Evaluation.folio == folio)
+            return (await s.execute(stmt)).scalars().first()
+
+    @staticmethod
+    async def upsert_responses(evaluation_id: int, items: Iterable[dict]) -> Evaluation:
+        """Igual que EvaluationRepository.upsert_responses (saved_at por campo, executemany)."""
+        now = time.time()
+        async with get_async_session(write=True) as s:
+            ev = await s.get(Evaluation, evaluation_id)
+            if not ev:
+                raise ValueError("evaluation_id no existe")
+
+            rows = await s.execute(select(*RESPONSE_STATE).where(EvaluationResponse.evaluation_id == ev.id))
+            existing, changed, new_rows = merge_responses(ev.id, rows, items, now)
+            if changed:
+                await s.execute(update(EvaluationResponse), list(changed.values()))
+            if new_rows:
+                await s.execute(insert(EvaluationResponse), list(new_rows.values()))
+
+            for col, n in progress_counters(progress_rows(existing, new_rows)).items():
+                setattr(ev, col, n)
+            emit_event(s, "saved", ev.id, required_total=ev.required_total, required_filled=ev.required_filled,
+                       progress=progress_payload(ev))
+            await s.flush()
+            return ev
+
+    @staticmethod
+    async def get_responses(evaluation_id: int) -> list[dict]:
+        async with get_async_session() as s:
+            stmt = (
+                select(EvaluationResponse.field_key, EvaluationResponse.value, EvaluationResponse.is_required)
+                .where(EvaluationResponse.evaluation_id == evaluation_id)
+                .order_by(EvaluationResponse.id)
+            )
+            return [{"field_key": k, "value": v, "is_required": req} for k, v, req in await s.execute(stmt)]
+
+    @staticmethod
+    async def add_signature(evaluation_id: int, role: str, signer_name: str, image_path: str, role_bit: int = 0,
+                            strokes: Optional[str] = None) -> Signature:
+        async with get_async_session(write=True) as s:
+            sig = Signature(
+                evaluation_id=evaluation_id, role=role, signer_name=signer_name, image_path=image_path,
+                strokes=strokes,
+            )
+            s.add(sig)
+            mask = (await s.execute(
+                update(Evaluation).where(Evaluation.id == evaluation_id)
+                .values(signed_mask=Evaluation.signed_mask.op("|")(role_bit))
+                .returning(Evaluation.signed_mask)
+            )).scalar()
+            emit_event(s, "signed", evaluation_id, role=role, signed_mask=mask)
+            await s.flush()
+            return sig
+
+    @staticmethod
+    async def set_status(evaluation_id: int, status: EvalStatus) -> bool:
+        async with get_async_session(write=True) as s:
+            ev = await s.get(Evaluation, evaluation_id)
+            if not ev:
+                return False
+            if status == EvalStatus.COMPLETADA and ev.status != status:
+                emit_event(s, "completed", ev.id, **{**_list_payload(ev), "status": status.value})
+            ev.status = status
+            await s.flush()
+            return True
+
+
+class AsyncEventRepository:
+    """Lecturas de EventRepository para /events en modo ASGI."""
+
+    @staticmethod
+    async def bounds() -> Tuple[int, int]:
+        async with get_async_session() as s:
+            first = select(func.min(EvaluationEvent.id)).scalar_subquery()
+            last = select(func.max(EvaluationEvent.id)).scalar_subquery()
+            lo, hi = (await s.execute(select(first, last))).one()
+            return lo or 0, hi or 0
+
+    @staticmethod
+    async def since(last_id: int, limit: int = 200) -> List[tuple]:
+        async with get_async_session() as s:
+            stmt = (
+                select(EvaluationEvent.id, EvaluationEvent.evaluation_id, EvaluationEvent.type, EvaluationEvent.payload)
+                .where(EvaluationEvent.id > last_id)
+                .order_by(EvaluationEvent.id)
+                .limit(limit)
+            )
+            return [tuple(r) for r in (await s.execute(stmt)).all()]
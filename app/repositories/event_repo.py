@@ -0,0 +1,40 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import select, delete, func
+from ..db import get_session
+from ..models import EvaluationEvent
+
+class EventRepository:
+
+    @staticmethod
+    def last_id() -> int:
+        with get_session() as s:
+            return s.execute(select(func.max(EvaluationEvent.id))).scalar() or 0
+
+    @staticmethod
+    def bounds() -> Tuple[int, int]:
+        """(primer id, último id) retenidos; (0, 0) si no hay eventos. Dos subconsultas para que
+           cada MIN/MAX se resuelva por el extremo del índice de PK."""
+        with get_session() as s:
+            first = select(func.min(EvaluationEvent.id)).scalar_subquery()
+            last = select(func.max(EvaluationEvent.id)).scalar_subquery()
+            lo, hi = s.execute(select(first, last)).one()
+            return lo or 0, hi or 0
+
+    @staticmethod
+    def since(last_id: int, limit: int = 200) -> List[tuple]:
+        """(id, evaluation_id, type, payload) posteriores a last_id; consulta por PK, barata."""
+        with get_session() as s:
+            stmt = (
+                select(EvaluationEvent.id, EvaluationEvent.evaluation_id, EvaluationEvent.type, EvaluationEvent.payload)
+                .where(EvaluationEvent.id > last_id)
+                .order_by(EvaluationEvent.id)
+                .limit(limit)
+            )
+            return [tuple(r) for r in s.execute(stmt).all()]
+
+    @staticmethod
+    def prune(before: datetime) -> int:
+        with get_session(write=True) as s:
+            return s.execute(delete(EvaluationEvent).where(EvaluationEvent.created_at < before)).rowcount
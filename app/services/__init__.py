@@ -1 +1,7 @@
 from .evaluation_service import EvaluationService, ValidationResult
+from .archive_service import ArchiveService
+from .tabular_export import TabularExportService
+from .event_feed import EventFeedService
+from .autosave_buffer import AutosaveBuffer
+from .batch_jobs import BatchJob, BatchRunner, JOBS
+from .evaluation_service_async import AsyncEvaluationService
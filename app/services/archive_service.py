@@ -0,0 +1,135 @@
+import os
+import json
+import zlib
+import base64
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+from flask import current_app
+
+from ..models import EvaluationArchive
+from ..repositories.archive_repo import ArchiveRepository
+from .evaluation_service import EvaluationService, to_local_iso
+from .file_cleanup import FileCleanup
+
+
+def _iso(dt: datetime | None) -> str | None:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat(timespec="seconds")
+
+
+def _read_b64(path: str) -> str:
+    if not path or not os.path.exists(path):
+        return ""
+    return base64.b64encode(Path(path).read_bytes()).decode("ascii")
+
+
+class ArchiveService:
+    """Retención: mueve COMPLETADAS antiguas a evaluation_archives (snapshot + PDF)
+       para que evaluations / evaluation_responses / signatures solo tengan el working set."""
+
+    @staticmethod
+    def build_snapshot(ev) -> dict:
+        return {
+            "id": ev.id,
+            "folio": ev.folio,
+            "status": ev.status.value,
+            "created_at": _iso(ev.created_at),
+            "updated_at": _iso(ev.updated_at),
+            "required_total": ev.required_total,
+            "required_filled": ev.required_filled,
+            # [field_key, value, is_required] → más compacto que dicts
+            "responses": [[r.field_key, r.value or "", bool(r.is_required)] for r in ev.responses],
+            "signatures": [
+                {
+                    "role": sg.role,
+                    "signer_name": sg.signer_name,
+                    "signed_at": _iso(sg.signed_at),
+                    "image_b64": _read_b64(sg.image_path),
+                    "strokes": sg.strokes,  # firma vectorial (codificada); image_b64 vacío
+                }
+                for sg in ev.signatures
+            ],
+        }
+
+    @staticmethod
+    def _pack(snapshot: dict) -> bytes:
+        raw = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(raw, 9)
+
+    @staticmethod
+    def _unpack(payload: bytes) -> dict:
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    # ---------- Job de archivado ----------
+    @staticmethod
+    def archive_completed(older_than_days: int | None = None, batch_size: int | None = None,
+                          max_batches: int | None = None, log=print) -> int:
+        """Archiva por lotes; cada lote es una transacción independiente.
+           Reanudable: lo ya archivado deja de ser candidato, basta con volver a correrlo."""
+        cfg = current_app.config
+        days = older_than_days if older_than_days is not None else cfg.get("ARCHIVE_AFTER_DAYS", 180)
+        size = batch_size or cfg.get("ARCHIVE_BATCH_SIZE", 200)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            evs = ArchiveRepository.candidates(cutoff, size)
+            if not evs:
+                break
+
+            rows: List[EvaluationArchive] = []
+            files: List[str] = []
+            signature_files: List[str] = []
+            for ev in evs:
+                pdf_path = EvaluationService.render_pdf(ev)
+                pdf_bytes = Path(pdf_path).read_bytes()
+                resp = {r.field_key: (r.value or "") for r in ev.responses}
+                rows.append(EvaluationArchive(
+                    id=ev.id,
+                    folio=ev.folio,
+                    no_empleado=resp.get("no_empleado", "").strip()[:40],
+                    created_at=ev.created_at,
+                    completed_at=ev.updated_at,
+                    payload=ArchiveService._pack(ArchiveService.build_snapshot(ev)),
+                    pdf=pdf_bytes,
+                ))
+                files.append(pdf_path)
+                signature_files += [sg.image_path for sg in ev.signatures if sg.image_path]
+
+            total += ArchiveRepository.archive_batch(rows)
+            batches += 1
+            # Los archivos solo se borran una vez confirmada la transacción (y los PNG solo si
+            # ninguna firma viva los sigue usando; el snapshot ya lleva su copia en base64)
+            FileCleanup.enqueue(files + EvaluationService.unreferenced_signature_paths(signature_files))
+            log(f"lote {batches}: {len(rows)} archivadas (total {total})")
+        return total
+
+    # ---------- Lectura ----------
+    @staticmethod
+    def snapshot(eid: int) -> Optional[dict]:
+        payload = ArchiveRepository.get_payload(eid)
+        return ArchiveService._unpack(payload) if payload else None
+
+    @staticmethod
+    def get_responses(eid: int) -> List[dict]:
+        snap = ArchiveService.snapshot(eid)
+        if not snap:
+            return []
+        return [{"field_key": k, "value": v, "is_required": req} for k, v, req in snap["responses"]]
+
+    @staticmethod
+    def get_pdf(eid: int) -> Optional[Tuple[str, bytes]]:
+        return ArchiveRepository.get_pdf(eid)
+
+    @staticmethod
+    def list_items(dt_from=None, dt_to=None, no_empleado: str = "") -> List[dict]:
+        return [
+            {"id": eid, "folio": folio, "created_at": created_at.isoformat(),
+             "created_local": to_local_iso(created_at), "archived": True}
+            for eid, folio, created_at in ArchiveRepository.list_archived(dt_from, dt_to, no_empleado)
+        ]
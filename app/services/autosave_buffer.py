@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import atexit
+import threading
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+from flask import Flask
+
+from ..repositories import EvaluationRepository
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock; ahí no se puede renombrar un archivo que otro tiene abierto
+    fcntl = None
+
+
+def _lock_file(path: Path, block: bool = True):
+    """Abre y toma (flock exclusivo) un archivo de lock; None si otro proceso lo tiene.
+       El lock se suelta al cerrar el archivo o al morir el proceso."""
+    f = open(path, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if block else fcntl.LOCK_NB))
+        except OSError:
+            f.close()
+            return None
+    return f
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return False  # os.kill terminaría el proceso; el rename de un journal abierto falla solo
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AutosaveBuffer:
+    """Write-behind para autosave: fusiona en memoria los guardados parciales de cada
+       evaluación y los escribe a la BD cada AUTOSAVE_FLUSH_SECONDS (o antes, en
+       /complete, /sign, guardado explícito y al apagar).
+
+       Durabilidad: cada guardado aceptado se agrega a un journal local (append-only,
+       fsync) antes de responder; al arrancar se reaplican los journals que hayan quedado.
+       Cada proceso escribe su propio journal: journal-<pid>.log, y mientras vive retiene el
+       flock de journal-<pid>.lock para que ningún otro proceso lo reclame.
+
+       El buffer es del proceso: init_autosave no arranca con más de un worker (WEB_CONCURRENCY).
+       En un reinicio de gunicorn conviven el worker viejo y el nuevo; saved_at por campo evita
+       que el flush tardío de uno pise lo que el otro ya escribió."""
+
+    def __init__(self, journal_dir: Path, flush_seconds: float = 2.0, fsync: bool = True):
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.journal_dir / f"journal-{os.getpid()}.log"
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self._pending: Dict[int, Dict[str, dict]] = {}
+        self._inflight: Dict[int, Dict[str, dict]] = {}  # sacado de _pending, escribiéndose a la BD
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._owner_lock = _lock_file(self.journal_path.with_suffix(".lock"))
+        if self.journal_path.exists():
+            # De un proceso anterior con el mismo pid (p.ej. contenedor reiniciado): se reaplica en replay()
+            os.replace(self.journal_path, self.journal_dir / f"orphan-{os.getpid()}-{time.time_ns()}.log")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- Escritura ----------
+    def add(self, evaluation_id: int, items: List[dict]) -> int:
+        """Acepta un guardado parcial. Al regresar ya está en el journal.
+           Cada campo lleva saved_at (momento en que se aceptó; el del journal al reaplicar):
+           upsert_responses no lo escribe sobre un valor más nuevo."""
+        now = time.time()
+        items = [
+            {"field_key": it["field_key"], "value": it.get("value", ""), "saved_at": it.get("saved_at") or now}
+            for it in items if it.get("field_key")
+        ]
+        if not items:
+            return 0
+        with self._lock:
+            self._append({"eid": evaluation_id, "items": items})
+            slot = self._pending.setdefault(evaluation_id, {})
+            for it in items:
+                slot[it["field_key"]] = it
+            return len(slot)
+
+    def _append(self, record: dict):
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    # ---------- Lectura ----------
+    def overlay(self, evaluation_id: int, responses: List[dict]) -> List[dict]:
+        """Aplica los valores aún no escritos sobre las respuestas leídas de la BD."""
+        with self._lock:
+            slot = {**self._inflight.get(evaluation_id, {}), **self._pending.get(evaluation_id, {})}
+        if not slot:
+            return responses
+        out = []
+        for r in responses:
+            it = slot.pop(r["field_key"], None)
+            out.append({**r, "value": it["value"]} if it else r)
+        out += [{"field_key": k, "value": it["value"], "is_required": False} for k, it in slot.items()]
+        return out
+
+    def discard(self, evaluation_id: int):
+        with self._lock:
+            if self._pending.pop(evaluation_id, None) is not None:
+                self._compact()
+
+    # ---------- Flush ----------
+    def flush(self, evaluation_id: Optional[int] = None) -> int:
+        """Escribe lo pendiente (de una evaluación o de todas). Devuelve evaluaciones escritas.
+           La escritura a la BD va sin self._lock: add() y overlay() no esperan al flush.
+           Un flush a la vez, para que una escritura vieja no se confirme después de una nueva."""
+        with self._flush_lock:
+            with self._lock:
+                eids = [evaluation_id] if evaluation_id is not None else list(self._pending)
+                self._inflight = {eid: self._pending.pop(eid) for eid in eids if self._pending.get(eid)}
+                batch = dict(self._inflight)
+            written = 0
+            failed: Dict[int, Dict[str, dict]] = {}
+            for eid, slot in batch.items():
+                try:
+                    EvaluationRepository.upsert_responses(eid, list(slot.values()))
+                except ValueError:
+                    # La evaluación ya no existe (borrada/archivada): no hay a dónde escribir
+                    pass
+                except Exception:
+                    traceback.print_exc()
+                    failed[eid] = slot  # vuelve a pendiente (sigue en el journal); se reintenta
+                    continue
+                written += 1
+            with self._lock:
+                for eid, slot in failed.items():
+                    # Lo que llegó mientras se escribía es más nuevo: gana sobre lo que falló
+                    self._pending[eid] = {**slot, **self._pending.get(eid, {})}
+                self._inflight = {}
+                if written:
+                    self._compact()
+            return written
+
+    def _compact(self):
+        """Reescribe el journal con solo lo pendiente o en escritura (write + rename atómico)."""
+        tmp = self.journal_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for slots in (self._inflight, self._pending):
+                for eid, slot in slots.items():
+                    f.write(json.dumps({"eid": eid, "items": list(slot.values())}, ensure_ascii=False) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    # ---------- Arranque / apagado ----------
+    def _claim(self, path: Path) -> Optional[Path]:
+        """Reclama (rename atómico) el journal de otro proceso solo si su dueño ya no existe:
+           si se puede tomar su flock (o, sin archivo de lock, si su pid ya no existe). El flock se
+           retiene durante el rename: un proceso nuevo con ese pid espera a que termine."""
+        try:
+            pid = int(path.stem.split("-", 1)[1])
+        except ValueError:
+            return None
+        lock_path = path.with_suffix(".lock")
+        lock = None
+        if fcntl is not None and lock_path.exists():
+            lock = _lock_file(lock_path, block=False)
+            if lock is None:
+                return None
+        elif _pid_alive(pid):
+            return None
+        claimed = path.with_name(f"replay-{os.getpid()}-{path.name}")
+        try:
+            os.rename(path, claimed)
+            lock_path.unlink(missing_ok=True)
+        except OSError:
+            return None
+        finally:
+            if lock is not None:
+                lock.close()
+        return claimed
+
+    def _stale_replays(self) -> List[Path]:
+        """replay-<pid>-*.log de un proceso que murió a mitad de replay(): también se reaplican.
+           Se toman antes de reclamar nada, así que los de nuestro pid son de un proceso anterior."""
+        stale = []
+        for path in sorted(self.journal_dir.glob("replay-*.log")):
+            try:
+                pid = int(path.name.split("-", 2)[1])
+            except ValueError:
+                continue
+            if pid == os.getpid() or not _pid_alive(pid):
+                stale.append(path)
+        return stale
+
+    def replay(self) -> int:
+        """Reaplica journals de procesos caídos (y el propio de un proceso anterior con el mismo pid).
+           Cada archivo se reclama con un rename atómico para que dos workers no lo procesen a la vez."""
+        claimed: List[Path] = []
+        orphans = self._stale_replays() + sorted(self.journal_dir.glob("orphan-*.log"))
+        for path in sorted(self.journal_dir.glob("journal-*.log")):
+            if path != self.journal_path and (target := self._claim(path)):
+                claimed.append(target)
+        for path in orphans:
+            target = path.with_name(f"replay-{os.getpid()}-{path.name}")
+            try:
+                os.rename(path, target)  # de un proceso muerto: basta con ganar el rename
+            except OSError:
+                continue
+            claimed.append(target)
+
+        replayed = 0
+        for path in claimed:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # última línea truncada por la caída
+                    self.add(int(rec["eid"]), rec.get("items", []))
+                    replayed += 1
+            os.remove(path)
+        if replayed:
+            self.flush()
+        return replayed
+
+    def start(self):
+        def loop():
+            while not self._stop.wait(self.flush_seconds):
+                try:
+                    self.flush()
+                except Exception:
+                    traceback.print_exc()
+        self._thread = threading.Thread(target=loop, name="autosave-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            self._journal.close()
+            if not self._pending:
+                try:
+                    os.remove(self.journal_path)
+                    self.journal_path.with_suffix(".lock").unlink(missing_ok=True)
+                except OSError:
+                    pass
+            self._owner_lock.close()
+
+
+def init_autosave(app: Flask):
+    if not app.config.get("AUTOSAVE_BUFFER"):
+        return
+    workers = app.config.get("WEB_WORKERS", 1)
+    if workers > 1:
+        # Lo pendiente solo lo ve su worker: /complete en otro validaría sin esos valores
+        raise ValueError(f"AUTOSAVE_BUFFER=1 requiere un solo worker de gunicorn y hay {workers} "
+                         f"(WEB_CONCURRENCY): usa WEB_CONCURRENCY=1 con más --threads o apaga el buffer")
+    buf = AutosaveBuffer(
+        Path(app.instance_path) / "autosave",
+        flush_seconds=app.config.get("AUTOSAVE_FLUSH_SECONDS", 2.0),
+        fsync=app.config.get("AUTOSAVE_FSYNC", True),
+    )
+    buf.replay()
+    buf.start()
+    atexit.register(buf.stop)
+    app.extensions["autosave"] = buf
+
+
+def get_autosave() -> Optional[AutosaveBuffer]:
+    from flask import current_app
+    return current_app.extensions.get("autosave")
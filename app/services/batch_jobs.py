@@ -0,0 +1,255 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from flask import current_app
+
+from ..models import EvalStatus
+from ..repositories import EvaluationRepository, ArchiveRepository
+from .evaluation_service import EvaluationService
+from .archive_service import ArchiveService
+
+
+@dataclass
+class BatchJob:
+    """Job de mantenimiento por lotes. Las claves (ids o nombres de archivo) se recorren en
+       orden ascendente; el checkpoint guarda la última clave de lotes ya terminados."""
+    name: str
+    description: str
+    keys_after: Callable[[object, int], List]      # (última clave, límite) → siguiente lote
+    count_after: Callable[[object], int]           # pendientes después de la clave (progreso / ETA)
+    process: Callable[[List, bool], int]           # (lote, dry_run) → elementos cambiados
+    start_key: object = 0
+    prepare: Optional[Callable[[], None]] = None   # validaciones previas (en el proceso principal)
+
+
+# ---------- Jobs ----------
+def _recompute_counters(ids: List[int], dry_run: bool) -> int:
+    return EvaluationRepository.recompute_progress(ids, EvaluationService.sign_role_bits(), dry_run=dry_run)
+
+
+def _render_pdfs(ids: List[int], dry_run: bool) -> int:
+    if dry_run:
+        return len(ids)
+    done = 0
+    for eid in ids:
+        ev = EvaluationRepository.get_with_children(eid)
+        if ev and ev.status == EvalStatus.COMPLETADA:
+            EvaluationService.render_pdf(ev)
+            done += 1
+    return done
+
+
+# Firmas recién escritas aún sin fila en signatures (write_signature_png → add_signature)
+ORPHAN_MIN_AGE_SECONDS = 3600
+
+
+def _signature_files_after(after: str, limit: int) -> List[str]:
+    sig_dir = EvaluationService._instance_dir("signatures")
+    names = sorted(e.name for e in os.scandir(sig_dir) if e.is_file() and e.name > after)
+    return names[:limit]
+
+
+def _signature_files_count(after: str) -> int:
+    sig_dir = EvaluationService._instance_dir("signatures")
+    return sum(1 for e in os.scandir(sig_dir) if e.is_file() and e.name > after)
+
+
+def _check_signature_dir():
+    # Si la BD apunta a otro instance/ (copia, migración) todo parecería huérfano
+    sample = EvaluationRepository.signature_path_sample()
+    sig_dir = EvaluationService._instance_dir("signatures")
+    if sample and Path(sample).parent != sig_dir:
+        raise RuntimeError(f"las firmas en BD apuntan a {Path(sample).parent}, no a {sig_dir}; no se borra nada")
+
+
+def _clean_orphan_signatures(names: List[str], dry_run: bool) -> int:
+    sig_dir = EvaluationService._instance_dir("signatures")
+    paths = [str(sig_dir / n) for n in names]
+    referenced = EvaluationRepository.referenced_signature_paths(paths)
+    cutoff = time.time() - ORPHAN_MIN_AGE_SECONDS
+    orphans = [p for p in paths if p not in referenced and os.path.getmtime(p) < cutoff]
+    if not dry_run:
+        # Directo (no FileCleanup): los workers de un pool de procesos no corren atexit
+        for p in orphans:
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+    return len(orphans)
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _rebuild_archive_index(ids: List[int], dry_run: bool) -> int:
+    changes = []
+    for eid, no_empleado, completed_at, payload in ArchiveRepository.index_rows(ids):
+        snap = ArchiveService._unpack(payload)
+        resp = {k: v for k, v, _req in snap["responses"]}
+        new_noemp = (resp.get("no_empleado") or "").strip()[:40]
+        new_completed = datetime.fromisoformat(snap["updated_at"]) if snap.get("updated_at") else completed_at
+        if new_noemp != no_empleado or _naive_utc(new_completed) != _naive_utc(completed_at):
+            changes.append({"id": eid, "no_empleado": new_noemp, "completed_at": new_completed})
+    if not dry_run:
+        ArchiveRepository.update_index(changes)
+    return len(changes)
+
+
+JOBS: Dict[str, BatchJob] = {
+    job.name: job for job in [
+        BatchJob(
+            "recompute-counters",
+            "Recalcula required_total/filled, progreso por sección y signed_mask.",
+            EvaluationRepository.ids_after, EvaluationRepository.count_after, _recompute_counters,
+        ),
+        BatchJob(
+            "render-pdfs",
+            "Regenera instance/exports/<folio>.pdf de las COMPLETADAS (p.ej. tras cambiar la plantilla).",
+            lambda after, limit: EvaluationRepository.ids_after(after, limit, EvalStatus.COMPLETADA),
+            lambda after: EvaluationRepository.count_after(after, EvalStatus.COMPLETADA),
+            _render_pdfs,
+        ),
+        BatchJob(
+            "clean-orphan-signatures",
+            "Borra PNG de instance/signatures que ninguna firma referencia (más de 1 h de antigüedad).",
+            _signature_files_after, _signature_files_count, _clean_orphan_signatures,
+            start_key="", prepare=_check_signature_dir,
+        ),
+        BatchJob(
+            "rebuild-archive-index",
+            "Reconstruye no_empleado / completed_at de evaluation_archives desde el snapshot.",
+            ArchiveRepository.ids_after, ArchiveRepository.count_after, _rebuild_archive_index,
+        ),
+    ]
+}
+
+
+# ---------- Workers ----------
+_worker_app = None
+
+
+def _init_process_worker():
+    # Cada proceso crea su propia app (engine y conexiones propias; no se heredan del padre)
+    global _worker_app
+    from .. import create_app
+    _worker_app = create_app()
+
+
+def _run_in_process(job_name: str, keys: List, dry_run: bool) -> int:
+    with _worker_app.app_context():
+        return JOBS[job_name].process(keys, dry_run)
+
+
+class BatchRunner:
+    """Ejecuta un BatchJob por lotes en un pool de threads o procesos, con progreso,
+       throughput y checkpoint reanudable en instance/maintenance/<job>.json."""
+
+    def __init__(self, job: BatchJob, chunk_size: int = 200, workers: int = 4, pool: str = "thread",
+                 dry_run: bool = False, resume: bool = True, limit: Optional[int] = None, log=print):
+        self.job = job
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.pool = pool
+        self.dry_run = dry_run
+        self.resume = resume
+        self.limit = limit
+        self.log = log
+        self.checkpoint_path = EvaluationService._instance_dir("maintenance") / f"{job.name}.json"
+
+    def _load_checkpoint(self) -> dict:
+        if self.resume and self.checkpoint_path.exists():
+            return json.loads(self.checkpoint_path.read_text(encoding="utf-8"))
+        return {"last_key": self.job.start_key, "processed": 0, "changed": 0}
+
+    def _save_checkpoint(self, state: dict):
+        if self.dry_run:
+            return
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({**state, "updated_at": datetime.now(timezone.utc).isoformat()}), encoding="utf-8")
+        os.replace(tmp, self.checkpoint_path)
+
+    def _submit(self, executor, keys: List) -> Future:
+        if self.pool == "process":
+            return executor.submit(_run_in_process, self.job.name, keys, self.dry_run)
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                return self.job.process(keys, self.dry_run)
+        return executor.submit(run)
+
+    def run(self) -> dict:
+        if self.job.prepare:
+            self.job.prepare()
+        state = self._load_checkpoint()
+        if state["last_key"] != self.job.start_key:
+            self.log(f"[{self.job.name}] reanudando después de {state['last_key']!r} "
+                     f"({state['processed']} ya procesados)")
+        total = self.job.count_after(state["last_key"])
+        if self.limit is not None:
+            total = min(total, self.limit)
+        mode = " (dry-run)" if self.dry_run else ""
+        self.log(f"[{self.job.name}] {total} pendientes, lotes de {self.chunk_size}, "
+                 f"{self.workers} workers ({self.pool}){mode}")
+
+        if self.pool == "process":
+            executor = ProcessPoolExecutor(self.workers, initializer=_init_process_worker)
+        else:
+            executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"maint-{self.job.name}")
+
+        started = time.monotonic()
+        done = changed = submitted = 0
+        cursor = state["last_key"]
+        # Lotes en vuelo en orden de envío: el checkpoint solo avanza por el prefijo terminado,
+        # así que reanudar nunca salta un lote que quedó a medias
+        in_flight: deque = deque()
+        try:
+            with executor:
+                while True:
+                    while len(in_flight) < self.workers * 2:
+                        room = self.chunk_size if self.limit is None else min(self.chunk_size, self.limit - submitted)
+                        keys = self.job.keys_after(cursor, room) if room > 0 else []
+                        if not keys:
+                            break
+                        cursor = keys[-1]
+                        submitted += len(keys)
+                        in_flight.append((keys, self._submit(executor, keys)))
+                    if not in_flight:
+                        break
+                    keys, fut = in_flight.popleft()
+                    n_changed = fut.result()
+                    done += len(keys)
+                    changed += n_changed
+                    state = {"last_key": keys[-1], "processed": state["processed"] + len(keys),
+                             "changed": state["changed"] + n_changed}
+                    self._save_checkpoint(state)
+                    self._report(done, total, changed, started)
+        except BaseException:
+            for _, fut in in_flight:
+                fut.cancel()
+            self.log(f"[{self.job.name}] interrumpido; se reanuda después de {state['last_key']!r}")
+            raise
+
+        if not self.dry_run and self.limit is None:
+            # Terminado completo: la siguiente corrida empieza desde el inicio
+            self.checkpoint_path.unlink(missing_ok=True)
+        elapsed = time.monotonic() - started
+        return {"processed": done, "changed": changed, "seconds": round(elapsed, 1)}
+
+    def _report(self, done: int, total: int, changed: int, started: float):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        rate = done / elapsed
+        pct = f"{100 * done / total:5.1f}%" if total else "  -  "
+        eta = f", ETA {int((total - done) / rate)} s" if rate and total > done else ""
+        verb = "a cambiar" if self.dry_run else "cambiados"
+        self.log(f"[{self.job.name}] {done}/{total} {pct} · {rate:.1f}/s · {changed} {verb}{eta}")
@@ -1,4 +1,3 @@
-import os
 import json
 import base64
 import uuid
@@ -8,21 +7,12 @@ from typing import Tuple, List
 from flask import current_app
 
 from ..models import EvalStatus
-from ..repositories import EvaluationRepository
-
-# ReportLab (canvas + Platypus)
-from reportlab.pdfgen import canvas as rl_canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from reportlab.lib import colors
-from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-)
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
-
-from datetime import datetime, timezone
+from ..repositories import EvaluationRepository, DeletedFiles
+from .file_cleanup import FileCleanup
+from .autosave_buffer import get_autosave
+from .signature_strokes import parse_strokes, encode_strokes
+
+from datetime import datetime, timezone, timedelta
 import pytz
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # .../app
@@ -64,7 +54,6 @@ def local_day_window(from_yyyy_mm_dd: str | None, to_yyyy_mm_dd: str | None):
         dto_local = dto_local + timedelta(days=1)
     else:
         # si no hay "to", usamos dfrom + 1 día
-        from datetime import timedelta
         dto_local = dfrom_local + timedelta(days=1)
 
     # Convertimos a UTC para comparar con created_at (que está en UTC)
@@ -72,6 +61,20 @@ def local_day_window(from_yyyy_mm_dd: str | None, to_yyyy_mm_dd: str | None):
     dto_utc   = dto_local.astimezone(timezone.utc)
     return dfrom_utc, dto_utc
 
+def local_date_bounds(from_yyyy_mm_dd: str | None, to_yyyy_mm_dd: str | None):
+    """Límites UTC por día local sin rellenar el extremo ausente:
+       (inicio del día from | None, inicio del día siguiente a to | None).
+       ValueError si alguna fecha no es YYYY-MM-DD."""
+    tz = _tz()
+
+    def _start(value: str) -> datetime:
+        day = datetime.strptime(value, "%Y-%m-%d")
+        return tz.localize(day).astimezone(timezone.utc)
+
+    dt_from = _start(from_yyyy_mm_dd) if from_yyyy_mm_dd else None
+    dt_to = _start(to_yyyy_mm_dd) + timedelta(days=1) if to_yyyy_mm_dd else None
+    return dt_from, dt_to
+
 @dataclass
 class ValidationResult:
     ok: bool
@@ -99,6 +102,11 @@ class EvaluationService:
     def _seed_from_template(ev_id: int, tpl: dict, preset: dict | None = None):
         """Crea/actualiza todas las respuestas a partir de la plantilla.
            'preset' permite enviar valores iniciales (p.ej. no_empleado)."""
+        EvaluationRepository.upsert_responses(ev_id, EvaluationService._seed_items(tpl, preset))
+
+    @staticmethod
+    def _seed_items(tpl: dict, preset: dict | None = None) -> List[dict]:
+        """Lista de respuestas iniciales (vacías o con 'preset') según la plantilla."""
         preset = preset or {}
         seed_items: List[dict] = []
 
@@ -130,7 +138,7 @@ class EvaluationService:
                 "is_required": bool(r.get("is_required", False))
             })
 
-        EvaluationRepository.upsert_responses(ev_id, seed_items)
+        return seed_items
 
     @staticmethod
     def create_by_no_empleado(no_empleado: str):
@@ -167,16 +175,62 @@ class EvaluationService:
         tpl = EvaluationService._load_template()
         return tpl.get("meta", {}).get("sign_roles", [])
 
+    @staticmethod
+    def sign_role_bits(tpl: dict | None = None) -> dict:
+        """{rol: bit} de Evaluation.signed_mask, en el orden de meta.sign_roles."""
+        tpl = tpl or EvaluationService._load_template()
+        return {role: 1 << i for i, role in enumerate(tpl.get("meta", {}).get("sign_roles", []))}
+
+    @staticmethod
+    def field_labels(tpl: dict) -> dict:
+        """{field_key: etiqueta legible} para mostrar faltantes en la UI."""
+        key2label = {g["key"]: g["label"] for g in tpl.get("general", [])}
+        for sec in ["S", "P", "Q", "VC"]:
+            for q in tpl.get(sec, []):
+                base = q["key"]
+                key2label[f"{base}_r1"] = f"{q['label']} (1ra rev.)"
+                key2label[f"{base}_r2"] = f"{q['label']} (2da rev.)"
+                key2label[f"{base}_r3"] = f"{q['label']} (3ra rev.)"
+                key2label[f"{base}_obs"] = f"{q['label']} (Observaciones)"
+        for r in tpl.get("resultado", []):
+            key2label[r["key"]] = r["label"]
+        return key2label
+
+    @staticmethod
+    def flush_autosave(evaluation_id: int):
+        """Escribe lo que el buffer de autosave tenga pendiente para esta evaluación."""
+        buf = get_autosave()
+        if buf:
+            buf.flush(evaluation_id)
+
     @staticmethod
     def save_responses(evaluation_id: int, responses: List[dict]):
+        # Primero lo pendiente del buffer para que no pise este guardado explícito
+        EvaluationService.flush_autosave(evaluation_id)
         return EvaluationRepository.upsert_responses(evaluation_id, responses)
 
+    @staticmethod
+    def autosave(evaluation_id: int, responses: List[dict]) -> bool:
+        """Guardado parcial. Con AUTOSAVE_BUFFER va al buffer write-behind (True);
+           sin él se escribe directo (False)."""
+        buf = get_autosave()
+        if buf:
+            if not EvaluationRepository.exists(evaluation_id):
+                raise ValueError("evaluation_id no existe")
+            buf.add(evaluation_id, responses)
+            return True
+        EvaluationRepository.upsert_responses(evaluation_id, responses)
+        return False
+
     @staticmethod
     def get_responses(evaluation_id: int) -> List[dict]:
-        return EvaluationRepository.get_responses(evaluation_id)
+        data = EvaluationRepository.get_responses(evaluation_id)
+        buf = get_autosave()
+        return buf.overlay(evaluation_id, data) if buf and data else data
 
     @staticmethod
-    def save_signature_base64(evaluation_id: int, role: str, signer_name: str, b64png: str):
+    def write_signature_png(b64png: str) -> str:
+        """Decodifica el PNG base64 (data URL o crudo) y lo guarda en instance/signatures."""
         sig_dir = EvaluationService._instance_dir("signatures")
         if "," in b64png:
             b64png = b64png.split(",", 1)[1]
@@ -185,12 +239,33 @@ class EvaluationService:
         path = sig_dir / fname
         with open(path, "wb") as f:
             f.write(raw)
-        return EvaluationRepository.add_signature(evaluation_id, role, signer_name, str(path))
+        return str(path)
+
+    @staticmethod
+    def save_signature_base64(evaluation_id: int, role: str, signer_name: str, b64png: str):
+        path = EvaluationService.write_signature_png(b64png)
+        EvaluationService.flush_autosave(evaluation_id)
+        role_bit = EvaluationService.sign_role_bits().get(role, 0)
+        return EvaluationRepository.add_signature(evaluation_id, role, signer_name, path, role_bit)
+
+    @staticmethod
+    def save_signature_strokes(evaluation_id: int, role: str, signer_name: str, strokes: dict):
+        """Firma vectorial: guarda los trazos (signature_strokes) en la fila, sin PNG en disco.
+           ValueError si los trazos no son válidos."""
+        encoded = encode_strokes(parse_strokes(strokes))
+        EvaluationService.flush_autosave(evaluation_id)
+        role_bit = EvaluationService.sign_role_bits().get(role, 0)
+        return EvaluationRepository.add_signature(evaluation_id, role, signer_name, "", role_bit, strokes=encoded)
 
     @staticmethod
     def validate(evaluation_id: int, required_sign_roles: List[str]) -> "ValidationResult":
         # EAGER load para evitar DetachedInstanceError
         ev = EvaluationRepository.get_with_children(evaluation_id)
+        return EvaluationService.validate_loaded(ev, required_sign_roles)
+
+    @staticmethod
+    def validate_loaded(ev, required_sign_roles: List[str]) -> "ValidationResult":
+        """Validación sobre una evaluación ya cargada (responses + signatures)."""
         if not ev:
             return ValidationResult(False, ["_not_found_"], required_sign_roles)
 
@@ -206,6 +281,7 @@ class EvaluationService:
 
     @staticmethod
     def try_complete(evaluation_id: int, required_sign_roles: List[str]) -> Tuple[bool, "ValidationResult"]:
+        EvaluationService.flush_autosave(evaluation_id)
         vr = EvaluationService.validate(evaluation_id, required_sign_roles)
         if vr.ok:
             EvaluationRepository.set_status(evaluation_id, EvalStatus.COMPLETADA)
@@ -215,191 +291,63 @@ class EvaluationService:
                 EvaluationRepository.set_status(evaluation_id, EvalStatus.PENDIENTE)
             return False, vr
 
-    # ---------- Exportación PDF (igual que tenías, con nombre de archivo por folio) ----------
+    # ---------- Borrado ----------
+    @staticmethod
+    def unreferenced_signature_paths(paths: List[str]) -> List[str]:
+        """PNG de firmas borradas que ya ninguna otra firma referencia (un archivo puede estar
+           compartido, p.ej. copias o datos cargados a mano). Llamar después del commit."""
+        paths = list(dict.fromkeys(p for p in paths if p))
+        referenced = EvaluationRepository.referenced_signature_paths(paths)
+        return [p for p in paths if p not in referenced]
+
+    @staticmethod
+    def _cleanup_files(deleted: DeletedFiles):
+        exports_dir = EvaluationService._instance_dir("exports")
+        FileCleanup.enqueue(EvaluationService.unreferenced_signature_paths(deleted.image_paths)
+                            + [str(exports_dir / f"{f}.pdf") for f in deleted.folios])
+
+    @staticmethod
+    def delete(evaluation_id: int) -> bool:
+        buf = get_autosave()
+        if buf:
+            buf.discard(evaluation_id)
+        deleted = EvaluationRepository.delete(evaluation_id)
+        if deleted is None:
+            return False
+        EvaluationService._cleanup_files(deleted)
+        return True
+
+    @staticmethod
+    def delete_bulk(status: EvalStatus | None, q_from: str = "", q_to: str = "", dry_run: bool = False) -> List[str]:
+        """Borra por estado y/o día local de creación (from/to inclusivos; el que falte queda abierto).
+           Devuelve los folios afectados."""
+        dt_from, dt_to = local_date_bounds(q_from, q_to)
+        deleted = EvaluationRepository.delete_where(status, dt_from, dt_to, dry_run=dry_run)
+        if not dry_run:
+            EvaluationService._cleanup_files(deleted)
+        return deleted.folios
+
+    # ---------- Exportación PDF (nombre de archivo por folio; render en pdf_renderers) ----------
     @staticmethod
     def export_pdf(evaluation_id: int) -> str:
         ev = EvaluationRepository.get_with_children(evaluation_id)
         if not ev:
             raise ValueError("Evaluación no encontrada")
+        return EvaluationService.render_pdf(ev)
+
+    @staticmethod
+    def render_pdf(ev, backend: str | None = None) -> str:
+        """Genera el PDF de una evaluación ya cargada (responses + signatures)
+           con el backend configurado en PDF_BACKEND (reportlab | weasyprint)."""
+        from .pdf_renderers import get_renderer
 
+        evaluation_id = ev.id
         tpl = EvaluationService._load_template()
         resp = {r.field_key: (r.value or "") for r in ev.responses}
 
         exports_dir = EvaluationService._instance_dir("exports")
         out_path = exports_dir / f"{ev.folio or f'evaluacion_{evaluation_id}'}.pdf"
 
-        doc = SimpleDocTemplate(
-            str(out_path),
-            pagesize=letter,
-            topMargin=12*mm, bottomMargin=12*mm, leftMargin=12*mm, rightMargin=12*mm,
-            title=f"Evaluación de Certificación {ev.folio}"
-        )
-
-        styles = getSampleStyleSheet()
-        H1 = ParagraphStyle("H1", parent=styles["Heading1"], fontName="Helvetica-Bold", fontSize=16, leading=18, spaceAfter=4*mm)
-        H2 = ParagraphStyle("H2", parent=styles["Heading2"], fontName="Helvetica-Bold", fontSize=11, leading=13, spaceBefore=2*mm, spaceAfter=1*mm)
-        P = ParagraphStyle("P", parent=styles["BodyText"], fontName="Helvetica", fontSize=9.5, leading=12)
-        PL = ParagraphStyle("PL", parent=P, alignment=TA_LEFT)
-        PR = ParagraphStyle("PR", parent=P, alignment=TA_RIGHT)
-        PC = ParagraphStyle("PC", parent=P, alignment=TA_CENTER)
-        PCsmall = ParagraphStyle("PCs", parent=P, alignment=TA_CENTER, fontSize=8.5, leading=10)
-
-        story = []
-
-        # Encabezado
-        logo_path = BASE_DIR / "static" / "logo.png"
-        if logo_path.exists():
-            img = Image(str(logo_path), width=35*mm, height=10*mm)
-            header_cells = [[img, Paragraph("Evaluación de Certificación", H1), Paragraph(f"Folio: <b>{ev.folio}</b>", PR)]]
-            col_w = [40*mm, None, 40*mm]
-        else:
-            header_cells = [[Paragraph("", P), Paragraph("Evaluación de Certificación", H1), Paragraph(f"Folio: <b>{ev.folio}</b>", PR)]]
-            col_w = [10*mm, None, 40*mm]
-
-        header = Table(header_cells, colWidths=col_w, hAlign="LEFT")
-        story += [header, Spacer(1, 2*mm),
-                  Table([[""]], colWidths=[None], rowHeights=[1],
-                        style=[("LINEABOVE", (0,0), (-1,-1), 0.8, colors.black)]) ,
-                  Spacer(1, 1*mm)]
-
-        # Datos generales (ajusta nombres a los de tu plantilla)
-        def cell(k, label):
-            return Paragraph(f"<b>{label}:</b> {resp.get(k,'')}", P)
-
-        left_rows = [
-            [cell("nombre","Nombre del operador")],
-            [cell("area","Área")],
-            [cell("operacion","Operación")],
-            [cell("no_operacion","No. Operación")],
-            [cell("maquina","Máquina")],
-            [cell("no_maquina","No. Máquina")],
-        ]
-        right_rows = [
-            [cell("no_empleado","No. empleado")],
-            [cell("fecha_ingreso","Fecha de ingreso")],
-            [cell("fecha_inicio_entrenamiento","Fecha de inicio de entrenamiento")],
-            [cell("fecha_revision","Fecha de revisión")],
-        ]
-        gen_tbl = Table([[Table(left_rows, hAlign="LEFT"), "", Table(right_rows, hAlign="LEFT")]], colWidths=[95*mm, 5*mm, None])
-        gen_tbl.setStyle(TableStyle([("VALIGN", (0,0), (-1,-1), "TOP")]))
-        story += [gen_tbl, Spacer(1, 3*mm)]
-
-        # Helper secciones
-        def section_table(code: str, title: str, highlight=False):
-            rows = [[
-                Paragraph("<b>#</b>", PCsmall),
-                Paragraph(f"<b>{title}</b>", PL),
-                Paragraph("<b>1ra<br/>rev.</b>", PCsmall),
-                Paragraph("<b>2da<br/>rev.</b>", PCsmall),
-                Paragraph("<b>3ra<br/>rev.</b>", PCsmall),
-                Paragraph("<b>Observaciones</b>", PCsmall),
-            ]]
-            for idx, q in enumerate(tpl.get(code, []), start=1):
-                base = q["key"]; label = q.get("label", base)
-                def yn(suf):
-                    v = (resp.get(f"{base}_{suf}", "") or "").strip().lower()
-                    return Paragraph("Sí", PC) if v=="si" else Paragraph("No", PC) if v=="no" else Paragraph("", PC)
-                obs = resp.get(f"{base}_obs", "")
-                rows.append([Paragraph(str(idx), PC), Paragraph(label, P), yn("r1"), yn("r2"), yn("r3"), Paragraph(obs, P)])
-            colw = [8*mm, None, 14*mm, 14*mm, 14*mm, 45*mm]
-            t = Table(rows, colWidths=colw, repeatRows=1, hAlign="LEFT")
-            style = [
-                ("GRID", (0,0), (-1,-1), 0.5, colors.black),
-                ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-                ("VALIGN", (0,0), (-1,-1), "TOP"),
-                ("ALIGN", (0,0), (0,-1), "CENTER"),
-                ("ALIGN", (2,1), (4,-1), "CENTER"),
-                ("LEFTPADDING", (1,1), (1,-1), 3),
-                ("RIGHTPADDING", (1,1), (1,-1), 3),
-            ]
-            t.setStyle(TableStyle(style))
-            return t
-
-        story += [section_table("S", "Conoce los pasos pero requiere supervisión. (en entrenamiento)"), Spacer(1,2*mm)]
-        story += [section_table("P", "Puede ejecutar el trabajo con seguridad y calidad pero no en tiempo ciclo."), Spacer(1,2*mm)]
-        story += [section_table("Q", "Puede ejecutar el trabajo con Seguridad, Calidad y en el Tiempo ciclo."), Spacer(1,2*mm)]
-        story += [section_table("VC", "Domina la operación y puede enseñar a otros."), Spacer(1,3*mm)]
-
-        # Resultado
-        result = (resp.get("resultado_global","") or "").strip()
-        result_opts = tpl.get("meta", {}).get("result_options", ["No aprueba","Re-entrenamiento","Re-ubicación","Aprobado"])
-        def box(label):
-            mark = "■" if label.lower()==result.lower() else "_"
-            return Paragraph(f"{mark} {label}", P)
-        res_tbl = Table([
-            [Paragraph("<b>Resultado</b>", H2)],
-            [box(result_opts[0])],
-            [box(result_opts[1])],
-            [box(result_opts[2])],
-            [box(result_opts[3])],
-            [Paragraph(f"<b>Comentarios:</b> {resp.get('comentarios','')}", P)]
-        ], colWidths=[None])
-        res_tbl.setStyle(TableStyle([
-            ("BOX",(0,0),(-1,-1),0.5,colors.black),
-            ("INNERGRID",(0,0),(-1,-1),0.25,colors.black),
-            ("BACKGROUND",(0,0),(-1,0),colors.whitesmoke)
-        ]))
-        story += [res_tbl, Spacer(1, 4*mm)]
-
-        # Firmas
-        label_map = {
-            "jefe_inmediato":"Jefe Inmediato",
-            "ing_calidad":"Ing. de Calidad",
-            "ing_manufactura":"Ing. de Manufactura",
-            "seguridad_industrial":"Seguridad Industrial",
-            "entrenamiento":"Entrenamiento",
-            "nombre_operador":"Operador"
-        }
-        role_order = ["jefe_inmediato","ing_calidad","ing_manufactura","seguridad_industrial","entrenamiento","nombre_operador"]
-        sig_by_role = {s.role: s for s in ev.signatures if s.role not in {}}
-
-        def signature_cell(role_key: str | None):
-            lbl = label_map.get(role_key, "") if role_key else ""
-            s = sig_by_role.get(role_key) if role_key else None
-            cell_w, cell_h = 65*mm, 26*mm
-
-            if s and s.image_path and os.path.exists(s.image_path):
-                img = Image(str(s.image_path))
-                img._restrictSize(cell_w-6, cell_h-10)
-                img.hAlign = "CENTER"
-                box = Table([[img]], colWidths=[cell_w], rowHeights=[cell_h])
-            else:
-                box = Table([[Paragraph("", P)]], colWidths=[cell_w], rowHeights=[cell_h])
-
-            box.setStyle(TableStyle([
-                ("BOX",(0,0),(-1,-1),0.5,colors.HexColor("#a0a0a0")),
-                ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
-                ("ALIGN",(0,0),(-1,-1),"CENTER"),
-                ("LEFTPADDING",(0,0),(-1,-1),3),
-                ("RIGHTPADDING",(0,0),(-1,-1),3),
-                ("TOPPADDING",(0,0),(-1,-1),3),
-                ("BOTTOMPADDING",(0,0),(-1,-1),3),
-            ]))
-
-            label = Paragraph(f"<font size=8>{lbl}{(' — ' + s.signer_name) if s and s.signer_name else ''}</font>", P)
-            cell = Table([[box],[label]], colWidths=[cell_w], rowHeights=[cell_h, 6*mm])
-            cell.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"TOP")]))
-            return cell
-
-        rows = []
-        buffer_row = []
-        for i, rk in enumerate(role_order, start=1):
-            buffer_row.append(signature_cell(rk))
-            if i % 3 == 0:
-                rows.append(buffer_row); buffer_row = []
-        if buffer_row:
-            while len(buffer_row) < 3:
-                buffer_row.append(signature_cell(None))
-            rows.append(buffer_row)
-
-        sig_tbl = Table(rows, colWidths=[65*mm,65*mm,65*mm], hAlign="LEFT",
-                        style=[("VALIGN",(0,0),(-1,-1),"TOP"), ("BOTTOMPADDING",(0,0),(-1,-1),2)])
-        story += [Paragraph("<b>Firmas</b>", H2), sig_tbl]
-
-        def on_page(canv, _doc):
-            canv.setFont("Helvetica", 8)
-            canv.drawRightString(_doc.pagesize[0]-12*mm, 10*mm, "HR-01-F08 R02")
-            canv.drawString(12*mm, 10*mm, "Generado por Evaluación SGE")
-
-        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+        renderer = get_renderer(backend or current_app.config.get("PDF_BACKEND", "reportlab"))
+        renderer.render(ev, tpl, resp, out_path)
         return str(out_path)
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+from typing import List, Tuple
+
+from ..models import EvalStatus
+from ..repositories import AsyncEvaluationRepository, AsyncEventRepository
+from .autosave_buffer import get_autosave
+from .evaluation_service import EvaluationService, ValidationResult, _tz
+from .event_feed import EventFeedService
+from .signature_strokes import parse_strokes, encode_strokes
+
+
+class AsyncEvaluationService:
+    """Flujo de captura de EvaluationService para la API async (app.asgi). La BD va por el engine
+       async; lo que bloquea (plantilla y PNG en disco, render del PDF, journal y flush del buffer
+       de autosave) corre en el executor con asyncio.to_thread, que conserva el app context."""
+
+    @staticmethod
+    async def _template() -> dict:
+        return await asyncio.to_thread(EvaluationService._load_template)
+
+    # ---------- Crear evaluación ----------
+    @staticmethod
+    async def create_by_no_empleado(no_empleado: str):
+        folio = f"EC-{datetime.now(_tz()).strftime('%Y%m%d')}-{no_empleado}"
+        ev = await AsyncEvaluationRepository.get_by_folio(folio)
+        if ev:
+            return ev
+        ev = await AsyncEvaluationRepository.new(folio)
+        tpl = await AsyncEvaluationService._template()
+        await AsyncEvaluationRepository.upsert_responses(
+            ev.id, EvaluationService._seed_items(tpl, {"no_empleado": no_empleado})
+        )
+        return ev
+
+    @staticmethod
+    async def create_evaluation(folio: str):
+        ev = await AsyncEvaluationRepository.get_by_folio(folio)
+        if ev:
+            return ev
+        ev = await AsyncEvaluationRepository.new(folio)
+        tpl = await AsyncEvaluationService._template()
+        await AsyncEvaluationRepository.upsert_responses(ev.id, EvaluationService._seed_items(tpl))
+        return ev
+
+    # ---------- Respuestas ----------
+    @staticmethod
+    async def flush_autosave(evaluation_id: int):
+        buf = get_autosave()
+        if buf:
+            await asyncio.to_thread(buf.flush, evaluation_id)
+
+    @staticmethod
+    async def save_responses(evaluation_id: int, responses: List[dict]):
+        await AsyncEvaluationService.flush_autosave(evaluation_id)
+        return await AsyncEvaluationRepository.upsert_responses(evaluation_id, responses)
+
+    @staticmethod
+    async def autosave(evaluation_id: int, responses: List[dict]) -> bool:
+        buf = get_autosave()
+        if buf:
+            if not await AsyncEvaluationRepository.exists(evaluation_id):
+                raise ValueError("evaluation_id no existe")
+            await asyncio.to_thread(buf.add, evaluation_id, responses)  # journal con fsync
+            return True
+        await AsyncEvaluationRepository.upsert_responses(evaluation_id, responses)
+        return False
+
+    @staticmethod
+    async def get_responses(evaluation_id: int) -> List[dict]:
+        data = await AsyncEvaluationRepository.get_responses(evaluation_id)
+        buf = get_autosave()
+        return buf.overlay(evaluation_id, data) if buf and data else data
+
+    @staticmethod
+    async def missing_labels(evaluation_id: int, required_sign_roles: List[str]) -> List[str]:
+        key2label = EvaluationService.field_labels(await AsyncEvaluationService._template())
+        vr = await AsyncEvaluationService.validate(evaluation_id, required_sign_roles)
+        return [key2label.get(k, k) for k in vr.missing_required]
+
+    # ---------- Firmas ----------
+    @staticmethod
+    async def save_signature_base64(evaluation_id: int, role: str, signer_name: str, b64png: str):
+        path = await asyncio.to_thread(EvaluationService.write_signature_png, b64png)
+        await AsyncEvaluationService.flush_autosave(evaluation_id)
+        role_bit = EvaluationService.sign_role_bits(await AsyncEvaluationService._template()).get(role, 0)
+        return await AsyncEvaluationRepository.add_signature(evaluation_id, role, signer_name, path, role_bit)
+
+    @staticmethod
+    async def save_signature_strokes(evaluation_id: int, role: str, signer_name: str, strokes: dict):
+        encoded = encode_strokes(parse_strokes(strokes))
+        await AsyncEvaluationService.flush_autosave(evaluation_id)
+        role_bit = EvaluationService.sign_role_bits(await AsyncEvaluationService._template()).get(role, 0)
+        return await AsyncEvaluationRepository.add_signature(
+            evaluation_id, role, signer_name, "", role_bit, strokes=encoded
+        )
+
+    # ---------- Completar / PDF ----------
+    @staticmethod
+    async def validate(evaluation_id: int, required_sign_roles: List[str]) -> ValidationResult:
+        ev = await AsyncEvaluationRepository.get_with_children(evaluation_id)
+        return EvaluationService.validate_loaded(ev, required_sign_roles)
+
+    @staticmethod
+    async def try_complete(evaluation_id: int, required_sign_roles: List[str]) -> Tuple[bool, ValidationResult]:
+        await AsyncEvaluationService.flush_autosave(evaluation_id)
+        ev = await AsyncEvaluationRepository.get_with_children(evaluation_id)
+        vr = EvaluationService.validate_loaded(ev, required_sign_roles)
+        if ev is not None:
+            await AsyncEvaluationRepository.set_status(
+                evaluation_id, EvalStatus.COMPLETADA if vr.ok else EvalStatus.PENDIENTE
+            )
+        return vr.ok, vr
+
+    @staticmethod
+    async def required_sign_roles() -> List[str]:
+        return (await AsyncEvaluationService._template()).get("meta", {}).get("sign_roles", [])
+
+    @staticmethod
+    async def export_pdf(ev) -> str:
+        """ev ya cargada con get_with_children; el render (CPU + disco) va en el executor."""
+        return await asyncio.to_thread(EvaluationService.render_pdf, ev)
+
+    # ---------- Panel admin ----------
+    @staticmethod
+    async def poll_events(after: int | None, limit: int = 200) -> dict:
+        feed = EventFeedService.start(after, *await AsyncEventRepository.bounds())
+        if feed is None:
+            return EventFeedService.page(after, await AsyncEventRepository.since(after, limit), limit)
+        return feed
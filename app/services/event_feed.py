@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timezone, timedelta
+from flask import current_app
+
+from ..repositories import EventRepository
+from .evaluation_service import to_local_iso
+
+
+class EventFeedService:
+    """Cambios del panel admin por short poll: GET /events?after=<id> responde al instante con los
+       eventos por rango de PK (funciona entre workers de gunicorn) y el navegador vuelve a preguntar
+       cada EVENTS_POLL_SECONDS. Ninguna petición se queda esperando cambios con el thread tomado."""
+
+    @staticmethod
+    def prune():
+        hours = current_app.config.get("EVENTS_RETENTION_HOURS", 24)
+        EventRepository.prune(datetime.now(timezone.utc) - timedelta(hours=hours))
+
+    @staticmethod
+    def _format(row) -> dict:
+        event_id, evaluation_id, type_, payload = row
+        data = json.loads(payload or "{}")
+        data["id"] = evaluation_id
+        if data.get("created_at"):
+            created = datetime.fromisoformat(data["created_at"])
+            data["created_local"] = to_local_iso(created)
+        return {"event_id": event_id, "type": type_, "data": data}
+
+    @staticmethod
+    def poll(after: int | None, limit: int = 200) -> dict:
+        """{"last_id", "events", "reset", "more", "poll_ms"}. Sin after: solo el cursor actual
+           (la lista ya se pidió completa). reset = no se puede reanudar desde after."""
+        feed = EventFeedService.start(after, *EventRepository.bounds())
+        if feed is None:
+            return EventFeedService.page(after, EventRepository.since(after, limit), limit)
+        return feed
+
+    @staticmethod
+    def start(after: int | None, first_id: int, last_id: int) -> dict | None:
+        """Respuesta que no necesita leer eventos (cursor al día o reset); None = leer desde after."""
+        feed = {
+            "last_id": last_id, "events": [], "reset": False, "more": False,
+            "poll_ms": int(current_app.config.get("EVENTS_POLL_SECONDS", 3) * 1000),
+        }
+        if after is None or after == last_id:
+            return feed
+        if after > last_id or (first_id and after < first_id - 1):
+            # BD reiniciada o eventos ya depurados (EVENTS_RETENTION_HOURS): pedir las listas de nuevo
+            feed["reset"] = True
+            return feed
+        return None
+
+    @staticmethod
+    def page(after: int, rows: list, limit: int) -> dict:
+        return {
+            "last_id": rows[-1][0] if rows else after,
+            "events": [EventFeedService._format(row) for row in rows],
+            "reset": False, "more": len(rows) == limit,
+            "poll_ms": int(current_app.config.get("EVENTS_POLL_SECONDS", 3) * 1000),
+        }
@@ -0,0 +1,52 @@
+import os
+import queue
+import atexit
+import threading
+from typing import Iterable
+
+
+class FileCleanup:
+    """Borra en segundo plano archivos huérfanos (PNG de firmas, PDFs exportados)
+       para que los DELETE no esperen al disco."""
+
+    _q: "queue.Queue[str]" = queue.Queue()
+    _thread: threading.Thread | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _ensure_worker(cls):
+        with cls._lock:
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._run, name="file-cleanup", daemon=True)
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            path = cls._q.get()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                import traceback; traceback.print_exc()
+            finally:
+                cls._q.task_done()
+
+    @classmethod
+    def enqueue(cls, paths: Iterable[str]):
+        paths = [p for p in paths if p]
+        if not paths:
+            return
+        cls._ensure_worker()
+        for p in paths:
+            cls._q.put(p)
+
+    @classmethod
+    def drain(cls):
+        """Espera a que la cola quede vacía (CLI / apagado)."""
+        if cls._thread is not None:
+            cls._q.join()
+
+
+atexit.register(FileCleanup.drain)
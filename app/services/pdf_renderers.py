@@ -0,0 +1,294 @@
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from flask import render_template
+
+# ReportLab (canvas + Platypus)
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
+from reportlab.lib import colors
+from reportlab.platypus import (
+    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, Flowable
+)
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+
+from .signature_strokes import decode_strokes, strokes_bbox, strokes_svg
+
+BASE_DIR = Path(__file__).resolve().parent.parent  # .../app
+
+SIGN_LABELS = {
+    "jefe_inmediato": "Jefe Inmediato",
+    "ing_calidad": "Ing. de Calidad",
+    "ing_manufactura": "Ing. de Manufactura",
+    "seguridad_industrial": "Seguridad Industrial",
+    "entrenamiento": "Entrenamiento",
+    "nombre_operador": "Operador",
+}
+SIGN_ORDER = ["jefe_inmediato", "ing_calidad", "ing_manufactura", "seguridad_industrial", "entrenamiento", "nombre_operador"]
+
+SECTIONS = [
+    ("S", "Conoce los pasos pero requiere supervisión. (en entrenamiento)"),
+    ("P", "Puede ejecutar el trabajo con seguridad y calidad pero no en tiempo ciclo."),
+    ("Q", "Puede ejecutar el trabajo con Seguridad, Calidad y en el Tiempo ciclo."),
+    ("VC", "Domina la operación y puede enseñar a otros."),
+]
+
+
+class StrokesSignature(Flowable):
+    """Firma vectorial: los trazos como un solo path, escalados sin deformar a max_w × max_h.
+       Sin decodificar imágenes; el PDF solo lleva las coordenadas."""
+
+    def __init__(self, data: dict, max_w: float, max_h: float):
+        super().__init__()
+        self.strokes = data["strokes"]
+        self.x0, self.y0, bw, bh = strokes_bbox(self.strokes)
+        self.scale = min(max_w / bw, max_h / bh)
+        self.width, self.height = bw * self.scale, bh * self.scale
+        self.hAlign = "CENTER"
+
+    def wrap(self, _aw, _ah):
+        return self.width, self.height
+
+    def draw(self):
+        c = self.canv
+        sc, x0, y0, h = self.scale, self.x0, self.y0, self.height
+        # El canvas del navegador dibuja con 2 px; a escala, acotado para que no quede ni pelo ni brocha
+        c.setLineWidth(max(0.6, min(1.5, 2 * sc)))
+        c.setLineCap(1)
+        c.setLineJoin(1)
+        c.setStrokeColor(colors.black)
+        path = c.beginPath()
+        for st in self.strokes:
+            (x, y), rest = st[0], st[1:] or st[:1]
+            path.moveTo((x - x0) * sc, h - (y - y0) * sc)  # y del canvas crece hacia abajo
+            for px, py in rest:
+                path.lineTo((px - x0) * sc, h - (py - y0) * sc)
+        c.drawPath(path, stroke=1, fill=0)
+
+
+class PdfRenderer(ABC):
+    """Interfaz de backend PDF: escribe en out_path el PDF de una evaluación cargada.
+       ev: Evaluation (o equivalente) con .folio, .responses y .signatures."""
+    name = ""
+
+    @abstractmethod
+    def render(self, ev, tpl: dict, resp: dict, out_path: Path) -> None:
+        ...
+
+
+class ReportLabRenderer(PdfRenderer):
+    """Tablas Platypus construidas a mano (backend histórico)."""
+    name = "reportlab"
+
+    def render(self, ev, tpl: dict, resp: dict, out_path: Path) -> None:
+        doc = SimpleDocTemplate(
+            str(out_path),
+            pagesize=letter,
+            topMargin=12*mm, bottomMargin=12*mm, leftMargin=12*mm, rightMargin=12*mm,
+            title=f"Evaluación de Certificación {ev.folio}"
+        )
+
+        styles = getSampleStyleSheet()
+        H1 = ParagraphStyle("H1", parent=styles["Heading1"], fontName="Helvetica-Bold", fontSize=16, leading=18, spaceAfter=4*mm)
+        H2 = ParagraphStyle("H2", parent=styles["Heading2"], fontName="Helvetica-Bold", fontSize=11, leading=13, spaceBefore=2*mm, spaceAfter=1*mm)
+        P = ParagraphStyle("P", parent=styles["BodyText"], fontName="Helvetica", fontSize=9.5, leading=12)
+        PL = ParagraphStyle("PL", parent=P, alignment=TA_LEFT)
+        PR = ParagraphStyle("PR", parent=P, alignment=TA_RIGHT)
+        PC = ParagraphStyle("PC", parent=P, alignment=TA_CENTER)
+        PCsmall = ParagraphStyle("PCs", parent=P, alignment=TA_CENTER, fontSize=8.5, leading=10)
+
+        story = []
+
+        # Encabezado
+        logo_path = BASE_DIR / "static" / "logo.png"
+        if logo_path.exists():
+            img = Image(str(logo_path), width=35*mm, height=10*mm)
+            header_cells = [[img, Paragraph("Evaluación de Certificación", H1), Paragraph(f"Folio: <b>{ev.folio}</b>", PR)]]
+            col_w = [40*mm, None, 40*mm]
+        else:
+            header_cells = [[Paragraph("", P), Paragraph("Evaluación de Certificación", H1), Paragraph(f"Folio: <b>{ev.folio}</b>", PR)]]
+            col_w = [10*mm, None, 40*mm]
+
+        header = Table(header_cells, colWidths=col_w, hAlign="LEFT")
+        story += [header, Spacer(1, 2*mm),
+                  Table([[""]], colWidths=[None], rowHeights=[1],
+                        style=[("LINEABOVE", (0,0), (-1,-1), 0.8, colors.black)]) ,
+                  Spacer(1, 1*mm)]
+
+        # Datos generales (ajusta nombres a los de tu plantilla)
+        def cell(k, label):
+            return Paragraph(f"<b>{label}:</b> {resp.get(k,'')}", P)
+
+        left_rows = [
+            [cell("nombre","Nombre del operador")],
+            [cell("area","Área")],
+            [cell("operacion","Operación")],
+            [cell("no_operacion","No. Operación")],
+            [cell("maquina","Máquina")],
+            [cell("no_maquina","No. Máquina")],
+        ]
+        right_rows = [
+            [cell("no_empleado","No. empleado")],
+            [cell("fecha_ingreso","Fecha de ingreso")],
+            [cell("fecha_inicio_entrenamiento","Fecha de inicio de entrenamiento")],
+            [cell("fecha_revision","Fecha de revisión")],
+        ]
+        gen_tbl = Table([[Table(left_rows, hAlign="LEFT"), "", Table(right_rows, hAlign="LEFT")]], colWidths=[95*mm, 5*mm, None])
+        gen_tbl.setStyle(TableStyle([("VALIGN", (0,0), (-1,-1), "TOP")]))
+        story += [gen_tbl, Spacer(1, 3*mm)]
+
+        # Helper secciones
+        def section_table(code: str, title: str, highlight=False):
+            rows = [[
+                Paragraph("<b>#</b>", PCsmall),
+                Paragraph(f"<b>{title}</b>", PL),
+                Paragraph("<b>1ra<br/>rev.</b>", PCsmall),
+                Paragraph("<b>2da<br/>rev.</b>", PCsmall),
+                Paragraph("<b>3ra<br/>rev.</b>", PCsmall),
+                Paragraph("<b>Observaciones</b>", PCsmall),
+            ]]
+            for idx, q in enumerate(tpl.get(code, []), start=1):
+                base = q["key"]; label = q.get("label", base)
+                def yn(suf):
+                    v = (resp.get(f"{base}_{suf}", "") or "").strip().lower()
+                    return Paragraph("Sí", PC) if v=="si" else Paragraph("No", PC) if v=="no" else Paragraph("", PC)
+                obs = resp.get(f"{base}_obs", "")
+                rows.append([Paragraph(str(idx), PC), Paragraph(label, P), yn("r1"), yn("r2"), yn("r3"), Paragraph(obs, P)])
+            colw = [8*mm, None, 14*mm, 14*mm, 14*mm, 45*mm]
+            t = Table(rows, colWidths=colw, repeatRows=1, hAlign="LEFT")
+            style = [
+                ("GRID", (0,0), (-1,-1), 0.5, colors.black),
+                ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
+                ("VALIGN", (0,0), (-1,-1), "TOP"),
+                ("ALIGN", (0,0), (0,-1), "CENTER"),
+                ("ALIGN", (2,1), (4,-1), "CENTER"),
+                ("LEFTPADDING", (1,1), (1,-1), 3),
+                ("RIGHTPADDING", (1,1), (1,-1), 3),
+            ]
+            t.setStyle(TableStyle(style))
+            return t
+
+        for i, (code, title) in enumerate(SECTIONS):
+            story += [section_table(code, title), Spacer(1, (3 if i == len(SECTIONS) - 1 else 2)*mm)]
+
+        # Resultado
+        result = (resp.get("resultado_global","") or "").strip()
+        result_opts = tpl.get("meta", {}).get("result_options", ["No aprueba","Re-entrenamiento","Re-ubicación","Aprobado"])
+        def box(label):
+            mark = "■" if label.lower()==result.lower() else "_"
+            return Paragraph(f"{mark} {label}", P)
+        res_tbl = Table([
+            [Paragraph("<b>Resultado</b>", H2)],
+            [box(result_opts[0])],
+            [box(result_opts[1])],
+            [box(result_opts[2])],
+            [box(result_opts[3])],
+            [Paragraph(f"<b>Comentarios:</b> {resp.get('comentarios','')}", P)]
+        ], colWidths=[None])
+        res_tbl.setStyle(TableStyle([
+            ("BOX",(0,0),(-1,-1),0.5,colors.black),
+            ("INNERGRID",(0,0),(-1,-1),0.25,colors.black),
+            ("BACKGROUND",(0,0),(-1,0),colors.whitesmoke)
+        ]))
+        story += [res_tbl, Spacer(1, 4*mm)]
+
+        # Firmas
+        sig_by_role = {s.role: s for s in ev.signatures if s.role not in {}}
+
+        def signature_cell(role_key: str | None):
+            lbl = SIGN_LABELS.get(role_key, "") if role_key else ""
+            s = sig_by_role.get(role_key) if role_key else None
+            cell_w, cell_h = 65*mm, 26*mm
+
+            strokes = decode_strokes(s.strokes) if s else None
+            if strokes:
+                box = Table([[StrokesSignature(strokes, cell_w-12, cell_h-10)]], colWidths=[cell_w], rowHeights=[cell_h])
+            elif s and s.image_path and os.path.exists(s.image_path):
+                img = Image(str(s.image_path))
+                img._restrictSize(cell_w-6, cell_h-10)
+                img.hAlign = "CENTER"
+                box = Table([[img]], colWidths=[cell_w], rowHeights=[cell_h])
+            else:
+                box = Table([[Paragraph("", P)]], colWidths=[cell_w], rowHeights=[cell_h])
+
+            box.setStyle(TableStyle([
+                ("BOX",(0,0),(-1,-1),0.5,colors.HexColor("#a0a0a0")),
+                ("VALIGN",(0,0),(-1,-1),"MIDDLE"),
+                ("ALIGN",(0,0),(-1,-1),"CENTER"),
+                ("LEFTPADDING",(0,0),(-1,-1),3),
+                ("RIGHTPADDING",(0,0),(-1,-1),3),
+                ("TOPPADDING",(0,0),(-1,-1),3),
+                ("BOTTOMPADDING",(0,0),(-1,-1),3),
+            ]))
+
+            label = Paragraph(f"<font size=8>{lbl}{(' — ' + s.signer_name) if s and s.signer_name else ''}</font>", P)
+            cell = Table([[box],[label]], colWidths=[cell_w], rowHeights=[cell_h, 6*mm])
+            cell.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"TOP")]))
+            return cell
+
+        rows = []
+        buffer_row = []
+        for i, rk in enumerate(SIGN_ORDER, start=1):
+            buffer_row.append(signature_cell(rk))
+            if i % 3 == 0:
+                rows.append(buffer_row); buffer_row = []
+        if buffer_row:
+            while len(buffer_row) < 3:
+                buffer_row.append(signature_cell(None))
+            rows.append(buffer_row)
+
+        sig_tbl = Table(rows, colWidths=[65*mm,65*mm,65*mm], hAlign="LEFT",
+                        style=[("VALIGN",(0,0),(-1,-1),"TOP"), ("BOTTOMPADDING",(0,0),(-1,-1),2)])
+        story += [Paragraph("<b>Firmas</b>", H2), sig_tbl]
+
+        def on_page(canv, _doc):
+            canv.setFont("Helvetica", 8)
+            canv.drawRightString(_doc.pagesize[0]-12*mm, 10*mm, "HR-01-F08 R02")
+            canv.drawString(12*mm, 10*mm, "Generado por Evaluación SGE")
+
+        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+
+
+class WeasyPrintRenderer(PdfRenderer):
+    """HTML/CSS (templates/pdf_evaluacion.html) → PDF con WeasyPrint."""
+    name = "weasyprint"
+
+    def render(self, ev, tpl: dict, resp: dict, out_path: Path) -> None:
+        # Import diferido: WeasyPrint arrastra pango/cairo y solo se carga si se usa
+        from weasyprint import HTML
+        from .evaluation_service import to_local
+
+        signs = {s.role: s for s in ev.signatures}
+        html = render_template(
+            "pdf_evaluacion.html",
+            ev=ev,
+            tpl=tpl,
+            resp=resp,
+            sections=[(code, title, tpl.get(code, [])) for code, title in SECTIONS],
+            result_options=tpl.get("meta", {}).get("result_options", []),
+            signs=[
+                {
+                    "label": SIGN_LABELS.get(role, role),
+                    "signer_name": signs[role].signer_name if role in signs else "",
+                    "image_uri": Path(signs[role].image_path).as_uri()
+                        if role in signs and signs[role].image_path and os.path.exists(signs[role].image_path) else "",
+                    "svg": strokes_svg(decode_strokes(signs[role].strokes))
+                        if role in signs and signs[role].strokes else "",
+                }
+                for role in SIGN_ORDER
+            ],
+            logo_uri=(BASE_DIR / "static" / "logo.png").as_uri(),
+            now_local=to_local(ev.updated_at).strftime("%Y-%m-%d %H:%M") if getattr(ev, "updated_at", None) else "",
+        )
+        HTML(string=html, base_url=str(BASE_DIR)).write_pdf(str(out_path))
+
+
+RENDERERS = {r.name: r for r in (ReportLabRenderer(), WeasyPrintRenderer())}
+
+
+def get_renderer(name: str) -> PdfRenderer:
+    try:
+        return RENDERERS[(name or "reportlab").lower()]
+    except KeyError:
+        raise ValueError(f"PDF_BACKEND desconocido: {name} (opciones: {', '.join(RENDERERS)})")
@@ -0,0 +1,96 @@
+import json
+import math
+from typing import List, Optional, Tuple
+
+# Una firma real trae ~5-20 trazos y unos cientos de puntos tras simplificar (RDP en signature.js)
+MAX_STROKES = 200
+MAX_POINTS = 10000
+MAX_SIDE = 5000
+_INVALID = "strokes inválido: se espera {w, h, strokes: [[x0, y0, x1, y1, ...], ...]}"
+
+
+def _coord(value, limit: int) -> int:
+    """Coordenada entera dentro de [0, limit]; NaN / Infinity (JSON los acepta) no son coordenadas."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(_INVALID)
+    if not math.isfinite(v):
+        raise ValueError("strokes inválido: coordenada no finita")
+    return min(limit, max(0, int(round(v))))
+
+
+def parse_strokes(data) -> dict:
+    """Valida lo que manda el cliente: {w, h, strokes: [[x0, y0, x1, y1, ...], ...]} en px
+       del canvas. Devuelve lo mismo con enteros dentro del canvas; ValueError si no tiene forma de firma."""
+    try:
+        w, h = int(data["w"]), int(data["h"])
+        raw = data["strokes"]
+        if not isinstance(raw, list) or not all(isinstance(st, list) for st in raw):
+            raise TypeError
+    except (KeyError, TypeError, ValueError, OverflowError):
+        raise ValueError(_INVALID)
+    if not (0 < w <= MAX_SIDE and 0 < h <= MAX_SIDE):
+        raise ValueError("strokes inválido: tamaño de canvas fuera de rango")
+    # Antes de convertir: no recorrer payloads enormes
+    if len(raw) > MAX_STROKES or sum(len(st) for st in raw) > 2 * MAX_POINTS:
+        raise ValueError("firma demasiado grande")
+    if any(len(st) % 2 for st in raw):
+        raise ValueError("strokes inválido: cada trazo es una lista plana de pares x, y")
+    # x en [0, w], y en [0, h]: lo que salga del canvas se pega al borde
+    strokes = [[_coord(v, h if i % 2 else w) for i, v in enumerate(st)] for st in raw if st]
+    if not strokes:
+        raise ValueError("firma vacía")
+    return {"w": w, "h": h, "strokes": strokes}
+
+
+def encode_strokes(data: dict) -> str:
+    """Texto compacto para Signature.strokes: cada trazo guarda el primer punto y luego deltas
+       (números de 1-2 dígitos), JSON sin espacios. ~1-3 KB por firma."""
+    deltas = []
+    for st in data["strokes"]:
+        d = st[:2]
+        for i in range(2, len(st), 2):
+            d += [st[i] - st[i - 2], st[i + 1] - st[i - 1]]
+        deltas.append(d)
+    return json.dumps({"w": data["w"], "h": data["h"], "d": deltas}, separators=(",", ":"))
+
+
+def decode_strokes(text: Optional[str]) -> Optional[dict]:
+    """Inverso de encode_strokes → {w, h, strokes: [[(x, y), ...], ...]} en coordenadas absolutas."""
+    if not text:
+        return None
+    raw = json.loads(text)
+    strokes = []
+    for d in raw["d"]:
+        x, y = d[0], d[1]
+        pts = [(x, y)]
+        for i in range(2, len(d), 2):
+            x += d[i]
+            y += d[i + 1]
+            pts.append((x, y))
+        strokes.append(pts)
+    return {"w": raw["w"], "h": raw["h"], "strokes": strokes}
+
+
+def strokes_bbox(strokes: List[List[Tuple[int, int]]], pad: int = 2) -> Tuple[int, int, int, int]:
+    """(x, y, ancho, alto) del área con tinta; el render recorta a esto y no al canvas completo."""
+    xs = [x for st in strokes for x, _ in st]
+    ys = [y for st in strokes for _, y in st]
+    x0, y0 = min(xs) - pad, min(ys) - pad
+    return x0, y0, max(xs) + pad - x0, max(ys) + pad - y0
+
+
+def strokes_svg(data: dict, width: str = "60mm", height: str = "22mm", stroke_width: float = 2.0) -> str:
+    """SVG inline (WeasyPrint): un solo <path> escalado sin deformar dentro de width × height."""
+    x0, y0, bw, bh = strokes_bbox(data["strokes"])
+    d = []
+    for st in data["strokes"]:
+        (x, y), rest = st[0], st[1:] or st[:1]  # un punto suelto se dibuja como punto
+        d.append(f"M{x} {y}" + "".join(f"L{px} {py}" for px, py in rest))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="{x0} {y0} {bw} {bh}" preserveAspectRatio="xMidYMid meet">'
+        f'<path d="{"".join(d)}" fill="none" stroke="#000" stroke-width="{stroke_width}" '
+        f'stroke-linecap="round" stroke-linejoin="round"/></svg>'
+    )
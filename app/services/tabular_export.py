@@ -0,0 +1,105 @@
+import io
+import csv
+import json
+from datetime import datetime
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+from ..models import EvalStatus
+from ..repositories import EvaluationRepository, ArchiveRepository
+from .evaluation_service import EvaluationService, local_day_window, to_local_iso
+from .archive_service import ArchiveService
+
+META_COLUMNS = ["id", "folio", "status", "created_local", "updated_local"]
+
+
+class TabularExportService:
+    """Export tabular (CSV / JSON Lines): pivota las filas EAV de evaluation_responses
+       a una fila ancha por evaluación, columnas en el orden de la plantilla.
+       Todo es generador: memoria constante sin importar cuántas evaluaciones haya."""
+
+    @staticmethod
+    def columns(tpl: dict) -> List[str]:
+        cols = [g["key"] for g in tpl.get("general", [])]
+        for sec in ["S", "P", "Q", "VC"]:
+            for q in tpl.get(sec, []):
+                base = q["key"]
+                cols += [f"{base}_r1", f"{base}_r2", f"{base}_r3", f"{base}_obs"]
+        cols += [r["key"] for r in tpl.get("resultado", [])]
+        return META_COLUMNS + cols
+
+    @staticmethod
+    def day_window(q_from: str = "", q_to: str = "") -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Filtro por día local; ValueError si una fecha no es YYYY-MM-DD. Se resuelve antes de
+           empezar a responder: dentro del generador el error saldría como un 200 truncado."""
+        if not (q_from or q_to):
+            return None, None
+        try:
+            return local_day_window(q_from, q_to)
+        except ValueError:
+            raise ValueError(f"fecha inválida (YYYY-MM-DD): from={q_from!r} to={q_to!r}")
+
+    @staticmethod
+    def iter_records(status: Optional[EvalStatus] = EvalStatus.COMPLETADA, dt_from: Optional[datetime] = None,
+                     dt_to: Optional[datetime] = None, area: str = "", include_archived: bool = True) -> Iterator[dict]:
+        rows = EvaluationRepository.iter_response_rows(status, dt_from, dt_to, area)
+        for eid, group in groupby(rows, key=lambda r: r[0]):
+            rec = None
+            for _, folio, st, created_at, updated_at, key, value in group:
+                if rec is None:
+                    rec = {
+                        "id": eid, "folio": folio, "status": st.value,
+                        "created_local": to_local_iso(created_at), "updated_local": to_local_iso(updated_at),
+                    }
+                rec[key] = value or ""
+            yield rec
+
+        # Las archivadas son siempre COMPLETADAS
+        if include_archived and status in (None, EvalStatus.COMPLETADA):
+            for eid, payload in ArchiveRepository.iter_payloads(dt_from, dt_to):
+                snap = ArchiveService._unpack(payload)
+                rec = {
+                    "id": eid, "folio": snap["folio"], "status": snap["status"],
+                    "created_local": to_local_iso(datetime.fromisoformat(snap["created_at"])),
+                    "updated_local": to_local_iso(datetime.fromisoformat(snap["updated_at"])),
+                }
+                rec.update({k: v for k, v, _req in snap["responses"]})
+                if area and rec.get("area", "") != area:
+                    continue
+                yield rec
+
+    @staticmethod
+    def iter_csv(records: Iterator[dict], columns: List[str]) -> Iterator[str]:
+        buf = io.StringIO()
+        w = csv.writer(buf)
+
+        def flush() -> str:
+            out = buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            return out
+
+        # BOM para que Excel detecte UTF-8 (acentos)
+        w.writerow(columns)
+        yield "\ufeff" + flush()
+        for rec in records:
+            w.writerow([rec.get(c, "") for c in columns])
+            yield flush()
+
+    @staticmethod
+    def iter_jsonl(records: Iterator[dict], columns: List[str]) -> Iterator[str]:
+        for rec in records:
+            yield json.dumps({c: rec.get(c, "") for c in columns}, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def stream(fmt: str, status: Optional[EvalStatus] = EvalStatus.COMPLETADA, q_from: str = "", q_to: str = "",
+               area: str = "", include_archived: bool = True) -> Iterator[str]:
+        """Valida todo (ValueError → 400) y devuelve el generador; nada se valida ya enviando."""
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"formato no soportado: {fmt}")
+        dt_from, dt_to = TabularExportService.day_window(q_from, q_to)
+        columns = TabularExportService.columns(EvaluationService._load_template())
+        records = TabularExportService.iter_records(status, dt_from, dt_to, area, include_archived)
+        if fmt == "csv":
+            return TabularExportService.iter_csv(records, columns)
+        return TabularExportService.iter_jsonl(records, columns)
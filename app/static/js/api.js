@@ -21,15 +21,25 @@ const API = {
     });
     return safeJson(res);
   },
+  // Guardado parcial (campos que cambiaron); con AUTOSAVE_BUFFER el server lo agrupa
+  async autosave(id, responses) {
+    const res = await fetch(`/api/evaluaciones/${id}/autosave`, {
+      method: "POST",
+      headers: {"Content-Type":"application/json"},
+      body: JSON.stringify({ responses })
+    });
+    return safeJson(res);
+  },
   async getResponses(id) {
     const res = await fetch(`/api/evaluaciones/${id}/responses`);
     return safeJson(res);
   },
-  async sign(id, role, signer_name, image_base64) {
+  // firma: { strokes } (vectorial, SIG.toStrokes) o { image_base64 } (PNG)
+  async sign(id, role, signer_name, firma) {
     const res = await fetch(`/api/evaluaciones/${id}/sign`, {
       method: "POST",
       headers: {"Content-Type":"application/json"},
-      body: JSON.stringify({ role, signer_name, image_base64 })
+      body: JSON.stringify({ role, signer_name, ...firma })
     });
     return safeJson(res);
   },
@@ -41,6 +51,12 @@ const API = {
     const res = await fetch(`/api/evaluaciones/${id}`, { method: "DELETE" });
     return safeJson(res);
   },
+  // Panel admin en vivo: eventos posteriores a after (null = solo el cursor actual)
+  async events(after) {
+    const qs = after == null ? "" : `?after=${after}`;
+    const res = await fetch(`/api/evaluaciones/events${qs}`, { cache: "no-store" });
+    return safeJson(res);
+  },
   async listPendientes(params = {}) {
     const qs = new URLSearchParams(params).toString();
     const res = await fetch(`/api/evaluaciones/pendientes${qs ? `?${qs}` : ""}`);
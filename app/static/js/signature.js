@@ -1,5 +1,6 @@
 // Firma simple sin dependencias.
-// Exponer un objeto global SIG con open/clear/toDataURL/close.
+// Exponer un objeto global SIG con open/clear/toDataURL/toStrokes/close.
+// Además del dibujo se guardan los trazos (puntos en px CSS) para mandarlos como firma vectorial.
 
 (function(){
   const SIG = {};
@@ -7,6 +8,11 @@
   let drawing = false;
   let last = null;
   let listenersBound = false;
+  let strokes = [];   // [[{x,y}, ...], ...]
+  let current = null;
+
+  // Tolerancia de simplificación (px CSS): bajo esto el trazo se ve igual
+  const RDP_EPSILON = 0.8;
 
   function sizeCanvas(){
     if (!canvas) return;
@@ -18,6 +24,43 @@
     ctx.lineWidth = 2;
     ctx.lineCap = "round";
     ctx.strokeStyle = "#000";
+    redraw(); // cambiar el tamaño borra el canvas; los trazos se conservan
+  }
+
+  function redraw(){
+    strokes.forEach(st=>{
+      ctx.beginPath();
+      ctx.moveTo(st[0].x, st[0].y);
+      st.forEach(p=> ctx.lineTo(p.x, p.y));
+      ctx.stroke();
+    });
+  }
+
+  // Ramer–Douglas–Peucker: quita puntos a menos de eps de la recta entre los que se conservan
+  function rdp(points, eps){
+    if (points.length < 3) return points.slice();
+    const keep = new Uint8Array(points.length);
+    keep[0] = keep[points.length - 1] = 1;
+    const stack = [[0, points.length - 1]];
+    while (stack.length){
+      const [a, b] = stack.pop();
+      const pa = points[a], pb = points[b];
+      const dx = pb.x - pa.x, dy = pb.y - pa.y;
+      const len = Math.hypot(dx, dy) || 1;
+      let maxD = 0, idx = -1;
+      for (let i = a + 1; i < b; i++){
+        const p = points[i];
+        const d = (dx || dy)
+          ? Math.abs(dy * (p.x - pa.x) - dx * (p.y - pa.y)) / len
+          : Math.hypot(p.x - pa.x, p.y - pa.y);
+        if (d > maxD){ maxD = d; idx = i; }
+      }
+      if (maxD > eps){
+        keep[idx] = 1;
+        stack.push([a, idx], [idx, b]);
+      }
+    }
+    return points.filter((_, i)=> keep[i]);
   }
 
   function getPos(e){
@@ -35,6 +78,8 @@
     e.preventDefault();
     drawing = true;
     last = getPos(e);
+    current = [last];
+    strokes.push(current);
   }
   function onMove(e){
     if (!drawing) return;
@@ -44,10 +89,12 @@
     ctx.lineTo(p.x, p.y);
     ctx.stroke();
     last = p;
+    current.push(p);
   }
   function onUp(e){
     drawing = false;
     last = null;
+    current = null;
   }
 
   function bind(){
@@ -75,6 +122,7 @@
     canvas = document.getElementById("sig-canvas");
     if (!canvas) return;
     ctx = canvas.getContext("2d");
+    strokes = [];
     sizeCanvas();
     ctx.fillStyle = "transparent";
     ctx.clearRect(0,0,canvas.width, canvas.height);
@@ -85,6 +133,19 @@
   SIG.clear = function(){
     if (!ctx || !canvas) return;
     ctx.clearRect(0,0,canvas.width, canvas.height);
+    strokes = [];
+  };
+
+  // Firma vectorial para /sign: {w, h, strokes: [[x0, y0, x1, y1, ...], ...]} simplificada
+  // con RDP y en enteros (unos KB contra decenas de KB del PNG). null si no hay trazos.
+  SIG.toStrokes = function(){
+    if (!canvas || !strokes.length) return null;
+    const rect = canvas.getBoundingClientRect();
+    return {
+      w: Math.round(rect.width),
+      h: Math.round(rect.height),
+      strokes: strokes.map(st=> rdp(st, RDP_EPSILON).flatMap(p=> [Math.round(p.x), Math.round(p.y)])),
+    };
   };
 
   SIG.toDataURL = function(){
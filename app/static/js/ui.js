@@ -7,9 +7,10 @@ document.querySelectorAll(".tab-btn").forEach(btn=>{
     document.getElementById("tab-"+btn.dataset.tab).classList.add("active");
 
     if (btn.dataset.tab === "admin") {
-      // Al entrar al panel, cargar con filtros actuales
+      // Al entrar al panel, cargar con filtros actuales y escuchar cambios en vivo
       const params = getFilters();
       loadPendientes(params); loadCompletadas(params);
+      connectLive();
     }
   });
 });
@@ -200,82 +201,185 @@ document.getElementById("btn-limpiar-filtros").addEventListener("click", async (
   await loadCompletadas(params);
 });
 
+let LIST_PARAMS = {};
+
+// Progreso precalculado (columnas de Evaluation); totales desde la plantilla
+function progressText(p){
+  if (!p) return "";
+  const secs = ["S","P","Q","VC"].map(k=> `${k} ${p.sections?.[k] ?? 0}/${(TEMPLATE?.[k] || []).length}`);
+  const signed = SIGN_ROLES.filter((_, i)=> (p.signed_mask >> i) & 1).length;
+  return `${secs.join(" · ")} · Firmas ${signed}/${SIGN_ROLES.length}`;
+}
+
+function updateProgress(id, patch){
+  const li = document.querySelector(`#list-pendientes li[data-id="${id}"]`);
+  if (!li || !li._progress) return;
+  li._progress = { ...li._progress, ...patch };
+  li.querySelector(".progress").textContent = progressText(li._progress);
+}
+
+function pendienteLi(item){
+  const when = fmtDate(item.created_local || item.created_at);
+  const li = document.createElement("li");
+  li.className = "item";
+  li.dataset.id = item.id;
+  li._progress = item.progress || null;
+  li.innerHTML = `
+    <div>
+      <strong>${item.folio}</strong><br/>
+      <small>Creada: ${when}</small><br/>
+      <small class="progress">${progressText(item.progress)}</small>
+    </div>
+    <div class="row gap">
+      <button data-id="${item.id}" class="btn-editar">Continuar</button>
+      <button data-id="${item.id}" class="btn-delete">Eliminar</button>
+    </div>`;
+  li.querySelector(".btn-editar").addEventListener("click", ()=> openEditor(+item.id));
+  li.querySelector(".btn-delete").addEventListener("click", ()=>
+    deleteFromList(item.id, "¿Eliminar esta evaluación? Esta acción no se puede deshacer."));
+  return li;
+}
+
+function completadaLi(item){
+  const when = fmtDate(item.created_local || item.created_at);
+  const li = document.createElement("li");
+  li.className = "item";
+  li.dataset.id = item.id;
+  const url = API.exportUrl(item.id);
+  li.innerHTML = `
+    <div>
+      <strong>${item.folio}</strong><br/>
+      <small>Completada: ${when}${item.archived ? " · archivada" : ""}</small>
+    </div>
+    <div class="row gap">
+      <a href="${url}" target="_blank"><button>Exportar PDF</button></a>
+      <button data-id="${item.id}" class="btn-delete">Eliminar</button>
+    </div>`;
+  li.querySelector(".btn-delete").addEventListener("click", ()=>
+    deleteFromList(item.id, "¿Eliminar esta evaluación?"));
+  return li;
+}
+
+async function deleteFromList(id, question){
+  if (!confirm(question)) return;
+  const r = await API.deleteEvaluation(+id);
+  if (r?.ok) removeFromLists([+id]);
+  else alert(r?.error || "No se pudo eliminar");
+}
+
+function listError(ul, msg){
+  const li = document.createElement("li");
+  li.className = "item";
+  li.innerHTML = `<div><strong>Error</strong><br/><small>${msg}</small></div>`;
+  ul.appendChild(li);
+}
+
 async function loadPendientes(params = {}){
+  LIST_PARAMS = params;
   const data = await API.listPendientes(params);
   const ul = document.getElementById("list-pendientes");
   ul.innerHTML = "";
   if (data?.error || !Array.isArray(data?.items)) {
-    const msg = document.createElement("li");
-    msg.className = "item";
-    msg.innerHTML = `<div><strong>Error</strong><br/><small>${data?.error || "No se pudo obtener pendientes"}</small></div>`;
-    ul.appendChild(msg);
+    listError(ul, data?.error || "No se pudo obtener pendientes");
     return;
   }
-  data.items.forEach(item=>{
-    const when = fmtDate(item.created_local || item.created_at);
-    const li = document.createElement("li");
-    li.className = "item";
-    li.innerHTML = `
-      <div>
-        <strong>${item.folio}</strong><br/>
-        <small>Creada: ${when}</small>
-      </div>
-      <div class="row gap">
-        <button data-id="${item.id}" class="btn-editar">Continuar</button>
-        <button data-id="${item.id}" class="btn-delete">Eliminar</button>
-      </div>`;
-    ul.appendChild(li);
-  });
-  ul.querySelectorAll(".btn-editar").forEach(b=>{
-    b.addEventListener("click", ()=> openEditor(+b.dataset.id));
-  });
-  ul.querySelectorAll(".btn-delete").forEach(b=>{
-    b.addEventListener("click", async ()=>{
-      if (!confirm("¿Eliminar esta evaluación? Esta acción no se puede deshacer.")) return;
-      const r = await API.deleteEvaluation(+b.dataset.id);
-      if (r?.ok) { await loadPendientes(params); await loadCompletadas(params); }
-      else alert(r?.error || "No se pudo eliminar");
-    });
-  });
+  data.items.forEach(item=> ul.appendChild(pendienteLi(item)));
 }
 
 async function loadCompletadas(params = {}){
+  LIST_PARAMS = params;
   const data = await API.listCompletadas(params);
   const ul = document.getElementById("list-completadas");
   ul.innerHTML = "";
   if (data?.error || !Array.isArray(data?.items)) {
-    const msg = document.createElement("li");
-    msg.className = "item";
-    msg.innerHTML = `<div><strong>Error</strong><br/><small>${data?.error || "No se pudo obtener completadas"}</small></div>`;
-    ul.appendChild(msg);
+    listError(ul, data?.error || "No se pudo obtener completadas");
     return;
   }
-  data.items.forEach(item=>{
-    const when = fmtDate(item.created_local || item.created_at);
-    const li = document.createElement("li");
-    li.className = "item";
-    const url = API.exportUrl(item.id);
-    li.innerHTML = `
-      <div>
-        <strong>${item.folio}</strong><br/>
-        <small>Completada: ${when}</small>
-      </div>
-      <div class="row gap">
-        <a href="${url}" target="_blank"><button>Exportar PDF</button></a>
-        <button data-id="${item.id}" class="btn-delete">Eliminar</button>
-      </div>`;
-    ul.appendChild(li);
-  });
-  ul.querySelectorAll(".btn-delete").forEach(b=>{
-    b.addEventListener("click", async ()=>{
-      if (!confirm("¿Eliminar esta evaluación?")) return;
-      const r = await API.deleteEvaluation(+b.dataset.id);
-      if (r?.ok) { await loadPendientes(params); await loadCompletadas(params); }
-      else alert(r?.error || "No se pudo eliminar");
-    });
+  data.items.forEach(item=> ul.appendChild(completadaLi(item)));
+}
+
+// ---- Cambios en vivo (short poll a /events?after=) ----
+// Aplica created/saved/signed/completed/deleted sobre las listas ya pintadas; solo se vuelve a
+// pedir la lista completa si el servidor responde reset (no pudo reanudar desde el último evento).
+const LIVE = { started: false, busy: false, connected: false, lastId: null, timer: null };
+
+function matchesFilters(item){
+  const f = LIST_PARAMS;
+  if (f.no_empleado && !String(item.folio || "").endsWith(`-${f.no_empleado}`)) return false;
+  if (f.from || f.to){
+    const day = String(item.created_local || "").slice(0, 10);
+    const from = f.from || new Date().toLocaleDateString("sv");
+    const to = f.to || from;
+    if (day < from || day > to) return false;
+  }
+  return true;
+}
+
+function removeFromLists(ids){
+  ids.forEach(id=>{
+    document.querySelectorAll(`#list-pendientes li[data-id="${id}"], #list-completadas li[data-id="${id}"]`)
+      .forEach(li=> li.remove());
   });
 }
 
+function prependTo(listId, li){
+  const ul = document.getElementById(listId);
+  if (ul.querySelector(`li[data-id="${li.dataset.id}"]`)) return;
+  ul.insertBefore(li, ul.firstChild);
+}
+
+function applyLiveEvent(type, d){
+  if (type === "created"){
+    if (matchesFilters(d)) prependTo("list-pendientes", pendienteLi(d));
+  } else if (type === "completed"){
+    removeFromLists([d.id]);
+    if (matchesFilters(d)) prependTo("list-completadas", completadaLi(d));
+  } else if (type === "deleted"){
+    removeFromLists(d.ids || []);
+  } else if (type === "saved"){
+    if (d.progress) updateProgress(d.id, d.progress);
+  } else if (type === "signed"){
+    if (d.signed_mask != null) updateProgress(d.id, { signed_mask: d.signed_mask });
+  }
+}
+
+async function pollLive(){
+  if (LIVE.busy) return;
+  LIVE.busy = true;
+  clearTimeout(LIVE.timer);
+  let delay = 15000;  // tras un error de red o del servidor
+  try {
+    const d = await API.events(LIVE.lastId);
+    if (d.error) throw new Error(d.error);
+    if (d.reset && LIVE.lastId !== null){
+      const params = getFilters();
+      loadPendientes(params); loadCompletadas(params);
+    } else {
+      (d.events || []).forEach(ev=> applyLiveEvent(ev.type, ev.data));
+    }
+    LIVE.lastId = d.last_id;
+    LIVE.connected = true;
+    delay = d.more ? 0 : d.poll_ms;
+  } catch {
+    LIVE.connected = false;
+  } finally {
+    LIVE.busy = false;
+  }
+  if (document.hidden) delay = Math.max(delay, 30000);
+  LIVE.timer = setTimeout(pollLive, delay);
+}
+
+function connectLive(){
+  if (LIVE.started) return;
+  LIVE.started = true;
+  pollLive();
+}
+
+// Al volver a la pestaña, ponerse al día sin esperar el intervalo largo
+document.addEventListener("visibilitychange", ()=>{
+  if (LIVE.started && !document.hidden) pollLive();
+});
+
 // Botones admin específicos
 document.getElementById("btn-refresh-pendientes")?.addEventListener("click", async ()=>{
   ADMIN_FILTER = "pend"; applyAdminFilter(); await loadPendientes(getFilters());
@@ -311,6 +415,7 @@ document.getElementById("home-empezar").addEventListener("click", async ()=>{
 
 // ---- Editor flow ----
 async function openEditor(id, statusMsg=""){
+  await flushAutosave();
   CURRENT_ID = id;
   document.querySelectorAll(".tab").forEach(s=>s.classList.remove("active"));
   document.getElementById("tab-editor").classList.add("active");
@@ -320,8 +425,30 @@ async function openEditor(id, statusMsg=""){
   document.getElementById("tab-editor").scrollIntoView({behavior:"smooth", block:"start"});
 }
 
+// ----- Autosave: manda solo los campos que cambian (agrupados ~1 s) -----
+const AUTOSAVE = { dirty: {}, timer: null };
+
+async function flushAutosave(){
+  clearTimeout(AUTOSAVE.timer);
+  AUTOSAVE.timer = null;
+  const responses = Object.entries(AUTOSAVE.dirty).map(([field_key, value])=>({ field_key, value }));
+  AUTOSAVE.dirty = {};
+  if (!CURRENT_ID || !responses.length) return;
+  const r = await API.autosave(CURRENT_ID, responses);
+  if (r?.error) edStatus.textContent = `Error en autoguardado: ${r.error}`;
+}
+
+document.getElementById("editor").addEventListener("change", (e)=>{
+  const el = e.target;
+  if (!CURRENT_ID || !el.name) return;
+  AUTOSAVE.dirty[el.name] = el.value ?? "";
+  clearTimeout(AUTOSAVE.timer);
+  AUTOSAVE.timer = setTimeout(flushAutosave, 1000);
+});
+
 document.getElementById("btn-guardar").addEventListener("click", async ()=>{
   if(!CURRENT_ID){ alert("Primero crea una evaluación."); return; }
+  AUTOSAVE.dirty = {}; clearTimeout(AUTOSAVE.timer);
   const form = document.getElementById("editor");
   const inputs = form.querySelectorAll("input, select, textarea");
   const responses = [];
@@ -337,16 +464,17 @@ document.getElementById("btn-guardar").addEventListener("click", async ()=>{
     edStatus.textContent = `Guardado. Requeridos: ${r.required_filled}/${r.required_total}`;
   }
   const adminVisible = document.getElementById("tab-admin").classList.contains("active");
-  if (adminVisible) await loadPendientes(getFilters());
+  if (adminVisible && !LIVE.connected) await loadPendientes(getFilters());
 });
 
 document.getElementById("btn-completar").addEventListener("click", async ()=>{
   if(!CURRENT_ID){ alert("Primero crea una evaluación."); return; }
+  await flushAutosave();
   const r = await API.complete(CURRENT_ID);
   if (r.error){ edStatus.textContent = `Error: ${r.error}`; return; }
   if (r.ok){
     edStatus.textContent = "¡Completada! Exporta desde el Panel administrador.";
-    await loadPendientes(getFilters()); await loadCompletadas(getFilters());
+    if (!LIVE.connected) { await loadPendientes(getFilters()); await loadCompletadas(getFilters()); }
   } else {
     const faltan = [];
     if (r.missing_required?.length) faltan.push(`Campos: ${r.missing_required.slice(0,5).join(", ")}${r.missing_required.length>5?"…":""}`);
@@ -378,8 +506,10 @@ document.getElementById("sig-cancel").addEventListener("click", ()=>{
 document.getElementById("sig-guardar").addEventListener("click", async ()=>{
   const name = sigName.value.trim();
   if (!name) return alert("Escribe el nombre del firmante");
-  const dataUrl = SIG.toDataURL();
-  const r = await API.sign(CURRENT_ID, PENDING_ROLE, name, dataUrl);
+  const strokes = SIG.toStrokes();
+  if (!strokes) return alert("Dibuja la firma");
+  await flushAutosave();
+  const r = await API.sign(CURRENT_ID, PENDING_ROLE, name, { strokes });
   if (r.error) { alert(r.error); return; }
   SIG.close();
   modal.classList.add("hidden");
@@ -0,0 +1,181 @@
+"""
+Benchmark de backends PDF (ReportLab vs WeasyPrint) sobre evaluaciones realistas.
+
+    python benchmarks/pdf_backends.py [--runs 20] [--backends reportlab,weasyprint] [--signatures png,strokes]
+
+Cada backend × formato de firma (PNG en disco o trazos vectoriales) corre en un subproceso
+limpio para medir por separado:
+  - import_s:  costo de importar el motor (impacta arranque del worker)
+  - first_s:   primer render (incluye cargas diferidas: fuentes, etc.)
+  - p50_s/p95_s: render en caliente
+  - py_peak_kb: pico de memoria Python (tracemalloc) durante un render
+  - rss_mb:    RSS máximo del proceso (incluye librerías C: pango/cairo)
+  - size_kb:   tamaño promedio del PDF
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+ENGINE_MODULE = {"reportlab": "reportlab.platypus", "weasyprint": "weasyprint"}
+
+
+def _signature_strokes(rnd: random.Random) -> list:
+    """Firma sintética: trazos aleatorios en un lienzo como el del canvas de la tablet."""
+    strokes = []
+    x, y = 40, 150
+    for _ in range(rnd.randint(3, 6)):
+        pts = []
+        for _ in range(rnd.randint(25, 60)):
+            x = min(860, max(20, x + rnd.randint(-8, 22)))
+            y = min(280, max(20, y + rnd.randint(-25, 25)))
+            pts.append((x, y))
+        strokes.append(pts)
+    return strokes
+
+
+def _signature_png(path: Path, strokes: list):
+    from PIL import Image, ImageDraw
+    img = Image.new("RGBA", (900, 300), (0, 0, 0, 0))
+    d = ImageDraw.Draw(img)
+    for pts in strokes:
+        d.line(pts, fill=(0, 0, 0, 255), width=4, joint="curve")
+    img.save(path)
+
+
+def make_evaluation(tpl: dict, sig_dir: Path, idx: int, rnd: random.Random, sig_format: str = "png"):
+    from app.services.evaluation_service import EvaluationService
+    from app.services.signature_strokes import encode_strokes
+    items = EvaluationService._seed_items(tpl, preset={"no_empleado": str(10000 + idx)})
+    responses = []
+    for it in items:
+        k = it["field_key"]
+        if k.endswith(("_r1", "_r2", "_r3")):
+            v = "si" if rnd.random() < 0.85 else "no"
+        elif k.endswith("_obs"):
+            v = rnd.choice(["", "", "", "Requiere reforzar el paso de verificación con el supervisor."])
+        elif k == "resultado_global":
+            v = rnd.choice(tpl["meta"]["result_options"])
+        elif k.startswith("fecha"):
+            v = "2024-05-10"
+        else:
+            v = it["value"] or f"Valor {k} {idx}"
+        responses.append(SimpleNamespace(field_key=k, value=v, is_required=it["is_required"]))
+
+    signatures = []
+    for role in tpl["meta"]["sign_roles"] + ["nombre_operador"]:
+        strokes = _signature_strokes(rnd)
+        if sig_format == "strokes":
+            encoded = encode_strokes({"w": 900, "h": 300, "strokes": [[v for pt in st for v in pt] for st in strokes]})
+            signatures.append(SimpleNamespace(role=role, signer_name=f"Firmante {role}", image_path="", strokes=encoded))
+            continue
+        p = sig_dir / f"{idx}_{role}.png"
+        _signature_png(p, strokes)
+        signatures.append(SimpleNamespace(role=role, signer_name=f"Firmante {role}", image_path=str(p), strokes=None))
+
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(id=idx, folio=f"EC-BENCH-{idx:05d}", responses=responses,
+                           signatures=signatures, created_at=now, updated_at=now)
+
+
+def run_one(backend: str, runs: int, sig_format: str = "png") -> dict:
+    t0 = time.perf_counter()
+    importlib.import_module(ENGINE_MODULE[backend])
+    import_s = time.perf_counter() - t0
+
+    from flask import Flask
+    from app.services.pdf_renderers import get_renderer
+    from app.services.evaluation_service import EvaluationService
+
+    app = Flask("bench", template_folder=str(ROOT / "app" / "templates"))
+    app.config["DEFAULT_TZ"] = "America/Mexico_City"
+    rnd = random.Random(42)
+    tpl = EvaluationService._load_template()
+    renderer = get_renderer(backend)
+
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        tmp = Path(tmp)
+        evs = [make_evaluation(tpl, tmp, i, rnd, sig_format) for i in range(min(runs, 10))]
+        times, sizes = [], []
+        first_s = py_peak = None
+        for i in range(runs + 1):
+            ev = evs[i % len(evs)]
+            resp = {r.field_key: r.value for r in ev.responses}
+            out = tmp / f"{ev.folio}_{i}.pdf"
+            if i == 1:
+                tracemalloc.start()
+            t = time.perf_counter()
+            renderer.render(ev, tpl, resp, out)
+            dt = time.perf_counter() - t
+            if i == 1:
+                py_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            if i == 0:
+                first_s = dt
+                continue
+            times.append(dt)
+            sizes.append(out.stat().st_size)
+
+    times.sort()
+    return {
+        "backend": backend,
+        "firmas": sig_format,
+        "import_s": round(import_s, 3),
+        "first_s": round(first_s, 3),
+        "p50_s": round(statistics.median(times), 4),
+        "p95_s": round(times[max(0, int(len(times) * 0.95) - 1)], 4),
+        "py_peak_kb": round(py_peak / 1024),
+        "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "size_kb": round(statistics.mean(sizes) / 1024, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--backends", default="reportlab,weasyprint")
+    ap.add_argument("--signatures", default="png,strokes", help="formatos de firma a medir")
+    ap.add_argument("--only", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.only:
+        print(json.dumps(run_one(args.only, args.runs, args.signatures)))
+        return
+
+    rows = []
+    for backend in args.backends.split(","):
+        for sig_format in args.signatures.split(","):
+            proc = subprocess.run(
+                [sys.executable, __file__, "--only", backend, "--runs", str(args.runs), "--signatures", sig_format],
+                capture_output=True, text=True, env=os.environ.copy(),
+            )
+            if proc.returncode != 0:
+                err = (proc.stderr.strip().splitlines() or ["?"])[-1]
+                print(f"{backend}/{sig_format}: no disponible ({err})")
+                continue
+            rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    print("  ".join(f"{c:>11}" for c in cols))
+    for r in rows:
+        print("  ".join(f"{str(r[c]):>11}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
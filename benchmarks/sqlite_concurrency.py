@@ -0,0 +1,173 @@
+"""
+Benchmark de escrituras concurrentes sobre SQLite (modo gunicorn gthread: N procesos × M threads).
+
+    python benchmarks/sqlite_concurrency.py [--procs 2] [--threads 8] [--seconds 10] [--evals 40]
+
+Cada escenario corre en un subproceso con una BD nueva en un directorio temporal:
+  - default:       journal DELETE, sin PRAGMAs (solo foreign_keys) ni lock de escritura
+  - wal:           PRAGMAs del modo concurrente (WAL, synchronous=NORMAL, busy_timeout, cache, mmap)
+  - wal+lock:      lo anterior + lock de escritura por proceso (SQLITE_WRITE_LOCK)
+
+Cada thread simula una tablet: guarda 5 campos (upsert_responses) y relee la evaluación
+(get_responses), en proporción --write-ratio. Reporta:
+  - ops_s:        operaciones por segundo (todas)
+  - writes_s:     escrituras por segundo
+  - p50_ms/p95_ms/p99_ms: latencia de escritura
+  - locked:       escrituras fallidas con 'database is locked'
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SCENARIOS = {
+    "default": {"SQLITE_TUNING": "0", "SQLITE_WRITE_LOCK": "0"},
+    "wal": {"SQLITE_TUNING": "1", "SQLITE_WRITE_LOCK": "0"},
+    "wal+lock": {"SQLITE_TUNING": "1", "SQLITE_WRITE_LOCK": "1"},
+}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _app():
+    from app import create_app
+    return create_app()
+
+
+def _prepare(n_evals: int):
+    """Crea las evaluaciones (plantilla completa) antes de medir."""
+    app = _app()
+    from app.services import EvaluationService
+    with app.app_context():
+        return [EvaluationService.create_by_no_empleado(str(10000 + i)).id for i in range(n_evals)]
+
+
+def _worker_process(args, eids, out_q):
+    app = _app()
+    from app.repositories import EvaluationRepository
+
+    keys = None
+    with app.app_context():
+        keys = [r["field_key"] for r in EvaluationRepository.get_responses(eids[0])]
+
+    stop_at = time.monotonic() + args.seconds
+    lat, counts = [], {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def tablet(seed):
+        rnd = random.Random(seed)
+        my_lat, c = [], {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+        while time.monotonic() < stop_at:
+            eid = rnd.choice(eids)
+            if rnd.random() < args.write_ratio:
+                items = [{"field_key": k, "value": str(rnd.randint(0, 9))} for k in rnd.sample(keys, 5)]
+                t0 = time.perf_counter()
+                try:
+                    EvaluationRepository.upsert_responses(eid, items)
+                    my_lat.append((time.perf_counter() - t0) * 1000)
+                    c["writes"] += 1
+                except Exception as e:
+                    c["locked" if "locked" in str(e) else "errors"] += 1
+            else:
+                try:
+                    EvaluationRepository.get_responses(eid)
+                    c["reads"] += 1
+                except Exception as e:
+                    c["locked" if "locked" in str(e) else "errors"] += 1
+        with lock:
+            lat.extend(my_lat)
+            for k, v in c.items():
+                counts[k] += v
+
+    threads = [threading.Thread(target=tablet, args=(os.getpid() * 100 + i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out_q.put({"lat": lat, **counts})
+
+
+def run_scenario(args):
+    """Subproceso: BD nueva, N procesos × M threads durante args.seconds."""
+    eids = _prepare(args.evals)
+    ctx = mp.get_context("spawn")
+    out_q = ctx.Queue()
+    procs = [ctx.Process(target=_worker_process, args=(args, eids, out_q)) for _ in range(args.procs)]
+    t0 = time.monotonic()
+    for p in procs:
+        p.start()
+    results = [out_q.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.monotonic() - t0
+
+    lat = [x for r in results for x in r["lat"]]
+    total = {k: sum(r[k] for r in results) for k in ("reads", "writes", "locked", "errors")}
+    secs = min(elapsed, args.seconds) or 1
+    print(json.dumps({
+        "ops_s": round((total["reads"] + total["writes"]) / secs, 1),
+        "writes_s": round(total["writes"] / secs, 1),
+        "p50_ms": round(_percentile(lat, 0.50), 1),
+        "p95_ms": round(_percentile(lat, 0.95), 1),
+        "p99_ms": round(_percentile(lat, 0.99), 1),
+        "locked": total["locked"],
+        "errors": total["errors"],
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--procs", type=int, default=2, help="procesos (workers de gunicorn)")
+    ap.add_argument("--threads", type=int, default=8, help="threads por proceso")
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--evals", type=int, default=40, help="evaluaciones sobre las que se reparte la carga")
+    ap.add_argument("--write-ratio", type=float, default=0.5)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--busy-timeout-ms", type=int, default=5000)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_scenario(args)
+        return
+
+    header = f"{'escenario':10s} {'ops/s':>8s} {'writes/s':>9s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'locked':>7s} {'errors':>7s}"
+    print(f"{args.procs} procesos × {args.threads} threads, {args.seconds:g} s, write ratio {args.write_ratio}")
+    print(header)
+    for name in args.scenarios.split(","):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ, **SCENARIOS[name],
+                "DATABASE_URL": f"sqlite:///{Path(tmp).as_posix()}/bench.db",
+                "SQLITE_BUSY_TIMEOUT_MS": str(args.busy_timeout_ms),
+                "AUTOSAVE_BUFFER": "0", "QUERY_BUDGET": "",
+            }
+            cmd = [sys.executable, __file__, "--child", "--procs", str(args.procs), "--threads", str(args.threads),
+                   "--seconds", str(args.seconds), "--evals", str(args.evals), "--write-ratio", str(args.write_ratio)]
+            out = subprocess.run(cmd, env=env, cwd=tmp, capture_output=True, text=True)
+            line = next((ln for ln in reversed(out.stdout.splitlines()) if ln.startswith("{")), None)
+            if out.returncode or not line:
+                print(f"{name:10s} falló:\n{out.stderr[-2000:]}")
+                continue
+            r = json.loads(line)
+            print(f"{name:10s} {r['ops_s']:8.1f} {r['writes_s']:9.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+                  f"{r['p99_ms']:8.1f} {r['locked']:7d} {r['errors']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Generador de datos sintéticos a partir de app/data/template_hr01f08.json (pruebas de escala).
+
+    python seed_template.py -n 100000 [--batch-size 1000] [--months 12] [--completed-ratio 0.75]
+                            [--employees 20000] [--signature-pool 40] [--seed 42] [--database-url URL]
+
+Inserta evaluaciones completas (todas las respuestas de la plantilla + firmas) con:
+  - fechas repartidas en los últimos --months meses, en horario de turno y con menos fines de semana
+  - un padrón de --employees operadores (nombre, área, operación y máquina fijos por operador)
+  - respuestas Sí/No con tasa realista de "No", revisiones r2/r3 parciales y observaciones ocasionales
+  - COMPLETADAS con resultado y las 5 firmas (vectoriales, en signatures.strokes; sin archivos en
+    disco); PENDIENTES llenadas hasta una pregunta al azar
+  - contadores de progreso (required_*, *_filled, signed_mask) ya calculados
+
+Usa executemany por lote (una transacción cada --batch-size evaluaciones) sobre el engine de la
+app, así que aplica igual a SQLite (instance/dev.db) que a Postgres (DATABASE_URL).
+No genera eventos del panel en vivo.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+NOMBRES = ["Juan", "María", "José", "Guadalupe", "Luis", "Ana", "Carlos", "Rosa", "Jorge", "Verónica",
+           "Miguel", "Laura", "Francisco", "Patricia", "Alejandro", "Diana", "Ricardo", "Claudia",
+           "Fernando", "Adriana", "Roberto", "Gabriela", "Eduardo", "Sandra", "Raúl", "Mónica"]
+APELLIDOS = ["Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez",
+             "Ramírez", "Cruz", "Flores", "Gómez", "Morales", "Vázquez", "Reyes", "Jiménez", "Torres",
+             "Díaz", "Gutiérrez", "Ruiz", "Mendoza", "Aguilar", "Ortiz", "Castillo", "Romero"]
+# área: (peso, [(operación, máquina)])
+AREAS = {
+    "Prensas": (30, [("Troquelado", "Prensa 200T"), ("Embutido", "Prensa 400T"), ("Corte", "Cizalla")]),
+    "Soldadura": (25, [("Soldadura MIG", "Robot MIG"), ("Soldadura por puntos", "Pinza neumática")]),
+    "Ensamble": (20, [("Subensamble", "Mesa de ensamble"), ("Atornillado", "Atornilladora"), ("Remachado", "Remachadora")]),
+    "Pintura": (10, [("Preparación", "Cabina de lijado"), ("Aplicación", "Cabina de pintura")]),
+    "Maquinado": (10, [("Torneado", "Torno CNC"), ("Fresado", "Centro de maquinado")]),
+    "Almacén": (5, [("Surtido", "Montacargas"), ("Recibo", "Patín eléctrico")]),
+}
+OBSERVACIONES = ["Requiere refuerzo", "Se explicó nuevamente", "Pendiente de práctica", "Usa EPP incompleto",
+                 "Buen desempeño", "Se corrigió en sitio", "Reforzar con entrenador"]
+RESULT_WEIGHTS = {"Aprobado": 72, "Re-entrenamiento": 18, "Re-ubicación": 4, "No aprobó": 6}
+
+
+def _signature_strokes(rnd: random.Random) -> str:
+    """Firma sintética vectorial (como la manda signature.js en un canvas de 900×300),
+       codificada para Signature.strokes. Cada fila lleva su copia: no hay archivos que compartir."""
+    from app.services.signature_strokes import encode_strokes, parse_strokes
+    strokes = []
+    x, y = 60, 150
+    for _ in range(rnd.randint(3, 6)):
+        st = []
+        for _ in range(rnd.randint(15, 40)):
+            x = min(860, max(20, x + rnd.randint(-10, 30)))
+            y = min(280, max(20, y + rnd.randint(-25, 25)))
+            st += [x, y]
+        strokes.append(st)
+    return encode_strokes(parse_strokes({"w": 900, "h": 300, "strokes": strokes}))
+
+
+def make_employees(n: int, rnd: random.Random) -> list:
+    areas = list(AREAS)
+    weights = [AREAS[a][0] for a in areas]
+    today = date.today()
+    out = []
+    for i in range(n):
+        area = rnd.choices(areas, weights)[0]
+        op, maq = rnd.choice(AREAS[area][1])
+        out.append({
+            "no_empleado": str(10000 + i),
+            "nombre": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            "area": area,
+            "operacion": op,
+            "no_operacion": str(rnd.randint(10, 990)),
+            "maquina": maq,
+            "no_maquina": f"{area[:3].upper()}-{rnd.randint(1, 60):02d}",
+            "fecha_ingreso": (today - timedelta(days=rnd.randint(15, 3650))).isoformat(),
+        })
+    return out
+
+
+def random_created(rnd: random.Random, months: int, tz) -> datetime:
+    """Día al azar (menos sábados, casi nunca domingos) en horario de turno, en UTC."""
+    today = datetime.now(tz).date()
+    while True:
+        d = today - timedelta(days=rnd.randint(0, months * 30))
+        if rnd.random() < (1.0, 1.0, 1.0, 1.0, 1.0, 0.4, 0.05)[d.weekday()]:
+            break
+    minutes = int(min(17.5, max(6, rnd.gauss(11, 3))) * 60)
+    local = tz.localize(datetime(d.year, d.month, d.day)) + timedelta(minutes=minutes)
+    return local.astimezone(timezone.utc)
+
+
+def build_evaluation(eid: int, emp: dict, created: datetime, completed: bool, seed_items: list,
+                     question_keys: list, sign_roles: list, sig_pool: list, rnd: random.Random, tz):
+    """(fila de evaluations, respuestas, firmas) de una evaluación."""
+    from app.models import EvalStatus
+    from app.repositories.evaluation_repo import progress_counters
+
+    local_day = created.astimezone(tz).date()
+    values = {k: "" for k, _ in seed_items}
+    values.update({k: v for k, v in emp.items() if k in values})
+    values["fecha_inicio_entrenamiento"] = (local_day - timedelta(days=rnd.randint(3, 45))).isoformat()
+    values["fecha_revision"] = local_day.isoformat()
+
+    # Tasa de "No" propia del operador: la mayoría contesta casi todo bien
+    p_no = min(0.5, rnd.expovariate(1 / 0.04))
+    answered = len(question_keys) if completed else rnd.randint(0, len(question_keys) - 1)
+    for i, q in enumerate(question_keys[:answered]):
+        values[f"{q}_r1"] = "no" if rnd.random() < p_no else "si"
+        if rnd.random() < 0.85:
+            values[f"{q}_r2"] = "no" if rnd.random() < p_no / 2 else "si"
+            if rnd.random() < 0.6:
+                values[f"{q}_r3"] = "no" if rnd.random() < p_no / 4 else "si"
+        if values[f"{q}_r1"] == "no" and rnd.random() < 0.4 or rnd.random() < 0.03:
+            values[f"{q}_obs"] = rnd.choice(OBSERVACIONES)
+    if not completed and rnd.random() < 0.1:
+        for k in ("area", "operacion", "no_operacion", "maquina", "no_maquina"):
+            values[k] = ""  # capturadas a medias
+
+    if completed:
+        noes = sum(1 for q in question_keys if values[f"{q}_r1"] == "no")
+        if noes > 6:
+            values["resultado_global"] = rnd.choice(["Re-entrenamiento", "No aprobó", "Re-ubicación"])
+        else:
+            values["resultado_global"] = rnd.choices(list(RESULT_WEIGHTS), list(RESULT_WEIGHTS.values()))[0]
+        if rnd.random() < 0.2:
+            values["comentarios"] = rnd.choice(OBSERVACIONES)
+        updated = created + timedelta(minutes=rnd.randint(15, 180), days=1 if rnd.random() < 0.1 else 0)
+        roles = list(sign_roles)
+    else:
+        updated = created + timedelta(minutes=rnd.randint(1, 60))
+        roles = sign_roles[:rnd.randint(0, len(sign_roles) - 1)] if answered > len(question_keys) // 2 else []
+
+    responses = [(eid, k, values[k], req) for k, req in seed_items]
+    signatures = [
+        {"evaluation_id": eid, "role": role, "signer_name": f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}",
+         "image_path": "", "strokes": rnd.choice(sig_pool), "signed_at": updated - timedelta(minutes=len(roles) - i)}
+        for i, role in enumerate(roles)
+    ]
+    ev = {
+        "id": eid,
+        "folio": f"EC-{local_day.strftime('%Y%m%d')}-{emp['no_empleado']}",
+        "status": EvalStatus.COMPLETADA if completed else EvalStatus.PENDIENTE,
+        "created_at": created,
+        "updated_at": updated,
+        "signed_mask": sum(1 << sign_roles.index(r) for r in roles),
+        **progress_counters([(k, req, values[k]) for k, req in seed_items]),
+    }
+    return ev, responses, signatures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--count", type=int, default=1000, help="evaluaciones a generar")
+    ap.add_argument("--batch-size", type=int, default=1000, help="evaluaciones por transacción")
+    ap.add_argument("--months", type=int, default=12, help="ventana de fechas hacia atrás")
+    ap.add_argument("--completed-ratio", type=float, default=0.75)
+    ap.add_argument("--employees", type=int, default=20000)
+    ap.add_argument("--signature-pool", type=int, default=40, help="firmas sintéticas distintas (vectoriales)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--database-url", default=None, help="por defecto DATABASE_URL / instance/dev.db")
+    args = ap.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    # Sin buffer de autosave ni conteo de queries en la carga
+    os.environ["AUTOSAVE_BUFFER"] = "0"
+    os.environ["QUERY_BUDGET"] = ""
+
+    import pytz
+    from sqlalchemy import func, insert, select, text
+    from app import create_app
+    from app.db import get_engine
+    from app.models import Evaluation, EvaluationResponse, Signature, EvaluationArchive
+    from app.services import EvaluationService
+
+    app = create_app()
+    rnd = random.Random(args.seed)
+    tz = pytz.timezone(app.config.get("DEFAULT_TZ", "America/Mexico_City"))
+    engine = get_engine()
+
+    with app.app_context():
+        tpl = EvaluationService._load_template()
+        seed_items = [(it["field_key"], it["is_required"]) for it in EvaluationService._seed_items(tpl)]
+    question_keys = [q["key"] for sec in ("S", "P", "Q", "VC") for q in tpl.get(sec, [])]
+    sign_roles = tpl.get("meta", {}).get("sign_roles", [])
+
+    sig_pool = [_signature_strokes(rnd) for _ in range(max(1, args.signature_pool))]
+
+    resp_table = EvaluationResponse.__table__
+    resp_cols = ("evaluation_id", "field_key", "value", "is_required")
+    if engine.dialect.paramstyle == "qmark":
+        # SQLite: tuplas directo al executemany del driver (el procesamiento de parámetros
+        # por fila de Core cuesta más que el insert); Postgres usa insertmanyvalues de Core
+        sql = f"INSERT INTO {resp_table.name} ({', '.join(resp_cols)}) VALUES ({', '.join('?' * len(resp_cols))})"
+
+        def insert_responses(conn, rows):
+            conn.exec_driver_sql(sql, rows)
+    else:
+        def insert_responses(conn, rows):
+            conn.execute(insert(resp_table), [dict(zip(resp_cols, r)) for r in rows])
+
+    employees = make_employees(args.employees, rnd)
+    with engine.connect() as conn:
+        # ids explícitos después de vivas y archivadas (el archivo conserva el id original)
+        next_id = max(
+            conn.execute(select(func.max(Evaluation.id))).scalar() or 0,
+            conn.execute(select(func.max(EvaluationArchive.id))).scalar() or 0,
+        ) + 1
+        folios = set(conn.execute(select(Evaluation.folio)).scalars())
+        folios |= set(conn.execute(select(EvaluationArchive.folio)).scalars())
+
+    print(f"Generando {args.count} evaluaciones desde id {next_id} "
+          f"({len(seed_items)} respuestas c/u, lotes de {args.batch_size}) en {engine.url.render_as_string()}")
+    started = time.monotonic()
+    done = 0
+    recent = datetime.now(timezone.utc) - timedelta(days=14)
+    while done < args.count:
+        evs, responses, signatures = [], [], []
+        for _ in range(min(args.batch_size, args.count - done)):
+            for _attempt in range(20):
+                emp = rnd.choice(employees)
+                created = random_created(rnd, args.months, tz)
+                folio = f"EC-{created.astimezone(tz).strftime('%Y%m%d')}-{emp['no_empleado']}"
+                if folio not in folios:
+                    break
+            else:
+                continue  # padrón saturado para la ventana de fechas
+            folios.add(folio)
+            # Lo reciente tiene más pendientes que lo viejo
+            ratio = args.completed_ratio if created < recent else args.completed_ratio * 0.6
+            ev, resp, sigs = build_evaluation(next_id, emp, created, rnd.random() < ratio, seed_items,
+                                              question_keys, sign_roles, sig_pool, rnd, tz)
+            evs.append(ev)
+            responses += resp
+            signatures += sigs
+            next_id += 1
+        if not evs:
+            print("Sin folios disponibles: aumenta --employees o --months.")
+            break
+
+        with engine.begin() as conn:
+            conn.execute(insert(Evaluation.__table__), evs)
+            insert_responses(conn, responses)
+            if signatures:
+                conn.execute(insert(Signature.__table__), signatures)
+        done += len(evs)
+        elapsed = time.monotonic() - started
+        print(f"  {done}/{args.count} evaluaciones · {done / elapsed:.0f} eval/s · "
+              f"{done * len(seed_items) / elapsed:,.0f} respuestas/s")
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # ids explícitos: alinear la secuencia para los inserts normales de la app
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('evaluations', 'id'), "
+                              "(SELECT COALESCE(MAX(id), 1) FROM evaluations))"))
+        conn.execute(text("ANALYZE"))
+    print(f"Listo: {done} evaluaciones en {time.monotonic() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import pytest
+
+from app import create_app
+from app.repositories import EvaluationRepository
+from app.services import EvaluationService
+
+STROKES = {"w": 300, "h": 120, "strokes": [[10, 60, 40, 30, 80, 90, 120, 40], [150, 70, 200, 70]]}
+
+
+@pytest.fixture
+def app_factory(tmp_path):
+    """App sobre una BD SQLite y un instance/ temporales; overrides = claves de config."""
+    def make(**overrides):
+        config = {
+            "TESTING": True,
+            "DATABASE_URL": f"sqlite:///{(tmp_path / 'test.db').as_posix()}",
+            "AUTOSAVE_BUFFER": False,
+            "QUERY_BUDGET": "",
+            "QUERY_RAISELOAD": False,
+            **overrides,
+        }
+        return create_app(config, instance_path=str(tmp_path / "instance"))
+    return make
+
+
+@pytest.fixture
+def app(app_factory):
+    app = app_factory()
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def fill_required(eid: int, value: str = "Si"):
+    rows = EvaluationRepository.get_responses(eid)
+    EvaluationRepository.upsert_responses(
+        eid, [{"field_key": r["field_key"], "value": r["value"] or value} for r in rows if r["is_required"]]
+    )
+
+
+def sign_all(eid: int, roles=None):
+    for role in roles or EvaluationService.required_sign_roles():
+        EvaluationService.save_signature_strokes(eid, role, f"Firma {role}", STROKES)
+
+
+def completed_evaluation(no_empleado: str = "1001") -> int:
+    ev = EvaluationService.create_by_no_empleado(no_empleado)
+    fill_required(ev.id)
+    sign_all(ev.id)
+    ok, vr = EvaluationService.try_complete(ev.id, EvaluationService.required_sign_roles())
+    assert ok, vr
+    return ev.id
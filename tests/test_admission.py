@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from app.admission import AdmissionLimiter, check_limits, default_limits, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("pdf=2:4:15, sign=3") == {"pdf": (2, 4, 15.0), "sign": (3, 0, 0.0)}
+    assert parse_limits("") == {}
+
+
+def test_limiter_queue_full_and_timeout():
+    lim = AdmissionLimiter("pdf", max_concurrent=1, max_queue=0, wait_timeout=0.05)
+    assert lim.acquire()
+    assert not lim.acquire()  # sin cola: rechazo inmediato
+    assert lim.rejected_queue_full == 1
+
+    lim.max_queue = 1
+    assert not lim.acquire()  # en cola hasta el timeout
+    assert lim.rejected_timeout == 1
+    lim.release()
+    assert lim.acquire()
+
+
+def test_limiter_queued_request_is_admitted_on_release():
+    lim = AdmissionLimiter("pdf", max_concurrent=1, max_queue=1, wait_timeout=5)
+    assert lim.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(lim.acquire()))
+    t.start()
+    while lim.snapshot()["queued"] == 0:
+        pass
+    lim.release()
+    t.join(2)
+    assert got == [True]
+    assert lim.snapshot()["max_queued_seen"] == 1
+
+
+def test_saturated_route_returns_503(app, client):
+    lim = app.extensions["admission"]["pdf"]
+    lim.max_queue = 0
+    lim.in_flight = lim.max_concurrent
+    try:
+        resp = client.get("/api/evaluaciones/1/export")
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == str(lim.retry_after)
+    finally:
+        lim.in_flight = 0
+    metrics = client.get("/api/metrics").get_json()["admission"]["pdf"]
+    assert metrics["rejected_queue_full"] == 1
+    assert client.get("/api/evaluaciones/1/export").status_code == 404
+
+
+@pytest.mark.parametrize("threads", [6, 8, 12, 16, 32])
+def test_default_limits_leave_threads_free(threads):
+    limits = parse_limits(default_limits(threads))
+    assert set(limits) == {"pdf", "tabular", "sign"}
+    held = sum(conc + queue for conc, queue, _ in limits.values())
+    assert held < threads and threads - held >= threads // 3
+
+
+def test_check_limits():
+    check_limits(parse_limits("pdf=2:1:15,sign=1:0:5"), threads=6)
+    with pytest.raises(ValueError, match="WEB_THREADS"):
+        check_limits(parse_limits("pdf=2:4:15,sign=3:6:10"), threads=8)
+
+
+def test_startup_rejects_limits_above_threads(app_factory):
+    with pytest.raises(ValueError):
+        app_factory(WEB_THREADS=4, ADMISSION_LIMITS="pdf=2:4:15")
+    app = app_factory(WEB_THREADS=12, ADMISSION_LIMITS="")
+    metrics = app.test_client().get("/api/metrics").get_json()
+    assert metrics["threads"] == 12
+    assert metrics["admission"]["pdf"]["max_concurrent"] == 2
+
+
+def test_events_poll_holds_no_thread(app_factory):
+    # Sin limitador propio: cada poll termina al instante y no retiene el thread
+    app = app_factory(WEB_THREADS=2, ADMISSION_LIMITS="pdf=1:0:15")
+    assert "events" not in app.extensions["admission"]
+    client = app.test_client()
+    for _ in range(20):
+        assert client.get("/api/evaluaciones/events?after=0").status_code == 200
+    assert client.get("/api/evaluaciones/diag").status_code == 200
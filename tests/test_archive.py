@@ -0,0 +1,20 @@
+from app.repositories import ArchiveRepository, EvaluationRepository
+from app.services import ArchiveService
+from conftest import completed_evaluation
+
+
+def test_archive_completed(app, client):
+    eid = completed_evaluation()
+    assert ArchiveService.archive_completed(older_than_days=-1, log=lambda m: None) == 1
+    assert not EvaluationRepository.exists(eid)
+    assert ArchiveRepository.exists(eid)
+
+    items = client.get(f"/api/evaluaciones/{eid}/responses").get_json()["items"]
+    assert {"field_key": "no_empleado", "value": "1001", "is_required": True} in items
+    snap = ArchiveService.snapshot(eid)
+    assert len(snap["signatures"]) == 5 and snap["signatures"][0]["strokes"]
+
+    resp = client.get(f"/api/evaluaciones/{eid}/export")
+    assert resp.status_code == 200 and resp.data.startswith(b"%PDF")
+    listed = client.get("/api/evaluaciones/completadas").get_json()["items"]
+    assert [x["id"] for x in listed if x.get("archived")] == [eid]
@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import io
+
+import httpx
+import pytest
+from PIL import Image
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.asgi import create_asgi_app
+from app.db import get_async_engine, dispose_async_engine
+from app.models import EvalStatus
+from app.repositories import EvaluationRepository
+from app.services import EvaluationService
+from conftest import STROKES
+
+API = "/api/evaluaciones"
+
+
+@pytest.fixture
+def asgi_factory(tmp_path):
+    def make(**overrides):
+        config = {
+            "TESTING": True,
+            "DATABASE_URL": f"sqlite:///{(tmp_path / 'test.db').as_posix()}",
+            "AUTOSAVE_BUFFER": False,
+            "QUERY_BUDGET": "",
+            "QUERY_RAISELOAD": False,
+            **overrides,
+        }
+        return create_asgi_app(config, instance_path=str(tmp_path / "instance"))
+    return make
+
+
+def run(app, scenario):
+    """Corre scenario(client) en un event loop nuevo y cierra el pool de ese loop al terminar."""
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://tablet") as client:
+            try:
+                return await scenario(client)
+            finally:
+                await dispose_async_engine()
+    return asyncio.run(main())
+
+
+def _ok(resp, status=200):
+    assert resp.status_code == status, resp.text
+    return resp.json()
+
+
+@pytest.mark.parametrize("buffered", [False, True])
+def test_capture_flow_on_async_engine(asgi_factory, buffered):
+    app = asgi_factory(QUERY_BUDGET="raise", QUERY_RAISELOAD=True, AUTOSAVE_BUFFER=buffered,
+                       AUTOSAVE_FLUSH_SECONDS=60)
+    flask_app = app.state.flask_app
+    with flask_app.app_context():
+        roles = EvaluationService.required_sign_roles()
+
+    async def scenario(c):
+        diag = _ok(await c.get(f"{API}/diag"))
+        assert diag["mode"] == "asgi" and diag["db_ok"]
+        created = _ok(await c.post(f"{API}/create", json={"no_empleado": "1001"}))
+        eid = created["id"]
+        assert created["folio"].endswith("-1001") and created["status"] == "pendiente"
+        assert _ok(await c.post(f"{API}/create", json={"no_empleado": "1001"}))["id"] == eid
+
+        items = _ok(await c.get(f"{API}/{eid}/responses"))["items"]
+        assert {"field_key": "no_empleado", "value": "1001", "is_required": True} in items
+        saved = _ok(await c.post(f"{API}/{eid}/autosave", json={"responses": [{"field_key": "s_q1_obs", "value": "x"}]}))
+        assert saved == {"ok": True, "buffered": buffered}
+        values = {r["field_key"]: r["value"] for r in _ok(await c.get(f"{API}/{eid}/responses"))["items"]}
+        assert values["s_q1_obs"] == "x"
+
+        pending = _ok(await c.post(f"{API}/{eid}/complete"))
+        assert not pending["ok"] and pending["missing_sign_roles"] == roles
+
+        filled = [{"field_key": r["field_key"], "value": r["value"] or "Si"} for r in items if r["is_required"]]
+        body = _ok(await c.post(f"{API}/{eid}/responses", json={"responses": filled}))
+        assert body["required_filled"] == body["required_total"] and body["missing_labels"] == []
+        for role in roles:
+            _ok(await c.post(f"{API}/{eid}/sign", json={"role": role, "signer_name": "Ana", "strokes": STROKES}))
+        assert _ok(await c.post(f"{API}/{eid}/sign", json={"role": "x"}), 400)
+
+        done = _ok(await c.post(f"{API}/{eid}/complete"))
+        assert done == {"ok": True, "missing_required": [], "missing_sign_roles": []}
+        return eid
+
+    eid = run(app, scenario)
+    with flask_app.app_context():
+        ev = EvaluationRepository.get(eid)
+        assert ev.status == EvalStatus.COMPLETADA
+        assert ev.signed_mask == (1 << len(roles)) - 1
+        values = {r["field_key"]: r["value"] for r in EvaluationRepository.get_responses(eid)}
+        assert values["s_q1_obs"] == "x"
+
+
+def test_concurrent_tablets_share_one_pooled_engine_per_loop(asgi_factory):
+    app = asgi_factory(ASYNC_POOL_SIZE=4, ASYNC_MAX_OVERFLOW=2)
+
+    async def scenario(c):
+        engine = get_async_engine()
+        ids = [_ok(await c.post(f"{API}/create", json={"no_empleado": str(2000 + i)}))["id"] for i in range(5)]
+        calls = [c.post(f"{API}/{eid}/autosave", json={"responses": [{"field_key": "s_q1_obs", "value": str(n)}]})
+                 for n in range(8) for eid in ids]
+        calls += [c.get(f"{API}/{eid}/responses") for eid in ids for _ in range(8)]
+        responses = await asyncio.gather(*calls)
+        assert [r.status_code for r in responses] == [200] * len(calls)
+        # Mismo engine para todo el loop; el pool nunca abre más de pool_size + max_overflow conexiones
+        assert get_async_engine() is engine
+        assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+        assert engine.pool.checkedout() == 0 and engine.pool.size() == 4
+        return engine
+
+    first = run(app, scenario)
+    second = run(app, lambda c: asyncio.sleep(0, get_async_engine()))
+    assert first is not second
+
+
+def test_other_routes_fall_back_to_flask(asgi_factory):
+    app = asgi_factory()
+
+    async def scenario(c):
+        assert _ok(await c.get("/api/health")) == {"status": "ok"}
+        eid = _ok(await c.post(f"{API}/create", json={"no_empleado": "3001"}))["id"]
+        items = _ok(await c.get(f"{API}/pendientes"))["items"]
+        assert [x["id"] for x in items] == [eid]
+        origin = {"Origin": "http://tablet"}
+        preflight = await c.options(f"{API}/{eid}/responses", headers={**origin, "Access-Control-Request-Method": "POST"})
+        assert preflight.status_code == 200 and preflight.headers["Access-Control-Allow-Origin"] == "http://tablet"
+        resp = await c.get(f"{API}/{eid}/responses", headers=origin)
+        assert resp.headers["Access-Control-Allow-Origin"] == "http://tablet"
+        _ok(await c.delete(f"{API}/{eid}"))
+        assert _ok(await c.get(f"{API}/{eid}/responses"))["items"] == []
+
+    run(app, scenario)
+
+
+def test_async_views_checked_against_flask_budgets(asgi_factory):
+    app = asgi_factory(QUERY_BUDGET="raise")
+    flask_app = app.state.flask_app
+    flask_app.view_functions["api_evaluaciones.get_responses"]._query_budget = 0
+
+    async def scenario(c):
+        resp = await c.get(f"{API}/diag")
+        assert resp.headers["X-Query-Count"] == "1"
+        cursor = _ok(await c.get(f"{API}/events"))["last_id"]
+        eid = _ok(await c.post(f"{API}/create", json={"no_empleado": "4001"}))["id"]
+        feed = _ok(await c.get(f"{API}/events", params={"after": cursor}))
+        assert [e["type"] for e in feed["events"]] == ["created", "saved"]
+        resp = await c.get(f"{API}/{eid}/responses")
+        assert resp.status_code == 500 and "query budget excedido" in resp.json()["error"]
+
+    try:
+        run(app, scenario)
+    finally:
+        flask_app.view_functions["api_evaluaciones.get_responses"]._query_budget = 2
+
+
+def test_png_signature_and_pdf_export_offloaded(asgi_factory, tmp_path):
+    app = asgi_factory()
+    flask_app = app.state.flask_app
+    with flask_app.app_context():
+        roles = EvaluationService.required_sign_roles()
+    buf = io.BytesIO()
+    Image.new("RGBA", (60, 20), (0, 0, 0, 255)).save(buf, "PNG")
+    png = "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+    async def scenario(c):
+        eid = _ok(await c.post(f"{API}/create", json={"no_empleado": "5001"}))["id"]
+        assert _ok(await c.get(f"{API}/{eid}/export"), 400)["error"] == "la evaluación no está completada"
+        items = _ok(await c.get(f"{API}/{eid}/responses"))["items"]
+        filled = [{"field_key": r["field_key"], "value": r["value"] or "Si"} for r in items if r["is_required"]]
+        _ok(await c.post(f"{API}/{eid}/responses", json={"responses": filled}))
+        for role in roles:
+            _ok(await c.post(f"{API}/{eid}/sign", json={"role": role, "signer_name": "Ana", "image_base64": png}))
+        assert _ok(await c.post(f"{API}/{eid}/complete"))["ok"]
+        resp = await c.get(f"{API}/{eid}/export")
+        assert resp.status_code == 200 and resp.headers["content-type"] == "application/pdf"
+        assert resp.content.startswith(b"%PDF")
+        assert _ok(await c.get(f"{API}/99999/export"), 404)
+
+    run(app, scenario)
+    assert len(list((tmp_path / "instance" / "signatures").glob("*.png"))) == len(roles)
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+
+import pytest
+
+from app.repositories import EvaluationRepository
+from app.services import AutosaveBuffer, EvaluationService
+from app.services.autosave_buffer import _lock_file
+
+
+def _value(eid, key):
+    return next(r["value"] for r in EvaluationRepository.get_responses(eid) if r["field_key"] == key)
+
+
+def test_buffer_overlay_and_flush(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    buf = AutosaveBuffer(tmp_path / "autosave", fsync=False)
+    buf.add(ev.id, [{"field_key": "s_q1_r1", "value": "Si"}])
+    buf.add(ev.id, [{"field_key": "s_q1_r1", "value": "No"}])
+
+    assert _value(ev.id, "s_q1_r1") == ""
+    overlaid = buf.overlay(ev.id, EvaluationRepository.get_responses(ev.id))
+    assert next(r["value"] for r in overlaid if r["field_key"] == "s_q1_r1") == "No"
+
+    assert buf.flush() == 1
+    assert _value(ev.id, "s_q1_r1") == "No"
+    assert buf.journal_path.read_text() == ""
+    buf.stop()
+    assert not buf.journal_path.exists()
+
+
+def test_replay_journal_of_crashed_process(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    journal_dir.mkdir()
+    record = {"eid": ev.id, "items": [{"field_key": "p_q1_r1", "value": "Si"}]}
+    (journal_dir / "journal-999999.log").write_text(json.dumps(record) + "\n{truncado")
+
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 1
+    assert _value(ev.id, "p_q1_r1") == "Si"
+    assert not (journal_dir / "journal-999999.log").exists()
+    buf.stop()
+
+
+def test_autosave_endpoint_buffered(app_factory):
+    app = app_factory(AUTOSAVE_BUFFER=True, AUTOSAVE_FLUSH_SECONDS=60)
+    client = app.test_client()
+    with app.app_context():
+        ev = EvaluationService.create_by_no_empleado("1001")
+        resp = client.post(f"/api/evaluaciones/{ev.id}/autosave", json={"responses": [{"field_key": "s_q1_r1", "value": "Si"}]})
+        assert resp.get_json() == {"ok": True, "buffered": True}
+        items = client.get(f"/api/evaluaciones/{ev.id}/responses").get_json()["items"]
+        assert {"field_key": "s_q1_r1", "value": "Si", "is_required": True} in items
+        assert client.post("/api/evaluaciones/999/autosave", json={"responses": []}).status_code == 404
+        app.extensions["autosave"].stop()
+        assert _value(ev.id, "s_q1_r1") == "Si"
+
+
+def _journal(journal_dir, name, eid, key="p_q1_r1", value="Si"):
+    journal_dir.mkdir(exist_ok=True)
+    (journal_dir / name).write_text(json.dumps({"eid": eid, "items": [{"field_key": key, "value": value}]}) + "\n")
+
+
+def test_replay_skips_journal_of_live_owner(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    _journal(journal_dir, "journal-424242.log", ev.id)
+    owner = _lock_file(journal_dir / "journal-424242.lock")  # otro worker vivo
+
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 0
+    assert (journal_dir / "journal-424242.log").exists()
+
+    owner.close()  # el worker murió: su flock se libera
+    assert buf.replay() == 1
+    assert _value(ev.id, "p_q1_r1") == "Si"
+    assert not (journal_dir / "journal-424242.lock").exists()
+    buf.stop()
+
+
+def test_replay_without_lock_file_checks_pid(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    _journal(journal_dir, f"journal-{os.getppid()}.log", ev.id)  # pid vivo, journal de versión previa
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 0
+    assert (journal_dir / f"journal-{os.getppid()}.log").exists()
+    buf.stop()
+
+
+def test_own_pid_journal_from_previous_process_is_replayed(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    _journal(journal_dir, f"journal-{os.getpid()}.log", ev.id)
+
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 1
+    assert _value(ev.id, "p_q1_r1") == "Si"
+    assert not list(journal_dir.glob("orphan-*"))
+    buf.stop()
+
+
+def test_flush_writes_without_holding_the_buffer_lock(app, tmp_path, monkeypatch):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    buf = AutosaveBuffer(tmp_path / "autosave", fsync=False)
+    buf.add(ev.id, [{"field_key": "s_q1_r1", "value": "Si"}])
+
+    writing, release = threading.Event(), threading.Event()
+    upsert = EvaluationRepository.upsert_responses
+
+    def slow_upsert(eid, items):
+        writing.set()
+        release.wait(5)
+        return upsert(eid, items)
+
+    monkeypatch.setattr(EvaluationRepository, "upsert_responses", staticmethod(slow_upsert))
+    ctx = app.app_context()
+
+    def run_flush():
+        with ctx:
+            buf.flush()
+
+    t = threading.Thread(target=run_flush)
+    t.start()
+    assert writing.wait(5)
+    # Durante la escritura: add() no espera y overlay() sigue viendo lo que se está escribiendo
+    buf.add(ev.id, [{"field_key": "s_q1_r2", "value": "No"}])
+    overlaid = {r["field_key"]: r["value"] for r in buf.overlay(ev.id, [])}
+    assert overlaid == {"s_q1_r1": "Si", "s_q1_r2": "No"}
+    release.set()
+    t.join(5)
+
+    assert _value(ev.id, "s_q1_r1") == "Si"
+    assert buf.overlay(ev.id, []) == [{"field_key": "s_q1_r2", "value": "No", "is_required": False}]
+    assert "s_q1_r2" in buf.journal_path.read_text()
+    buf.stop()
+    assert _value(ev.id, "s_q1_r2") == "No"
+
+
+def test_failed_flush_keeps_newer_values(app, tmp_path, monkeypatch):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    buf = AutosaveBuffer(tmp_path / "autosave", fsync=False)
+    buf.add(ev.id, [{"field_key": "s_q1_r1", "value": "Si"}, {"field_key": "s_q1_obs", "value": "viejo"}])
+
+    def failing_upsert(eid, items):
+        buf.add(eid, [{"field_key": "s_q1_obs", "value": "nuevo"}])
+        raise RuntimeError("BD caída")
+
+    monkeypatch.setattr(EvaluationRepository, "upsert_responses", staticmethod(failing_upsert))
+    assert buf.flush() == 0
+    monkeypatch.undo()
+    assert {r["field_key"]: r["value"] for r in buf.overlay(ev.id, [])} == {"s_q1_r1": "Si", "s_q1_obs": "nuevo"}
+    buf.stop()
+    assert _value(ev.id, "s_q1_obs") == "nuevo"
+
+
+def test_late_flush_does_not_overwrite_newer_save(app, tmp_path):
+    # Worker A acepta X; después otro worker guarda Y explícitamente; el flush de A llega tarde
+    ev = EvaluationService.create_by_no_empleado("1001")
+    worker_a = AutosaveBuffer(tmp_path / "a", fsync=False)
+    worker_a.add(ev.id, [{"field_key": "s_q1_obs", "value": "X"}, {"field_key": "s_q1_r1", "value": "Si"}])
+    EvaluationRepository.upsert_responses(ev.id, [{"field_key": "s_q1_obs", "value": "Y"}])
+
+    assert worker_a.flush() == 1
+    assert _value(ev.id, "s_q1_obs") == "Y"
+    assert _value(ev.id, "s_q1_r1") == "Si"
+    worker_a.stop()
+
+
+def test_replayed_journal_keeps_original_saved_at(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    journal_dir.mkdir()
+    old = {"eid": ev.id, "items": [{"field_key": "p_q1_r1", "value": "viejo", "saved_at": 1.0}]}
+    (journal_dir / "journal-999999.log").write_text(json.dumps(old) + "\n")
+    EvaluationRepository.upsert_responses(ev.id, [{"field_key": "p_q1_r1", "value": "nuevo"}])
+
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 1
+    assert _value(ev.id, "p_q1_r1") == "nuevo"
+    buf.stop()
+
+
+def test_interrupted_replay_is_claimed_again(app, tmp_path):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    journal_dir = tmp_path / "autosave"
+    _journal(journal_dir, "replay-999999-journal-888888.log", ev.id)  # su reclamante murió
+    _journal(journal_dir, f"replay-{os.getppid()}-journal-777777.log", ev.id, key="s_q1_r1")  # sigue vivo
+
+    buf = AutosaveBuffer(journal_dir, fsync=False)
+    assert buf.replay() == 1
+    assert _value(ev.id, "p_q1_r1") == "Si"
+    assert _value(ev.id, "s_q1_r1") == ""
+    assert [p.name for p in journal_dir.glob("replay-*")] == [f"replay-{os.getppid()}-journal-777777.log"]
+    buf.stop()
+
+
+def test_buffer_refuses_several_workers(app_factory):
+    with pytest.raises(ValueError, match="WEB_CONCURRENCY"):
+        app_factory(AUTOSAVE_BUFFER=True, WEB_WORKERS=2)
+    app = app_factory(AUTOSAVE_BUFFER=True, WEB_WORKERS=1)
+    app.extensions["autosave"].stop()
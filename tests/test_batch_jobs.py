@@ -0,0 +1,21 @@
+from sqlalchemy import update
+
+from app.db import get_session
+from app.models import Evaluation
+from app.repositories import EvaluationRepository
+from app.services import BatchRunner, EvaluationService, JOBS
+
+
+def test_recompute_counters_resumes_from_checkpoint(app):
+    ids = [EvaluationService.create_by_no_empleado(str(n)).id for n in range(5)]
+    with get_session(write=True) as s:
+        s.execute(update(Evaluation).values(required_total=0))
+
+    first = BatchRunner(JOBS["recompute-counters"], chunk_size=2, workers=2, limit=3, log=lambda m: None).run()
+    assert (first["processed"], first["changed"]) == (3, 3)
+    assert EvaluationRepository.get(ids[3]).required_total == 0
+
+    rest = BatchRunner(JOBS["recompute-counters"], chunk_size=2, workers=2, log=lambda m: None).run()
+    assert (rest["processed"], rest["changed"]) == (2, 2)
+    assert all(EvaluationRepository.get(eid).required_total > 0 for eid in ids)
+    assert not (EvaluationService._instance_dir("maintenance") / "recompute-counters.json").exists()
@@ -0,0 +1,104 @@
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from app.db import get_session
+from app.models import Evaluation, EvaluationResponse, Signature
+from app.repositories import EvaluationRepository
+from app.services import ArchiveService, EvaluationService
+from app.services.file_cleanup import FileCleanup
+from conftest import completed_evaluation, sign_all
+
+
+def _count(model, eid):
+    with get_session() as s:
+        return s.execute(select(func.count()).select_from(model).where(model.evaluation_id == eid)).scalar()
+
+
+def test_delete_cascades(app, client):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    sign_all(ev.id, ["jefe_inmediato"])
+    assert _count(EvaluationResponse, ev.id) > 0
+
+    assert client.delete(f"/api/evaluaciones/{ev.id}").status_code == 200
+    assert _count(EvaluationResponse, ev.id) == 0
+    assert _count(Signature, ev.id) == 0
+    assert client.delete(f"/api/evaluaciones/{ev.id}").status_code == 404
+
+
+def test_bulk_delete(app, client):
+    ids = [EvaluationService.create_by_no_empleado(n).id for n in ("1", "2")]
+    url = "/api/evaluaciones/bulk-delete"
+    assert client.post(url, json={}).status_code == 400
+    assert client.post(url, json={"status": "otra"}).status_code == 400
+
+    dry = client.post(url, json={"status": "pendiente", "dry_run": True}).get_json()
+    assert dry["deleted"] == 2
+    assert EvaluationService.get_responses(ids[0])
+
+    assert client.post(url, json={"status": "pendiente"}).get_json()["deleted"] == 2
+    assert not EvaluationService.get_responses(ids[0])
+
+
+def _shared_png():
+    path = EvaluationService._instance_dir("signatures") / "compartida.png"
+    path.write_bytes(b"\x89PNG")
+    return str(path)
+
+
+def test_shared_signature_file_survives_until_last_reference(app_factory):
+    app = app_factory(QUERY_BUDGET="raise")
+    client = app.test_client()
+    with app.app_context():
+        png = _shared_png()
+        a, b = (EvaluationService.create_by_no_empleado(n).id for n in ("1", "2"))
+        for eid in (a, b):
+            EvaluationRepository.add_signature(eid, "jefe_inmediato", "Ana", png)
+
+        assert client.delete(f"/api/evaluaciones/{a}").status_code == 200
+        FileCleanup.drain()
+        assert os.path.exists(png)
+
+        assert client.delete(f"/api/evaluaciones/{b}").status_code == 200
+        FileCleanup.drain()
+        assert not os.path.exists(png)
+
+
+def test_archive_keeps_shared_signature_file(app):
+    png = _shared_png()
+    archived = completed_evaluation("1")
+    EvaluationRepository.add_signature(archived, "testigo", "Ana", png)
+    live = EvaluationService.create_by_no_empleado("2").id
+    EvaluationRepository.add_signature(live, "jefe_inmediato", "Ana", png)
+
+    assert ArchiveService.archive_completed(older_than_days=-1, log=lambda m: None) == 1
+    FileCleanup.drain()
+    assert os.path.exists(png)
+    sigs = {sg["role"]: sg for sg in ArchiveService.snapshot(archived)["signatures"]}
+    assert sigs["testigo"]["image_b64"]
+
+
+def _created_on(eid, day):
+    with get_session(write=True) as s:
+        s.get(Evaluation, eid).created_at = datetime(*day, 18, tzinfo=timezone.utc)
+
+
+def test_bulk_delete_by_date_only(app, client):
+    old, mid, new = (EvaluationService.create_by_no_empleado(n).id for n in ("1", "2", "3"))
+    _created_on(old, (2023, 12, 31))
+    _created_on(mid, (2024, 1, 1))
+    _created_on(new, (2024, 3, 1))
+    url = "/api/evaluaciones/bulk-delete"
+
+    assert client.post(url, json={"to": "2024-13-01"}).status_code == 400
+    assert client.post(url, json={"from": "ayer"}).status_code == 400
+
+    until = client.post(url, json={"to": "2024-01-01", "dry_run": True}).get_json()
+    assert until["deleted"] == 2
+    since = client.post(url, json={"from": "2024-01-01", "dry_run": True}).get_json()
+    assert since["deleted"] == 2
+
+    assert client.post(url, json={"to": "2023-12-31"}).get_json()["deleted"] == 1
+    assert client.post(url, json={"from": "2024-02-01"}).get_json()["deleted"] == 1
+    assert [EvaluationRepository.exists(e) for e in (old, mid, new)] == [False, True, False]
@@ -0,0 +1,64 @@
+import sqlite3
+
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.dialects import sqlite
+
+from app.models import Evaluation
+from app.repositories import ArchiveRepository, EvaluationRepository
+from app.services import ArchiveService, EvaluationService
+from conftest import completed_evaluation
+
+
+def _legacy_schema(db_path):
+    """evaluations como la creaban las versiones sin sqlite_autoincrement."""
+    ddl = str(CreateTable(Evaluation.__table__).compile(dialect=sqlite.dialect()))
+    con = sqlite3.connect(db_path)
+    con.executescript(
+        "PRAGMA foreign_keys=OFF;"
+        "DROP TABLE evaluations;"
+        + ddl.replace(" AUTOINCREMENT", "") + ";"
+        "CREATE UNIQUE INDEX ix_evaluations_folio ON evaluations (folio);"
+        "DELETE FROM sqlite_sequence;"
+    )
+    con.close()
+
+
+def test_archived_ids_are_not_reused(app_factory, tmp_path):
+    db_path = tmp_path / "test.db"
+    app_factory()
+    _legacy_schema(db_path)
+
+    with app_factory().app_context():
+        kept = EvaluationService.create_by_no_empleado("1001").id
+        archived = completed_evaluation("1002")
+        assert ArchiveService.archive_completed(older_than_days=-1, log=lambda m: None) == 1
+
+        new_id = EvaluationService.create_by_no_empleado("1003").id
+        assert new_id > archived
+        assert EvaluationRepository.get(new_id).folio.endswith("1003")
+        assert ArchiveRepository.exists(archived)
+        assert EvaluationRepository.get(kept).folio.endswith("1001")
+        assert kept < archived < new_id
+
+
+def test_legacy_table_is_rebuilt(app_factory, tmp_path):
+    db_path = tmp_path / "test.db"
+    app_factory()
+    _legacy_schema(db_path)
+    con = sqlite3.connect(db_path)
+    con.execute("INSERT INTO evaluation_archives (id, folio, no_empleado, created_at, completed_at, archived_at,"
+                " payload, pdf) VALUES (7, 'EC-X', '', '2024-01-01', '2024-01-01', '2024-01-01', x'', x'')")
+    con.commit()
+    con.close()
+
+    with app_factory().app_context():
+        ev = EvaluationService.create_by_no_empleado("1001")
+        assert ev.id == 8
+        assert len(EvaluationRepository.get_responses(ev.id)) > 200
+
+    con = sqlite3.connect(db_path)
+    sql = con.execute("SELECT sql FROM sqlite_master WHERE name='evaluations'").fetchone()[0]
+    indexes = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE tbl_name='evaluations' AND type='index'")}
+    con.close()
+    assert "AUTOINCREMENT" in sql
+    assert {"ix_evaluations_folio", "ix_evaluations_status"} <= indexes
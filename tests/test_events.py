@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.db import get_session
+from app.models import EvaluationEvent
+from app.services import EvaluationService, EventFeedService
+
+
+def test_poll_resumes_after_id(app):
+    ev = EvaluationService.create_by_no_empleado("1001")
+
+    feed = EventFeedService.poll(0)
+    assert [e["type"] for e in feed["events"]][:2] == ["created", "saved"]
+    assert feed["events"][0]["data"]["id"] == ev.id
+    assert feed["last_id"] == feed["events"][-1]["event_id"]
+    assert not feed["reset"] and not feed["more"]
+
+    assert EventFeedService.poll(feed["last_id"])["events"] == []
+    EvaluationService.delete(ev.id)
+    again = EventFeedService.poll(feed["last_id"])
+    assert [e["type"] for e in again["events"]] == ["deleted"]
+
+
+def test_poll_pages_large_backlogs(app):
+    for n in ("1", "2", "3"):
+        EvaluationService.create_by_no_empleado(n)
+    first = EventFeedService.poll(0, limit=2)
+    assert first["more"] and len(first["events"]) == 2
+    rest = EventFeedService.poll(first["last_id"], limit=100)
+    assert not rest["more"] and rest["events"][0]["event_id"] == first["last_id"] + 1
+
+
+def test_first_poll_returns_cursor_without_history(app, client):
+    EvaluationService.create_by_no_empleado("1001")
+    resp = client.get("/api/evaluaciones/events")
+    body = resp.get_json()
+    assert resp.status_code == 200 and resp.headers["Cache-Control"] == "no-store"
+    assert body["events"] == [] and body["last_id"] > 0
+    assert body["poll_ms"] == 3000
+    assert client.get("/api/evaluaciones/events?after=x").status_code == 400
+
+
+def test_reset_when_events_cannot_be_resumed(app, client):
+    EvaluationService.create_by_no_empleado("1001")
+    last = client.get("/api/evaluaciones/events").get_json()["last_id"]
+    assert client.get(f"/api/evaluaciones/events?after={last + 50}").get_json()["reset"]
+
+    EvaluationService.create_by_no_empleado("1002")
+    with get_session(write=True) as s:  # los eventos de 1001 quedan fuera de la retención
+        s.execute(update(EvaluationEvent).where(EvaluationEvent.id <= last)
+                  .values(created_at=datetime.now(timezone.utc) - timedelta(days=2)))
+    EventFeedService.prune()
+    assert client.get("/api/evaluaciones/events?after=0").get_json()["reset"]
+    assert not client.get(f"/api/evaluaciones/events?after={last}").get_json()["reset"]
@@ -0,0 +1,56 @@
+import sys
+import types
+
+import pytest
+
+from app.services.pdf_renderers import PdfRenderer, get_renderer
+from conftest import completed_evaluation
+
+
+def test_export_completed_pdf(app, client):
+    eid = completed_evaluation()
+    resp = client.get(f"/api/evaluaciones/{eid}/export")
+    assert resp.status_code == 200
+    assert resp.data.startswith(b"%PDF")
+    assert resp.headers["Content-Disposition"].endswith(".pdf")
+
+
+def test_pending_is_not_exported(app, client):
+    from app.services import EvaluationService
+    ev = EvaluationService.create_by_no_empleado("1001")
+    assert client.get(f"/api/evaluaciones/{ev.id}/export").status_code == 400
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_renderer("latex")
+
+
+def test_renderer_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PdfRenderer()
+
+
+def test_weasyprint_renders_inline_svg_signatures(app_factory, monkeypatch):
+    # pango/cairo no están en el entorno de tests: se sustituye weasyprint.HTML
+    rendered = []
+
+    class HTML:
+        def __init__(self, string, base_url=None):
+            rendered.append(string)
+
+        def write_pdf(self, target):
+            with open(target, "wb") as f:
+                f.write(b"%PDF-stub")
+
+    monkeypatch.setitem(sys.modules, "weasyprint", types.SimpleNamespace(HTML=HTML))
+    app = app_factory(PDF_BACKEND="weasyprint")
+    with app.app_context():
+        eid = completed_evaluation()
+        resp = app.test_client().get(f"/api/evaluaciones/{eid}/export")
+
+    assert resp.status_code == 200 and resp.data == b"%PDF-stub"
+    html, = rendered
+    assert html.count("<svg ") == 5
+    assert html.count("<img ") == 1  # solo el logo; ninguna firma como imagen
+    assert "EC-" in html
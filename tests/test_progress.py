@@ -0,0 +1,51 @@
+from sqlalchemy import update
+
+from app.db import get_session
+from app.models import Evaluation
+from app.repositories import EvaluationRepository, progress_payload
+from app.repositories.evaluation_repo import progress_counters
+from app.services import EvaluationService
+from conftest import sign_all
+
+
+def test_progress_counters():
+    rows = [
+        ("no_empleado", True, "1001"),
+        ("s_q1_r1", True, "Si"),
+        ("s_q1_r2", False, "No"),
+        ("s_q2_r1", True, ""),
+        ("vc_q1_r1", True, "Si"),
+        ("vc_q1_obs", False, "texto"),
+    ]
+    c = progress_counters(rows)
+    assert (c["required_total"], c["required_filled"]) == (4, 3)
+    assert (c["s_filled"], c["vc_filled"], c["p_filled"]) == (1, 1, 0)
+    assert (c["r1_filled"], c["r2_filled"], c["r3_filled"]) == (2, 1, 0)
+
+
+def test_counters_follow_saves_and_signatures(app):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    EvaluationRepository.upsert_responses(ev.id, [{"field_key": "s_q1_r1", "value": "Si"},
+                                                 {"field_key": "s_q1_r2", "value": "No"}])
+    sign_all(ev.id, ["jefe_inmediato", "entrenamiento"])
+
+    p = progress_payload(EvaluationRepository.get(ev.id))
+    assert p["sections"]["S"] == 1
+    assert p["revisions"][:2] == [1, 1]
+    bits = EvaluationService.sign_role_bits()
+    assert p["signed_mask"] == bits["jefe_inmediato"] | bits["entrenamiento"]
+
+
+def test_recompute_progress_repairs_drift(app):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    EvaluationRepository.upsert_responses(ev.id, [{"field_key": "s_q1_r1", "value": "Si"}])
+    sign_all(ev.id, ["ing_calidad"])
+    with get_session(write=True) as s:
+        s.execute(update(Evaluation).where(Evaluation.id == ev.id).values(s_filled=0, signed_mask=0))
+
+    bits = EvaluationService.sign_role_bits()
+    assert EvaluationRepository.recompute_progress([ev.id], bits, dry_run=True) == 1
+    assert EvaluationRepository.recompute_progress([ev.id], bits) == 1
+    fixed = EvaluationRepository.get(ev.id)
+    assert (fixed.s_filled, fixed.signed_mask) == (1, bits["ing_calidad"])
+    assert EvaluationRepository.recompute_progress([ev.id], bits) == 0
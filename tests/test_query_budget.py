@@ -0,0 +1,124 @@
+import pytest
+from flask import request
+from sqlalchemy import create_engine, text
+
+from app.db import get_session
+from app.query_budget import QueryBudgetExceeded, budget_for, count_queries
+from app.services import ArchiveService, EvaluationService
+from conftest import STROKES, completed_evaluation
+
+
+def test_request_count_header(app_factory):
+    app = app_factory(QUERY_BUDGET="raise")
+    resp = app.test_client().get("/api/evaluaciones/diag")
+    assert resp.status_code == 200
+    assert resp.headers["X-Query-Count"] == "1"
+
+
+def test_count_queries_raises_over_budget(app_factory):
+    app = app_factory(QUERY_BUDGET="raise")
+    with app.app_context():
+        with count_queries(5) as qc:
+            with get_session() as s:
+                s.execute(text("SELECT 1"))
+        assert qc.count == 1
+        with pytest.raises(QueryBudgetExceeded):
+            with count_queries(1, "dos selects"):
+                with get_session() as s:
+                    s.execute(text("SELECT 1"))
+                    s.execute(text("SELECT 2"))
+
+
+def test_count_queries_outside_app_context():
+    engine = create_engine("sqlite://")
+    with engine.connect() as c:
+        with count_queries(2, "script") as qc:
+            c.exec_driver_sql("SELECT 1")
+            c.exec_driver_sql("SELECT 2")
+        assert qc.count == 2
+        with pytest.raises(QueryBudgetExceeded, match="script"):
+            with count_queries(1, "script"):
+                c.exec_driver_sql("SELECT 1")
+                c.exec_driver_sql("SELECT 2")
+        with count_queries() as qc:
+            c.exec_driver_sql("SELECT 1")
+        assert qc.count == 1
+
+
+API = "/api/evaluaciones"
+
+
+def _ok(resp, status=200):
+    assert resp.status_code == status, resp.get_data(as_text=True)
+    return resp.get_json()
+
+
+@pytest.mark.parametrize("buffered", [False, True])
+def test_every_endpoint_within_budget(app_factory, buffered):
+    app = app_factory(QUERY_BUDGET="raise", QUERY_RAISELOAD=True, AUTOSAVE_BUFFER=buffered, AUTOSAVE_FLUSH_SECONDS=60)
+    hit = set()
+    app.before_request(lambda: hit.add(request.endpoint))
+    client = app.test_client()
+
+    _ok(client.get(f"{API}/diag"))
+    _ok(client.get(f"{API}/plantilla"))
+    cursor = _ok(client.get(f"{API}/events"))["last_id"]
+    eid = _ok(client.post(f"{API}/create", json={"no_empleado": "1001"}))["id"]
+
+    # Con buffer, cada escritura encuentra algo pendiente y paga el flush previo
+    def autosave(key, value):
+        _ok(client.post(f"{API}/{eid}/autosave", json={"responses": [{"field_key": key, "value": value}]}))
+
+    items = _ok(client.get(f"{API}/{eid}/responses"))["items"]
+    autosave("s_q1_obs", "borrador")
+    filled = [{"field_key": r["field_key"], "value": r["value"] or "Si"} for r in items if r["is_required"]]
+    _ok(client.post(f"{API}/{eid}/responses", json={"responses": filled}))
+    with app.app_context():
+        roles = EvaluationService.required_sign_roles()
+    for role in roles:
+        autosave("s_q1_obs", f"antes de {role}")
+        _ok(client.post(f"{API}/{eid}/sign", json={"role": role, "signer_name": "Ana", "strokes": STROKES}))
+    autosave("s_q1_obs", "final")
+    assert _ok(client.post(f"{API}/{eid}/complete"))["ok"]
+
+    _ok(client.get(f"{API}/pendientes"))
+    _ok(client.get(f"{API}/completadas"))
+    assert client.get(f"{API}/{eid}/export").data.startswith(b"%PDF")
+    with client.get(f"{API}/export?status=todas") as resp:  # el cuerpo se verifica al cerrar
+        assert "final" in resp.get_data(as_text=True)
+    assert _ok(client.get(f"{API}/events?after={cursor}"))["events"]
+
+    doomed = _ok(client.post(f"{API}/create", json={"no_empleado": "1002"}))["id"]
+    _ok(client.delete(f"{API}/{doomed}"))
+    _ok(client.post(f"{API}/create", json={"no_empleado": "1003"}))
+    assert _ok(client.post(f"{API}/bulk-delete", json={"status": "pendiente"}))["deleted"] == 1
+
+    if buffered:
+        app.extensions["autosave"].stop()
+    assert hit == {r.endpoint for r in app.url_map.iter_rules() if r.endpoint.startswith("api_evaluaciones.")}
+
+
+def test_autosave_flush_allowance_only_with_buffer(app_factory):
+    for buffered, expected in ((False, 8), (True, 13)):
+        app = app_factory(AUTOSAVE_BUFFER=buffered)
+        with app.app_context():
+            assert budget_for(app.view_functions["api_evaluaciones.upsert_responses"]) == expected
+        if buffered:
+            app.extensions["autosave"].stop()
+
+
+def test_streamed_body_is_counted_on_close(app_factory, monkeypatch):
+    app = app_factory(QUERY_BUDGET="raise")
+    with app.app_context():
+        completed_evaluation("1")
+        ArchiveService.archive_completed(older_than_days=-1, log=lambda m: None)
+        completed_evaluation("2")
+    client = app.test_client()
+    with client.get(f"{API}/export") as resp:
+        assert len(resp.get_data(as_text=True).splitlines()) == 3
+
+    view = app.view_functions["api_evaluaciones.export_tabular"]
+    monkeypatch.setattr(view, "_query_budget_stream", 1)
+    with pytest.raises(QueryBudgetExceeded, match="cuerpo"):
+        with client.get(f"{API}/export") as resp:
+            resp.get_data()
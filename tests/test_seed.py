@@ -0,0 +1,26 @@
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+from app.services.signature_strokes import decode_strokes
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_seed_small_run(tmp_path):
+    db = tmp_path / "seed.db"
+    subprocess.run(
+        [sys.executable, str(ROOT / "seed_template.py"), "-n", "30", "--batch-size", "10", "--employees", "200",
+         "--database-url", f"sqlite:///{db.as_posix()}"],
+        check=True, capture_output=True, cwd=tmp_path,
+    )
+    con = sqlite3.connect(db)
+    assert con.execute("SELECT count(*) FROM evaluations").fetchone()[0] == 30
+    per_eval = con.execute("SELECT count(*) FROM evaluation_responses GROUP BY evaluation_id").fetchall()
+    assert len(per_eval) == 30 and len({n for n, in per_eval}) == 1
+    sigs = con.execute("SELECT image_path, strokes FROM signatures").fetchall()
+    con.close()
+    assert sigs
+    # Firmas vectoriales: ningún archivo compartido que un borrado pueda llevarse
+    assert all(path == "" and decode_strokes(strokes)["w"] == 900 for path, strokes in sigs)
@@ -0,0 +1,58 @@
+import pytest
+
+from app.repositories import EvaluationRepository
+from app.services import EvaluationService
+from app.services.signature_strokes import decode_strokes, encode_strokes, parse_strokes
+from conftest import STROKES
+
+
+def test_encode_decode_roundtrip():
+    data = parse_strokes(STROKES)
+    back = decode_strokes(encode_strokes(data))
+    assert (back["w"], back["h"]) == (300, 120)
+    assert [[v for pt in st for v in pt] for st in back["strokes"]] == STROKES["strokes"]
+
+
+@pytest.mark.parametrize("bad", [
+    {},
+    {"w": 300, "h": 120, "strokes": []},
+    {"w": 0, "h": 120, "strokes": [[1, 2]]},
+    {"w": 300, "h": 120, "strokes": [[1, 2, 3]]},
+    {"w": 300, "h": 120, "strokes": [["x", 2]]},
+])
+def test_parse_rejects(bad):
+    with pytest.raises(ValueError):
+        parse_strokes(bad)
+
+
+def test_sign_with_strokes(app, client):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    url = f"/api/evaluaciones/{ev.id}/sign"
+    body = {"role": "jefe_inmediato", "signer_name": "Ana", "strokes": STROKES}
+    assert client.post(url, json=body).status_code == 200
+    sig = EvaluationRepository.get_with_children(ev.id).signatures[0]
+    assert sig.image_path == "" and decode_strokes(sig.strokes)["w"] == 300
+
+    assert client.post(url, json={**body, "strokes": {"w": 1, "h": 1, "strokes": "x"}}).status_code == 400
+
+
+@pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan"), 1e400])
+def test_parse_rejects_non_finite(value):
+    with pytest.raises(ValueError, match="no finita"):
+        parse_strokes({"w": 300, "h": 120, "strokes": [[10, 10, value, 20]]})
+    with pytest.raises(ValueError):
+        parse_strokes({"w": value, "h": 120, "strokes": [[10, 10]]})
+
+
+def test_parse_clamps_to_canvas():
+    data = parse_strokes({"w": 300, "h": 120, "strokes": [[-50, 10, 1e12, 500, 150.6, -0.4]]})
+    assert data["strokes"] == [[0, 10, 300, 120, 151, 0]]
+
+
+def test_sign_rejects_infinity_with_400(app, client):
+    ev = EvaluationService.create_by_no_empleado("1001")
+    body = '{"role": "jefe_inmediato", "signer_name": "Ana", "strokes": {"w": 300, "h": 120, "strokes": [[1, Infinity]]}}'
+    resp = client.post(f"/api/evaluaciones/{ev.id}/sign", data=body, content_type="application/json")
+    assert resp.status_code == 400
+    assert "no finita" in resp.get_json()["error"]
+    assert not EvaluationRepository.get_with_children(ev.id).signatures
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from app.repositories import EvaluationRepository
+from app.services import EvaluationService
+from app.services.evaluation_service import to_local
+from conftest import completed_evaluation
+
+
+def _get(client, url):
+    # El test client no cierra las respuestas en streaming (libera la admisión al cerrar)
+    with client.get(url) as resp:
+        return resp.status_code, resp.get_data(as_text=True)
+
+
+def test_csv_one_row_per_evaluation(app, client):
+    done = completed_evaluation("1001")
+    EvaluationService.create_by_no_empleado("1002")
+
+    status, body = _get(client, "/api/evaluaciones/export?format=csv")
+    assert status == 200
+    rows = list(csv.DictReader(io.StringIO(body.lstrip("\ufeff"))))
+    assert [int(r["id"]) for r in rows] == [done]
+    assert rows[0]["no_empleado"] == "1001"
+
+    _, body = _get(client, "/api/evaluaciones/export?format=jsonl&status=todas")
+    assert len(body.splitlines()) == 2
+
+
+def test_area_filter(app, client):
+    eid = completed_evaluation("1001")
+    EvaluationRepository.upsert_responses(eid, [{"field_key": "area", "value": "Ensamble"}])
+    _, body = _get(client, "/api/evaluaciones/export?format=jsonl&area=Ensamble")
+    assert [json.loads(x)["id"] for x in body.splitlines()] == [eid]
+    assert _get(client, "/api/evaluaciones/export?format=jsonl&area=Otra") == (200, "")
+
+
+def test_unknown_format(client):
+    assert _get(client, "/api/evaluaciones/export?format=xlsx")[0] == 400
+
+
+def test_invalid_filters_are_rejected_before_streaming(app, client):
+    completed_evaluation("1001")
+    for query in ("from=2024-13-01", "to=ayer", "from=2024-01", "status=borrador"):
+        status, body = _get(client, f"/api/evaluaciones/export?format=csv&{query}")
+        assert status == 400, query
+        assert "error" in json.loads(body)
+
+
+def test_date_window(app, client):
+    eid = completed_evaluation("1001")
+    today = to_local(datetime.now(timezone.utc)).date().isoformat()
+    _, body = _get(client, f"/api/evaluaciones/export?format=jsonl&from={today}&to={today}")
+    assert [json.loads(x)["id"] for x in body.splitlines()] == [eid]
+    assert _get(client, "/api/evaluaciones/export?format=jsonl&from=2000-01-01&to=2000-01-31") == (200, "")
+
+
+def test_cli_rejects_bad_date(app, tmp_path):
+    out = tmp_path / "out.csv"
+    result = app.test_cli_runner().invoke(args=["export-evaluations", "--from", "2024-02-30", "--out", str(out)])
+    assert result.exit_code == 2
+    assert "fecha inválida" in result.output
+    assert not out.exists()